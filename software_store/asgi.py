@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'software_store.settings')
 
 application = get_asgi_application()
+
+# Só no processo web: grava os contadores de download pendentes ao receber
+# SIGTERM (docker stop) antes de chamar o tratador anterior
+from store.counters import install_signal_handlers  # noqa: E402
+
+install_signal_handlers()
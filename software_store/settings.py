@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 import dj_database_url
 
@@ -121,6 +122,39 @@ DATABASES = {
     )
 }
 
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # Web e worker gravam no mesmo arquivo: escritas esperam o lock (timeout,
+    # em segundos) em vez de falhar com "database is locked"; WAL deixa as
+    # leituras seguirem durante as importações.
+    DATABASES['default'].setdefault('OPTIONS', {}).update({
+        'timeout': int(os.environ.get('SQLITE_TIMEOUT', '30')),
+        'transaction_mode': 'IMMEDIATE',
+        'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+    })
+
+# Cache compartilhado: versões do catálogo e das tarefas por host, fragmentos
+# da vitrine, long-poll dos agentes. Precisa ser visto por todos os processos
+# (web, worker, comandos de importação); um cache local ao processo
+# (LocMemCache) deixa os outros processos com dados antigos. O padrão é o
+# Redis (serviço `redis` dos docker-compose). Sem Redis, o cache no banco
+# funciona como alternativa (a tabela é criada pelo migrate), mas cada leitura
+# vira uma consulta SQL e o long-poll dos agentes fica desligado:
+# CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache
+REDIS_CACHE = 'django.core.cache.backends.redis.RedisCache'
+DATABASE_CACHE = 'django.core.cache.backends.db.DatabaseCache'
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND') or (
+    # Os testes usam o banco de teste, sem depender de um Redis em execução
+    DATABASE_CACHE if sys.argv[1:2] == ['test'] else REDIS_CACHE
+)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION') or (
+            'software_store_cache' if CACHE_BACKEND == DATABASE_CACHE else 'redis://127.0.0.1:6379/1'
+        ),
+    }
+}
+
 # Configurações de segurança HTTPS para produção
 USE_TLS = os.environ.get('USE_TLS', 'False').lower() in ('1', 'true', 'yes')
 
@@ -187,8 +221,14 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-# Enable WhiteNoise compressed manifest storage for efficient static files
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Enable WhiteNoise compressed manifest storage for efficient static files:
+# nomes com hash do conteúdo (servidos com cache imutável) e cópias .gz
+# geradas no collectstatic. O antigo STATICFILES_STORAGE não existe mais
+# desde o Django 5.1 e era ignorado.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -200,6 +240,14 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 # Configurações para upload de arquivos
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Serve /media pelo Django mesmo com DEBUG desligado (apenas sem proxy na frente)
+SERVE_MEDIA = os.environ.get('SERVE_MEDIA', 'False').lower() in ('1', 'true', 'yes')
+
+# Upload handlers que calculam o SHA-256 dos arquivos durante o recebimento
+FILE_UPLOAD_HANDLERS = [
+    'store.storage.HashingMemoryFileUploadHandler',
+    'store.storage.HashingTemporaryFileUploadHandler',
+]
 
 # Tamanho máximo de upload (10MB)
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
@@ -217,6 +265,85 @@ MESSAGE_TAGS = {
 }
 
 
+# Tempo máximo (segundos) de valores do catálogo em cache; alterações invalidam antes
+CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', '3600'))
+# O autocompletar lê a versão do catálogo (e percebe alterações feitas por
+# outros processos) no máximo uma vez a cada tantos segundos
+TYPEAHEAD_VERSION_CHECK_INTERVAL = float(os.environ.get('TYPEAHEAD_VERSION_CHECK_INTERVAL', '1'))
+
+# Máximo de resultados considerados em uma busca no catálogo
+SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', '500'))
+
+# API do agente: tempo máximo (segundos) que uma requisição de long-poll fica aguardando.
+# Cada agente aguardando ocupa uma thread do servidor durante esse tempo: o
+# runserver usa uma thread por requisição; com gunicorn, use workers com threads
+# (--worker-class gthread --threads N) com N acima do número de agentes que
+# consultam ao mesmo tempo, ou AGENT_LONG_POLL_MAX_WAIT=0 para desligar a espera.
+AGENT_LONG_POLL_MAX_WAIT = int(os.environ.get('AGENT_LONG_POLL_MAX_WAIT', '25'))
+AGENT_LONG_POLL_INTERVAL = float(os.environ.get('AGENT_LONG_POLL_INTERVAL', '1'))
+# Duração padrão do lease de uma tarefa reivindicada e limite por reivindicação
+AGENT_TASK_LEASE_SECONDS = int(os.environ.get('AGENT_TASK_LEASE_SECONDS', '900'))
+# Maior lease aceito em /claim/: um agente que some com um lease longo prenderia
+# as tarefas do host por todo esse tempo
+TASK_LEASE_MAX_SECONDS = int(os.environ.get('TASK_LEASE_MAX_SECONDS', '3600'))
+AGENT_CLAIM_MAX_TASKS = int(os.environ.get('AGENT_CLAIM_MAX_TASKS', '10'))
+# Máximo de itens aceitos na atualização em lote de status
+AGENT_BATCH_MAX_ITEMS = int(os.environ.get('AGENT_BATCH_MAX_ITEMS', '100'))
+
+# KACE: cache da resolução usuário -> hostname e pool de conexões
+KACE_CACHE_TTL = int(os.environ.get('KACE_CACHE_TTL', '900'))
+KACE_NEGATIVE_CACHE_TTL = int(os.environ.get('KACE_NEGATIVE_CACHE_TTL', '60'))
+KACE_POOL_SIZE = int(os.environ.get('KACE_POOL_SIZE', '4'))
+# Espera máxima (segundos) pela resolução do hostname ao clicar em Instalar
+KACE_RESOLVE_WAIT = float(os.environ.get('KACE_RESOLVE_WAIT', '5'))
+
+# Contador de downloads: incrementos acumulados por processo e gravados em lote
+# a cada DOWNLOAD_COUNTER_FLUSH_INTERVAL segundos ou ao atingir o limite
+DOWNLOAD_COUNTER_BUFFERED = os.environ.get('DOWNLOAD_COUNTER_BUFFERED', 'True').lower() in ('1', 'true', 'yes')
+DOWNLOAD_COUNTER_FLUSH_INTERVAL = float(os.environ.get('DOWNLOAD_COUNTER_FLUSH_INTERVAL', '10'))
+DOWNLOAD_COUNTER_FLUSH_THRESHOLD = int(os.environ.get('DOWNLOAD_COUNTER_FLUSH_THRESHOLD', '100'))
+
+# Threads para tarefas de segundo plano dentro do processo web
+BACKGROUND_WORKERS = int(os.environ.get('BACKGROUND_WORKERS', '4'))
+
+# Download de instaladores: '' (Django transmite o arquivo), 'nginx'
+# (X-Accel-Redirect) ou 'apache' (X-Sendfile). Para o nginx, o prefixo deve
+# apontar para o MEDIA_ROOT em uma location interna, por exemplo:
+#   location /protected/ { internal; alias /app/media/; }
+SENDFILE_BACKEND = os.environ.get('SENDFILE_BACKEND', '').lower()
+SENDFILE_URL_PREFIX = os.environ.get('SENDFILE_URL_PREFIX', '/protected/')
+
+# Patches binários entre versões de um instalador (zstd --patch-from ou bsdiff4).
+# Formato vazio = primeiro disponível; patches maiores que a fração
+# INSTALLER_DELTA_MAX_RATIO do instalador completo são descartados.
+INSTALLER_DELTAS_ENABLED = os.environ.get('INSTALLER_DELTAS_ENABLED', 'False').lower() in ('1', 'true', 'yes')
+INSTALLER_DELTA_BACKEND = os.environ.get('INSTALLER_DELTA_BACKEND', '')
+INSTALLER_DELTA_MAX_RATIO = float(os.environ.get('INSTALLER_DELTA_MAX_RATIO', '0.8'))
+# Deltas são gerados pelo worker (run_jobs); instaladores maiores que isso (padrão:
+# a janela de 2 GiB do zstd --long=31) não geram delta
+INSTALLER_DELTA_MAX_INPUT_SIZE = int(os.environ.get('INSTALLER_DELTA_MAX_INPUT_SIZE', str(2 ** 31)))
+
+# Fila de trabalhos em segundo plano (comando run_jobs, container "worker").
+# Jobs sem sinal do worker por JOB_STALE_TIMEOUT segundos voltam para a fila,
+# até JOB_MAX_ATTEMPTS tentativas; depois disso falham.
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', '2'))
+JOB_STALE_TIMEOUT = int(os.environ.get('JOB_STALE_TIMEOUT', '300'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))
+JOB_IMPORT_BATCH_SIZE = int(os.environ.get('JOB_IMPORT_BATCH_SIZE', '500'))
+# Jobs periódicos enfileirados pelo próprio worker: tipo -> intervalo em segundos
+# (0 desliga). Um tipo só ganha um job novo quando o anterior terminou e foi
+# criado há mais que o intervalo. Sem worker rodando, agende os comandos
+# equivalentes no cron (manage.py sync_kace_machines, manage.py rollup_analytics).
+PERIODIC_JOBS = {
+    # Tabela local usuário -> hostname (KaceMachine); só com o KACE configurado
+    'sync_kace_machines': int(os.environ.get('KACE_SYNC_INTERVAL', '900' if os.environ.get('KACE_DB_HOST') else '0')),
+    # Tabelas agregadas do painel de downloads e instalações
+    'rollup_analytics': int(os.environ.get('ANALYTICS_ROLLUP_INTERVAL', '300')),
+}
+# Ações em massa do admin com mais itens selecionados que isso rodam como job.
+ADMIN_BULK_ACTION_JOB_THRESHOLD = int(os.environ.get('ADMIN_BULK_ACTION_JOB_THRESHOLD', '200'))
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
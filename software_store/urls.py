@@ -15,10 +15,12 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from django.views.static import serve
+from store.views import serve_rendition
 import os
+import re
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -26,6 +28,22 @@ urlpatterns = [
     path('', include('social_django.urls', namespace='social')), # URLs do Azure OAuth2
 ]
 
-# Configuração para servir arquivos de mídia (forçado neste ambiente Docker de dev)
-# Em produção real, sirva /media via Nginx e remova esta linha.
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Variantes de ícones/screenshots (nomes com hash): sempre servidas, com cache
+# imutável. Atrás do nginx, prefira `location /media/renditions/ { expires max; }`.
+urlpatterns += [
+    re_path(
+        r'^%srenditions/(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+        serve_rendition
+    ),
+]
+
+# Arquivos de mídia servidos pelo Django apenas em DEBUG ou com SERVE_MEDIA=1
+# (ambiente Docker de dev). Em produção, sirva /media via Nginx; instaladores
+# saem pela view de download, que pode delegar ao proxy (SENDFILE_BACKEND).
+if settings.DEBUG or settings.SERVE_MEDIA:
+    urlpatterns += [
+        re_path(
+            r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+            serve, {'document_root': settings.MEDIA_ROOT}
+        ),
+    ]
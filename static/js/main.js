@@ -15,6 +15,12 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Configura o botão de voltar ao topo
     setupBackToTopButton();
+
+    // Configura o autocompletar da busca
+    setupTypeahead();
+
+    // Carrega as screenshots da página de detalhes sob demanda
+    setupScreenshots();
 });
 
 /**
@@ -90,6 +96,129 @@ function setupBackToTopButton() {
     }
 }
 
+/**
+ * Configura o autocompletar da caixa de busca
+ * As sugestões vêm do índice em memória do servidor (sem consulta ao banco)
+ */
+function setupTypeahead() {
+    const input = document.querySelector('[data-typeahead-url]');
+    const datalist = document.getElementById('search-suggestions');
+    if (!input || !datalist) return;
+
+    const url = input.getAttribute('data-typeahead-url');
+    let urlsByName = {};
+    let timer = null;
+    let lastQuery = '';
+
+    input.addEventListener('input', function() {
+        const query = input.value.trim();
+
+        // Selecionou uma sugestão: vai direto para a página do software
+        if (urlsByName[input.value]) {
+            window.location.href = urlsByName[input.value];
+            return;
+        }
+
+        clearTimeout(timer);
+        if (query.length < 2 || query === lastQuery) return;
+        timer = setTimeout(function() {
+            lastQuery = query;
+            fetch(url + '?q=' + encodeURIComponent(query), {credentials: 'same-origin'})
+                .then(response => response.ok ? response.json() : {results: []})
+                .then(data => {
+                    urlsByName = {};
+                    datalist.innerHTML = '';
+                    data.results.forEach(item => {
+                        const label = `${item.name} ${item.version}`;
+                        urlsByName[label] = item.url;
+                        const option = document.createElement('option');
+                        option.value = label;
+                        datalist.appendChild(option);
+                    });
+                })
+                .catch(() => {});
+        }, 150);
+    });
+}
+
+/**
+ * Carrega as screenshots em páginas quando a seção fica visível
+ * Largura e altura vêm da API, reservando o espaço antes do carregamento
+ */
+function setupScreenshots() {
+    const container = document.getElementById('screenshots');
+    if (!container) return;
+
+    const moreButton = document.getElementById('loadMoreScreenshots');
+    const size = container.getAttribute('data-size') || '320';
+    let nextPage = 1;
+    let loading = false;
+
+    function render(item) {
+        const col = document.createElement('div');
+        col.className = 'col-6 col-md-4';
+        const link = document.createElement('a');
+        link.href = item.full_url;
+        link.target = '_blank';
+        const picture = document.createElement('picture');
+        if (item.webp_url) {
+            const source = document.createElement('source');
+            source.type = 'image/webp';
+            source.srcset = item.webp_url;
+            picture.appendChild(source);
+        }
+        const img = document.createElement('img');
+        img.src = item.url;
+        img.alt = item.caption || '';
+        img.loading = 'lazy';
+        img.decoding = 'async';
+        img.className = 'img-fluid rounded border';
+        if (item.width && item.height) {
+            img.width = item.width;
+            img.height = item.height;
+        }
+        picture.appendChild(img);
+        link.appendChild(picture);
+        col.appendChild(link);
+        if (item.caption) {
+            const caption = document.createElement('div');
+            caption.className = 'small text-muted mt-1';
+            caption.textContent = item.caption;
+            col.appendChild(caption);
+        }
+        container.appendChild(col);
+    }
+
+    function loadPage() {
+        if (loading || !nextPage) return;
+        loading = true;
+        const url = container.getAttribute('data-url') + '?size=' + size + '&page=' + nextPage;
+        fetch(url, {credentials: 'same-origin'})
+            .then(response => response.ok ? response.json() : {results: [], next_page: null})
+            .then(data => {
+                data.results.forEach(render);
+                nextPage = data.next_page;
+                if (moreButton) moreButton.classList.toggle('d-none', !nextPage);
+            })
+            .catch(() => {})
+            .finally(() => { loading = false; });
+    }
+
+    if (moreButton) moreButton.addEventListener('click', loadPage);
+
+    if ('IntersectionObserver' in window) {
+        const observer = new IntersectionObserver(function(entries) {
+            if (entries.some(entry => entry.isIntersecting)) {
+                observer.disconnect();
+                loadPage();
+            }
+        }, {rootMargin: '200px'});
+        observer.observe(container);
+    } else {
+        loadPage();
+    }
+}
+
 /**
  * Exibe uma mensagem de notificação
  * @param {string} message - A mensagem a ser exibida
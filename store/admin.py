@@ -8,7 +8,13 @@ from django.utils.translation import gettext_lazy as _
 from django.db.models import Q
 from .models import Software
 from .models_suggestion import SoftwareSuggestion
-from .admin_views import import_software_view, export_software_view
+from .models_task import InstallationTask
+from .models_download import SoftwareDownload
+from .models_job import BackgroundJob
+from .pagination import EstimatedCountPaginator
+from .admin_inlines import SoftwareScreenshotInline
+from .templatetags.store_media import picture
+from .admin_views import import_software_view, import_job_view, export_software_view, task_log_view
 from .admin_actions import (
     activate_software, deactivate_software, export_selected_software,
     duplicate_software, cleanup_old_versions, mark_as_featured
@@ -34,6 +40,7 @@ class SoftwareAdmin(ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     readonly_fields = ('created_at', 'updated_at', 'preview_icon', 'download_count')
     list_per_page = 25
+    inlines = [SoftwareScreenshotInline]
     actions = [
         activate_software,
         deactivate_software,
@@ -73,6 +80,11 @@ class SoftwareAdmin(ModelAdmin):
                 self.admin_site.admin_view(import_software_view),
                 name='import_software',
             ),
+            path(
+                'import-software/jobs/<int:job_id>/',
+                self.admin_site.admin_view(import_job_view),
+                name='import_job',
+            ),
             path(
                 'export-software/',
                 self.admin_site.admin_view(export_software_view),
@@ -110,10 +122,7 @@ class SoftwareAdmin(ModelAdmin):
     
     def preview_icon(self, obj):
         if obj.icon:
-            return format_html(
-                '<img src="{}" style="max-height: 50px; max-width: 50px;" class="img-thumbnail" />',
-                obj.icon.url
-            )
+            return picture(obj.icon, obj.icon_renditions, 50, css_class='img-thumbnail', style='max-height: 50px; max-width: 50px;')
         return format_html('<span class="text-muted">Sem ícone</span>')
     preview_icon.short_description = 'Ícone'
     preview_icon.allow_tags = True
@@ -151,3 +160,72 @@ class SoftwareSuggestionAdmin(ModelAdmin):
     list_filter = ('status', 'created_at')
     search_fields = ('title', 'description', 'requester__username', 'requester__email')
     readonly_fields = ('created_at', 'updated_at')
+
+
+@register(InstallationTask)
+class InstallationTaskAdmin(ModelAdmin):
+    list_display = ('software', 'hostname', 'status', 'created_at', 'updated_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('hostname', 'software__name')
+    readonly_fields = ('created_at', 'updated_at', 'lease_expires_at', 'log_tail')
+    exclude = ('log',)
+    list_per_page = 50
+    # Tabela cresce sem limite: sem COUNT(*) exato na listagem
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                '<int:task_id>/log/',
+                self.admin_site.admin_view(task_log_view),
+                name='store_installationtask_log',
+            ),
+        ]
+        return custom_urls + urls
+
+    def get_queryset(self, request):
+        # O log completo pode ter vários MB; nunca é carregado na listagem
+        return super().get_queryset(request).select_related('software').defer('log')
+
+    def log_tail(self, obj):
+        chunks = list(obj.log_chunks.order_by('-sequence').values_list('content', flat=True)[:50])
+        text = ''.join(reversed(chunks)) or obj.log
+        return format_html(
+            '<pre style="max-height: 400px; overflow: auto;">{}</pre>'
+            '<a href="{}?tail=200" target="_blank">Acompanhar log (JSON)</a>',
+            text,
+            reverse('admin:store_installationtask_log', args=[obj.pk])
+        )
+    log_tail.short_description = 'Log (últimos trechos)'
+
+
+@register(SoftwareDownload)
+class SoftwareDownloadAdmin(ModelAdmin):
+    list_display = ('software', 'user', 'version', 'ip_address', 'downloaded_at')
+    list_filter = ('downloaded_at',)
+    search_fields = ('software__name', 'user__username', 'ip_address')
+    list_select_related = ('software', 'user')
+    readonly_fields = ('software', 'user', 'version', 'ip_address', 'user_agent', 'downloaded_at')
+    list_per_page = 50
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+
+@register(BackgroundJob)
+class BackgroundJobAdmin(ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'progress', 'processed', 'error_count', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    list_select_related = ('created_by',)
+    readonly_fields = (
+        'kind', 'status', 'payload', 'input_file', 'created_by', 'processed', 'progress', 'result',
+        'errors', 'error_count', 'message', 'worker', 'attempts', 'created_at', 'started_at',
+        'heartbeat_at', 'finished_at'
+    )
+
+    def has_add_permission(self, request):
+        return False
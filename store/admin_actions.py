@@ -1,11 +1,18 @@
+from django.conf import settings
 from django.contrib import messages
+from django.urls import reverse
+from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Q
-from datetime import datetime, timedelta
+from .bulk_ops import cleanup_old_versions as cleanup_old_versions_for, duplicate_softwares
+from .catalog_cache import bump_catalog_version
+from .exporter import streaming_export_response
+from .jobs import enqueue
 
 def activate_software(modeladmin, request, queryset):
     """Ação para ativar softwares selecionados."""
     updated = queryset.update(is_active=True)
+    # update() não dispara post_save
+    bump_catalog_version()
     modeladmin.message_user(
         request, 
         _('{0} software(s) ativado(s) com sucesso.').format(updated),
@@ -18,6 +25,7 @@ activate_software.short_description = _("Ativar softwares selecionados")
 def deactivate_software(modeladmin, request, queryset):
     """Ação para desativar softwares selecionados."""
     updated = queryset.update(is_active=False)
+    bump_catalog_version()
     modeladmin.message_user(
         request, 
         _('{0} software(s) desativado(s) com sucesso.').format(updated),
@@ -28,27 +36,40 @@ deactivate_software.short_description = _("Desativar softwares selecionados")
 
 
 def export_selected_software(modeladmin, request, queryset):
-    """Ação para exportar softwares selecionados."""
-    # Esta ação será tratada na view de exportação
-    software_ids = queryset.values_list('id', flat=True)
-    request.session['export_software_ids'] = list(software_ids)
-    return None
+    """Ação para exportar softwares selecionados (JSON, transmitido em blocos)."""
+    return streaming_export_response(queryset, 'json', filename='software_export_selecionados')
 
 export_selected_software.short_description = _("Exportar softwares selecionados")
 
 
+def _run_in_background(modeladmin, request, kind, payload, description):
+    """Coloca a ação na fila de jobs e informa o link para acompanhá-la."""
+    job = enqueue(kind, payload=payload, user=request.user)
+    modeladmin.message_user(
+        request,
+        format_html(
+            '{} em segundo plano: <a href="{}">trabalho #{}</a>.',
+            description, reverse('admin:store_backgroundjob_change', args=[job.pk]), job.pk
+        ),
+        messages.INFO
+    )
+
+
+def _is_large(queryset):
+    return queryset.count() > getattr(settings, 'ADMIN_BULK_ACTION_JOB_THRESHOLD', 200)
+
+
 def duplicate_software(modeladmin, request, queryset):
-    """Ação para duplicar softwares selecionados."""
-    for software in queryset:
-        software.pk = None
-        software.name = f"{software.name} (Cópia)"
-        software.slug = f"{software.slug}-copia-{datetime.now().strftime('%Y%m%d')}"
-        software.is_active = False
-        software.save()
-    
+    """Ação para duplicar softwares selecionados (cópias inativas, mesmos arquivos)."""
+    if _is_large(queryset):
+        ids = list(queryset.values_list('pk', flat=True))
+        _run_in_background(modeladmin, request, 'duplicate_software', {'ids': ids}, _('Duplicação'))
+        return
+
+    created = duplicate_softwares(list(queryset.values_list('pk', flat=True)))
     modeladmin.message_user(
         request, 
-        _('{0} software(s) duplicado(s) com sucesso.').format(queryset.count()),
+        _('{0} software(s) duplicado(s) com sucesso.').format(created),
         messages.SUCCESS
     )
 
@@ -57,25 +78,13 @@ duplicate_software.short_description = _("Duplicar softwares selecionados")
 
 def cleanup_old_versions(modeladmin, request, queryset):
     """Ação para limpar versões antigas dos softwares."""
-    # Mantém apenas a versão mais recente de cada software
-    from .models import Software
-    
-    # Agrupa por nome do software
-    software_names = set(queryset.values_list('name', flat=True))
-    deleted_count = 0
-    
-    for name in software_names:
-        # Pega a versão mais recente
-        latest = Software.objects.filter(name=name).order_by('-created_at').first()
-        if latest:
-            # Deleta versões mais antigas
-            deleted = Software.objects.filter(
-                name=name
-            ).exclude(
-                pk=latest.pk
-            ).delete()
-            deleted_count += deleted[0]
-    
+    # Mantém apenas a versão mais recente de cada nome selecionado
+    if _is_large(queryset):
+        names = list(queryset.order_by().values_list('name', flat=True).distinct())
+        _run_in_background(modeladmin, request, 'cleanup_old_versions', {'names': names}, _('Limpeza de versões antigas'))
+        return
+
+    deleted_count = cleanup_old_versions_for(queryset.order_by().values('name'))
     modeladmin.message_user(
         request, 
         _('{0} versões antigas removidas com sucesso.').format(deleted_count),
@@ -88,6 +97,7 @@ cleanup_old_versions.short_description = _("Limpar versões antigas")
 def mark_as_featured(modeladmin, request, queryset):
     """Marca softwares como em destaque."""
     updated = queryset.update(is_featured=True)
+    bump_catalog_version()
     modeladmin.message_user(
         request, 
         _('{0} software(s) marcado(s) como destaque.').format(updated),
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
-from .models import Software, SoftwareDownload
+from .models import Software, SoftwareDownload, SoftwareScreenshot
 
 class SoftwareDownloadInline(admin.TabularInline):
     """Inline para exibir os downloads de um software."""
@@ -50,9 +50,10 @@ class RelatedSoftwareInline(admin.TabularInline):
 
 class SoftwareScreenshotInline(admin.TabularInline):
     """Inline para adicionar screenshots do software."""
-    model = 'store.SoftwareScreenshot'
+    model = SoftwareScreenshot
     extra = 1
-    fields = ('image', 'caption', 'order')
+    fields = ('image', 'image_preview', 'caption', 'order')
+    readonly_fields = ('image_preview',)
     
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         # Define o software atual como padrão para o campo de software
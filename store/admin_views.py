@@ -1,125 +1,129 @@
-import os
-import json
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
-from django.http import JsonResponse, HttpResponse
-from django.views.decorators.http import require_http_methods
-from django.views.decorators.csrf import csrf_exempt
-from django.conf import settings
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.http import JsonResponse, HttpResponseBadRequest
+from .exporter import EXPORT_FORMATS, streaming_export_response
+from .importer import iter_json_items, open_text_stream
+from .jobs import enqueue
 from .models import Software
+from .models_job import BackgroundJob
+from .models_task import InstallationTask, InstallationLogChunk
+
+JSON_EXTENSIONS = ('.json', '.ndjson', '.jsonl')
 
 @staff_member_required
 def import_software_view(request):
-    """View para importar softwares via interface administrativa."""
+    """View para importar softwares via interface administrativa.
+
+    O arquivo é validado e colocado na fila; a importação roda no worker
+    (`run_jobs`) e o admin acompanha o progresso em `import_job_view`.
+    """
     if request.method == 'POST':
+        json_file = request.FILES.get('json_file')
+        if json_file is None:
+            messages.error(request, 'Nenhum arquivo enviado.')
+            return redirect('admin:import_software')
+        if not json_file.name.endswith(JSON_EXTENSIONS):
+            messages.error(request, 'Por favor, envie um arquivo JSON válido.')
+            return redirect('admin:import_software')
+
+        # Confere o início do arquivo sem lê-lo inteiro: o restante fica para o worker
         try:
-            # Verifica se foi enviado um arquivo
-            if 'json_file' in request.FILES:
-                json_file = request.FILES['json_file']
-                if not json_file.name.endswith('.json'):
-                    messages.error(request, 'Por favor, envie um arquivo JSON válido.')
-                    return redirect('store:import_software')
-                
-                # Salva o arquivo temporariamente
-                temp_path = os.path.join(settings.MEDIA_ROOT, 'temp', 'import', json_file.name)
-                os.makedirs(os.path.dirname(temp_path), exist_ok=True)
-                
-                with open(temp_path, 'wb+') as destination:
-                    for chunk in json_file.chunks():
-                        destination.write(chunk)
-                
-                # Lê o conteúdo do arquivo JSON
-                with open(temp_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # Remove o arquivo temporário
-                os.remove(temp_path)
-                
-                # Processa os dados
-                success_count = 0
-                error_count = 0
-                
-                if isinstance(data, list):
-                    items = data
-                else:
-                    items = [data]
-                
-                for item in items:
-                    try:
-                        # Verifica se o software já existe
-                        software, created = Software.objects.get_or_create(
-                            name=item['name'],
-                            version=item.get('version', '1.0.0'),
-                            defaults={
-                                'description': item.get('description', ''),
-                                'category': item.get('category', 'OTHER'),
-                                'is_active': item.get('is_active', True),
-                                'install_script': item.get('install_script', '')
-                            }
-                        )
-                        
-                        # Se o software já existe, atualiza os dados
-                        if not created and request.POST.get('update_existing', False):
-                            software.description = item.get('description', software.description)
-                            software.category = item.get('category', software.category)
-                            software.is_active = item.get('is_active', software.is_active)
-                            software.install_script = item.get('install_script', software.install_script)
-                            software.save()
-                        
-                        # Processa o instalador, se fornecido
-                        if 'installer' in request.FILES.getlist('installer_files'):
-                            installer_file = request.FILES.get('installer_files')
-                            software.installer.save(
-                                installer_file.name,
-                                ContentFile(installer_file.read()),
-                                save=True
-                            )
-                        
-                        # Processa o ícone, se fornecido
-                        if 'icon' in request.FILES.getlist('icon_files'):
-                            icon_file = request.FILES.get('icon_files')
-                            software.icon.save(
-                                icon_file.name,
-                                ContentFile(icon_file.read()),
-                                save=True
-                            )
-                        
-                        success_count += 1
-                        
-                    except Exception as e:
-                        error_count += 1
-                        messages.error(request, f'Erro ao importar {item.get("name", "item")}: {str(e)}')
-                
-                messages.success(request, f'Importação concluída: {success_count} itens importados com sucesso, {error_count} erros.')
-                
-            else:
-                messages.error(request, 'Nenhum arquivo enviado.')
-                
-        except Exception as e:
+            stream, _ = open_text_stream(json_file)
+            first = next(iter_json_items(stream), None)
+        except (ValueError, UnicodeDecodeError) as e:
             messages.error(request, f'Erro ao processar o arquivo: {str(e)}')
-        
-        return redirect('store:import_software')
-    
+            return redirect('admin:import_software')
+        if first is None:
+            messages.error(request, 'O arquivo não contém nenhum software.')
+            return redirect('admin:import_software')
+        json_file.seek(0)
+
+        job = enqueue(
+            'import_software',
+            payload={'update': bool(request.POST.get('update_existing')), 'filename': json_file.name},
+            input_file=json_file,
+            user=request.user
+        )
+        messages.success(request, 'Importação colocada na fila.')
+        return redirect('admin:import_job', job_id=job.pk)
+
     return render(request, 'admin/store/import_software.html', {
         'title': 'Importar Softwares',
         'opts': Software._meta,
+        'recent_jobs': BackgroundJob.objects.filter(kind='import_software').select_related('created_by')[:10],
+    })
+
+@staff_member_required
+def import_job_view(request, job_id):
+    """Progresso de um job de importação (HTML, ou JSON com ?format=json).
+
+    `?errors_after=<n>` devolve apenas os erros a partir do n-ésimo, para a
+    página acompanhar o job sem receber a lista inteira a cada consulta.
+    """
+    job = get_object_or_404(BackgroundJob, pk=job_id)
+    if request.GET.get('format') != 'json':
+        return render(request, 'admin/store/import_job.html', {
+            'title': f'Importação #{job.pk}',
+            'opts': Software._meta,
+            'job': job,
+        })
+    try:
+        errors_after = max(int(request.GET.get('errors_after', 0)), 0)
+    except ValueError:
+        return HttpResponseBadRequest('errors_after must be an integer')
+    return JsonResponse({
+        'id': job.pk,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'finished': job.is_finished,
+        'processed': job.processed,
+        'progress': job.progress,
+        'result': job.result,
+        'message': job.message,
+        'error_count': job.error_count,
+        'errors': job.errors[errors_after:],
     })
 
 @staff_member_required
 def export_software_view(request):
-    """View para exportar softwares para um arquivo JSON."""
-    softwares = Software.objects.all().values(
-        'name', 'slug', 'description', 'version', 'category',
-        'install_script', 'is_active', 'created_at', 'updated_at'
-    )
-    
-    # Converte QuerySet para lista
-    data = list(softwares)
-    
-    # Cria a resposta com o arquivo JSON
-    response = JsonResponse(data, safe=False)
-    response['Content-Disposition'] = 'attachment; filename=software_export.json'
-    return response
+    """Exporta o catálogo em JSON, NDJSON ou CSV, transmitido em blocos.
+
+    `?format=json|ndjson|csv` escolhe o formato e `?gzip=1` compacta o arquivo.
+    """
+    fmt = request.GET.get('format', 'json')
+    if fmt not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f'format must be one of: {", ".join(EXPORT_FORMATS)}')
+    compress = request.GET.get('gzip') in ('1', 'true', 'yes')
+    return streaming_export_response(Software.objects.all(), fmt, compress)
+
+@staff_member_required
+def task_log_view(request, task_id):
+    """Retorna um intervalo dos trechos de log de uma tarefa em JSON.
+
+    `?after=<seq>` devolve os trechos posteriores (para acompanhar uma
+    instalação em andamento); `?tail=<n>` devolve os últimos n trechos. `tail`
+    e `limit` valem no mínimo 1; `limit`, no máximo 1000.
+    """
+    task = get_object_or_404(InstallationTask.objects.only('id', 'status'), pk=task_id)
+    try:
+        after = int(request.GET['after']) if 'after' in request.GET else None
+        tail = max(int(request.GET['tail']), 1) if 'tail' in request.GET else None
+        limit = min(max(int(request.GET.get('limit', 200)), 1), 1000)
+    except ValueError:
+        return HttpResponseBadRequest('after, tail and limit must be integers')
+
+    chunks = InstallationLogChunk.objects.filter(task_id=task_id).values('sequence', 'content')
+    if after is not None:
+        chunks = list(chunks.filter(sequence__gt=after).order_by('sequence')[:limit])
+    elif tail is not None:
+        chunks = list(chunks.order_by('-sequence')[:min(tail, limit)])[::-1]
+    else:
+        chunks = list(chunks.order_by('sequence')[:limit])
+
+    return JsonResponse({
+        'task_id': task.id,
+        'status': task.status,
+        'chunks': chunks,
+        'next_after': chunks[-1]['sequence'] if chunks else after,
+    })
@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Chave de cache com a "versão" das tarefas de cada host. Toda escrita em
+# InstallationTask incrementa a versão do hostname, de modo que o agente pode
+# usar a versão como ETag e aguardar mudanças sem consultar as tarefas. Só
+# funciona com um cache compartilhado entre os processos (ver store/checks.py).
+# O hostname entra na chave exatamente como no filtro das tarefas
+# (InstallationTask.hostname, que diferencia maiúsculas): "PC01" e "pc01" são
+# hosts diferentes nos dois lugares.
+HOST_VERSION_KEY = 'agent_tasks:version:{hostname}'
+
+
+def versions_are_shared():
+    """Se as versões gravadas por um processo são vistas pelos demais."""
+    from .checks import PROCESS_LOCAL_CACHES
+    return settings.CACHES.get('default', {}).get('BACKEND', '') not in PROCESS_LOCAL_CACHES
+
+
+def long_poll_available():
+    """Se o long-poll pode aguardar mudanças sem consultar o banco.
+
+    Com o cache no banco (DatabaseCache), cada verificação da versão é uma
+    consulta SQL: o agente recebe a resposta na hora, sem aguardar.
+    """
+    from .checks import DATABASE_CACHES
+    return versions_are_shared() and settings.CACHES['default']['BACKEND'] not in DATABASE_CACHES
+
+
+def _version_key(hostname):
+    return HOST_VERSION_KEY.format(hostname=hostname)
+
+
+def get_host_version(hostname):
+    """Retorna a versão atual das tarefas de um hostname (inicializa se ausente)."""
+    key = _version_key(hostname)
+    version = cache.get(key)
+    if version is None:
+        # Usa o relógio como valor inicial para que uma chave expulsa do cache
+        # nunca volte a um valor que algum agente já tenha recebido como ETag.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_host_version(hostname):
+    """Marca que as tarefas de um hostname mudaram."""
+    if not hostname:
+        return None
+    key = _version_key(hostname)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        get_host_version(hostname)
+        return cache.incr(key)
+
+
+def host_etag(hostname, version):
+    return f'"{hostname}-{version}"'
+
+
+def wait_for_host_change(hostname, version, timeout):
+    """Aguarda até `timeout` segundos a versão do hostname mudar.
+
+    Consulta apenas o cache (só é chamada quando `long_poll_available`).
+    Retorna a versão atual ao final.
+    """
+    interval = getattr(settings, 'AGENT_LONG_POLL_INTERVAL', 1)
+    deadline = time.monotonic() + timeout
+    current = get_host_version(hostname)
+    while current == version and time.monotonic() < deadline:
+        time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+        current = get_host_version(hostname)
+    return current
@@ -0,0 +1,220 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+# Atraso padrão em relação ao "agora": linhas gravadas nos últimos segundos
+# (transações ainda abertas) entram na próxima execução
+DEFAULT_LAG = timedelta(seconds=60)
+DEFAULT_WINDOW = timedelta(days=7)
+
+
+def floor_hour(value):
+    return timezone.localtime(value).replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(value):
+    return timezone.localtime(value).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _rollups():
+    """Agregações mantidas: nome -> (modelo bruto, campo de data, modelo de rollup, métricas)."""
+    from .models import SoftwareDownload, DownloadRollup, TaskOutcomeRollup
+    from .models_task import FINAL_STATUSES, InstallationTask
+    return {
+        'downloads': (
+            SoftwareDownload.objects.all(), 'downloaded_at', DownloadRollup,
+            {'downloads': Count('id')},
+        ),
+        'tasks': (
+            # A tarefa conta no período de finished_at; se ela sai do status
+            # final, o período antigo é refeito (InstallationTask.set_finished_at)
+            InstallationTask.objects.filter(status__in=FINAL_STATUSES), 'finished_at', TaskOutcomeRollup,
+            {
+                'completed': Count('id', filter=Q(status='completed')),
+                'error': Count('id', filter=Q(status='error')),
+            },
+        ),
+    }
+
+
+def _rebuild(rollup_model, granularity, rows, metrics, start, end):
+    rollup_model.objects.filter(granularity=granularity, bucket_start__gte=start, bucket_start__lt=end).delete()
+    rollup_model.objects.bulk_create(
+        rollup_model(
+            software_id=row['software_id'],
+            granularity=granularity,
+            bucket_start=row['bucket'],
+            **{metric: row[metric] for metric in metrics}
+        )
+        for row in rows
+    )
+
+
+def _roll_window(name, start, end, watermark):
+    """Recalcula os períodos de [start, end) e avança a marca d'água até `end`.
+
+    As horas vêm das linhas brutas; os dias, da soma das horas já gravadas.
+    Tudo acontece em uma transação: uma execução interrompida é refeita por
+    inteiro na próxima. A marca só avança se ainda vale `watermark` (None na
+    primeira execução); retorna False se ela foi recuada por `invalidate`
+    enquanto a janela era processada.
+    """
+    from .models import RollupWatermark
+    queryset, field, rollup_model, metrics = _rollups()[name]
+    day_start = floor_day(start)
+
+    with transaction.atomic():
+        hours = (
+            queryset.filter(**{f'{field}__gte': start, f'{field}__lt': end})
+            .annotate(bucket=TruncHour(field))
+            .values('software_id', 'bucket')
+            .annotate(**metrics)
+            .order_by()
+        )
+        _rebuild(rollup_model, 'hour', hours, metrics, start, end)
+
+        days = (
+            rollup_model.objects.filter(granularity='hour', bucket_start__gte=day_start, bucket_start__lt=end)
+            .annotate(bucket=TruncDay('bucket_start'))
+            .values('software_id', 'bucket')
+            .annotate(**{metric: Sum(metric) for metric in metrics})
+            .order_by()
+        )
+        _rebuild(rollup_model, 'day', days, metrics, day_start, end)
+
+        if watermark is None:
+            return RollupWatermark.objects.get_or_create(name=name, defaults={'position': end})[1]
+        return bool(
+            RollupWatermark.objects.filter(name=name, position=watermark)
+            .update(position=end, updated_at=timezone.now())
+        )
+
+
+def _backfill_finished_at():
+    """Tarefas finalizadas antes de existir `finished_at` usam a última atualização."""
+    from .models_task import FINAL_STATUSES, InstallationTask
+    InstallationTask.objects.filter(status__in=FINAL_STATUSES, finished_at__isnull=True).update(
+        finished_at=F('updated_at')
+    )
+
+
+def roll_up(name, lag=DEFAULT_LAG, window=DEFAULT_WINDOW, now=None):
+    """Atualiza a agregação `name` a partir da sua marca d'água.
+
+    Na primeira execução começa pela linha mais antiga; depois, pela hora da
+    marca d'água (a última hora, incompleta na execução anterior, é refeita).
+    Históricos longos são processados em janelas de `window`. Retorna o
+    número de janelas processadas.
+    """
+    from .models import RollupWatermark
+    queryset, field, _, _ = _rollups()[name]
+    if name == 'tasks':
+        _backfill_finished_at()
+
+    end = (now or timezone.now()) - lag
+    watermark = RollupWatermark.objects.filter(name=name).values_list('position', flat=True).first()
+    start = watermark
+    if start is None:
+        start = queryset.aggregate(oldest=Min(field))['oldest']
+        if start is None:
+            return 0
+
+    start = floor_hour(start)
+    windows = 0
+    while start < end:
+        window_end = min(start + window, end)
+        if not _roll_window(name, start, window_end, watermark):
+            # Um período já agregado foi invalidado durante a execução: a
+            # próxima execução recomeça da marca d'água recuada
+            break
+        watermark = window_end
+        windows += 1
+        if window_end == end:
+            break
+        start = window_end
+    return windows
+
+
+def invalidate(name, since):
+    """Faz a próxima execução refazer a agregação `name` a partir de `since`.
+
+    Usada quando uma linha já agregada sai do seu período (ver
+    InstallationTask.set_finished_at).
+    """
+    from .models import RollupWatermark
+    RollupWatermark.objects.filter(name=name, position__gt=since).update(position=since, updated_at=timezone.now())
+
+
+def roll_up_all(**kwargs):
+    return {name: roll_up(name, **kwargs) for name in _rollups()}
+
+
+def reset(name):
+    """Apaga a agregação `name` para que seja recalculada do zero."""
+    from .models import RollupWatermark
+    _, _, rollup_model, _ = _rollups()[name]
+    with transaction.atomic():
+        rollup_model.objects.all().delete()
+        RollupWatermark.objects.filter(name=name).delete()
+
+
+def dashboard_summary(days=14, hours=48, top=5):
+    """Dados do painel lidos apenas das tabelas agregadas."""
+    from .models import DownloadRollup, TaskOutcomeRollup, RollupWatermark
+
+    now = timezone.now()
+    since_day = floor_day(now) - timedelta(days=days - 1)
+    since_hour = floor_hour(now) - timedelta(hours=hours - 1)
+
+    daily = {}
+    for row in (
+        DownloadRollup.objects.filter(granularity='day', bucket_start__gte=since_day)
+        .values('bucket_start').annotate(total=Sum('downloads')).order_by()
+    ):
+        daily.setdefault(timezone.localtime(row['bucket_start']).date(), {})['downloads'] = row['total']
+    for row in (
+        TaskOutcomeRollup.objects.filter(granularity='day', bucket_start__gte=since_day)
+        .values('bucket_start').annotate(completed=Sum('completed'), error=Sum('error')).order_by()
+    ):
+        daily.setdefault(timezone.localtime(row['bucket_start']).date(), {}).update(
+            completed=row['completed'], error=row['error']
+        )
+
+    trend = []
+    for offset in range(days):
+        day = (since_day + timedelta(days=offset)).date()
+        values = daily.get(day, {})
+        trend.append({
+            'day': day,
+            'downloads': values.get('downloads', 0),
+            'completed': values.get('completed', 0),
+            'error': values.get('error', 0),
+        })
+    peak = max((entry['downloads'] for entry in trend), default=0) or 1
+    for entry in trend:
+        entry['percent'] = entry['downloads'] * 100 // peak
+
+    top_software = list(
+        DownloadRollup.objects.filter(granularity='day', bucket_start__gte=since_day)
+        .values('software_id', 'software__name', 'software__version')
+        .annotate(total=Sum('downloads'))
+        .order_by('-total')[:top]
+    )
+    recent = DownloadRollup.objects.filter(granularity='hour', bucket_start__gte=since_hour).aggregate(
+        total=Sum('downloads')
+    )['total'] or 0
+
+    return {
+        'days': days,
+        'hours': hours,
+        'trend': trend,
+        'downloads': sum(entry['downloads'] for entry in trend),
+        'completed': sum(entry['completed'] for entry in trend),
+        'error': sum(entry['error'] for entry in trend),
+        'recent_downloads': recent,
+        'top_software': top_software,
+        'updated_until': RollupWatermark.objects.filter(name='downloads').values_list('position', flat=True).first(),
+    }
@@ -6,5 +6,10 @@ class StoreConfig(AppConfig):
     name = 'store'
     
     def ready(self):
-        # Importa os sinais para que sejam registrados
-        from . import signals
+        # Importa os sinais (e as verificações) para que sejam registrados.
+        # O tratador de SIGTERM dos contadores é instalado só pelo processo
+        # web (software_store/wsgi.py)
+        from . import checks, signals
+        from django.db.models.signals import post_migrate
+        post_migrate.connect(signals.create_cache_table, sender=self)
+        post_migrate.connect(signals.create_search_index, sender=self)
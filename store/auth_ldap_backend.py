@@ -1,17 +1,101 @@
+import logging
+import threading
 from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth import get_user_model
-from ldap3 import Server, Connection, ALL, NTLM
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from ldap3 import Server, Connection, NONE, SYNC
 from django.conf import settings
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
+LDAP_ENTRY_CACHE_KEY = 'ldap:entry:{username}'
+GRUPO_PERMITIDO = 'CN=Softplan Users'
+
+# Servidores por URI e uma conexão por thread, reaproveitados entre logins
+_servers = {}
+_servers_lock = threading.Lock()
+_local = threading.local()
+
+
 class LDAPBackend(BaseBackend):
+    # Estratégia de cliente do ldap3; testes podem usar ldap3.MOCK_SYNC
+    client_strategy = SYNC
+
+    def get_server(self, uri):
+        server = _servers.get(uri)
+        if server is None:
+            with _servers_lock:
+                # get_info=NONE evita ler schema/DSA do servidor a cada login
+                server = _servers.setdefault(uri, Server(uri, get_info=NONE))
+        return server
+
+    def bind(self, server, user_dn, password):
+        """Autentica o usuário reaproveitando a conexão aberta desta thread.
+
+        Retorna a conexão autenticada ou None se as credenciais forem inválidas.
+        """
+        conn = getattr(_local, 'connection', None)
+        if conn is not None and (conn.server is not server or conn.closed):
+            self.discard_connection()
+            conn = None
+        try:
+            if conn is None:
+                conn = Connection(
+                    server, user=user_dn, password=password, authentication='SIMPLE',
+                    client_strategy=self.client_strategy, read_only=True
+                )
+                conn.open(read_server_info=False)
+                _local.connection = conn
+            if conn.rebind(user=user_dn, password=password, authentication='SIMPLE', read_server_info=False):
+                return conn
+        except Exception:
+            self.discard_connection()
+            raise
+        # Bind recusado: não reaproveita uma conexão em estado indefinido
+        self.discard_connection()
+        return None
+
+    def discard_connection(self):
+        conn = getattr(_local, 'connection', None)
+        _local.connection = None
+        if conn is not None:
+            try:
+                conn.unbind()
+            except Exception:
+                pass
+
+    def lookup_entry(self, conn, search_base, user_filter):
+        """Busca grupos e dados do usuário, com cache de curta duração."""
+        key = LDAP_ENTRY_CACHE_KEY.format(username=user_filter.lower())
+        data = cache.get(key)
+        if data is not None:
+            return data
+
+        conn.search(search_base, f'(sAMAccountName={user_filter})', attributes=['givenName', 'sn', 'mail', 'memberOf'])
+        if not conn.entries:
+            return None
+        entry = conn.entries[0]
+        grupos = entry.memberOf.values if 'memberOf' in entry else []
+        data = {
+            'allowed': any(GRUPO_PERMITIDO in g for g in grupos),
+            'first_name': (entry.givenName.value if 'givenName' in entry else '') or '',
+            'last_name': (entry.sn.value if 'sn' in entry else '') or '',
+            'email': (entry.mail.value if 'mail' in entry else '') or '',
+        }
+        cache.set(key, data, getattr(settings, 'LDAP_ENTRY_CACHE_TTL', 300))
+        return data
+
     def authenticate(self, request, username=None, password=None, **kwargs):
         ldap_server = getattr(settings, 'LDAP_SERVER_URI', None)
         ldap_domain = getattr(settings, 'LDAP_DOMAIN', None)
         ldap_search_base = getattr(settings, 'LDAP_SEARCH_BASE', None)
         if not (ldap_server and ldap_domain and ldap_search_base):
             return None
+        if not username or not password:
+            return None
 
         # Sempre usa o formato UPN para autenticação SIMPLE
         if '@' in username:
@@ -20,29 +104,44 @@ class LDAPBackend(BaseBackend):
         else:
             user_dn = f'{username}@{ldap_domain}'
             user_filter = username
-        server = Server(ldap_server, get_info=ALL)
         try:
-            conn = Connection(server, user=user_dn, password=password, authentication='SIMPLE', auto_bind=True)
-            conn.search(ldap_search_base, f'(sAMAccountName={user_filter})', attributes=['givenName', 'sn', 'mail', 'memberOf'])
-            if conn.entries:
-                entry = conn.entries[0]
-                # Verifica se usuário pertence ao grupo SoftwareStoreUsers
-                grupos = entry.memberOf.values if 'memberOf' in entry else []
-                grupo_permitido = 'CN=Softplan Users'
-                if not any(grupo_permitido in g for g in grupos):
-                    return None  # Não está no grupo permitido
-                user, created = User.objects.get_or_create(username=user_filter)
-                user.first_name = entry.givenName.value if 'givenName' in entry else ''
-                user.last_name = entry.sn.value if 'sn' in entry else ''
-                user.email = entry.mail.value if 'mail' in entry else ''
-                user.set_unusable_password()  # senha nunca salva no banco
-                user.save()
-                return user
+            conn = self.bind(self.get_server(ldap_server), user_dn, password)
+            if conn is None:
+                return None
+            data = self.lookup_entry(conn, ldap_search_base, user_filter)
+            # Verifica se usuário pertence ao grupo SoftwareStoreUsers
+            if not data or not data['allowed']:
+                return None  # Não está no grupo permitido
+            return self.sync_user(user_filter, data)
         except Exception as e:
-            import logging
-            logging.error(f'Erro LDAP: {e}')
+            logger.error(f'Erro LDAP: {e}')
         return None
 
+    def sync_user(self, username, data):
+        """Cria ou atualiza o usuário local, gravando só quando algo mudou."""
+        attrs = {
+            'first_name': data['first_name'],
+            'last_name': data['last_name'],
+            'email': data['email'],
+        }
+        # senha nunca salva no banco
+        user, created = User.objects.get_or_create(
+            username=username,
+            defaults=dict(attrs, password=make_password(None))
+        )
+        if created:
+            return user
+
+        changed = [field for field, value in attrs.items() if getattr(user, field) != value]
+        for field in changed:
+            setattr(user, field, attrs[field])
+        if user.has_usable_password():
+            user.set_unusable_password()
+            changed.append('password')
+        if changed:
+            user.save(update_fields=changed)
+        return user
+
     def get_user(self, user_id):
         try:
             return User.objects.get(pk=user_id)
@@ -0,0 +1,43 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Retorna o pool de threads de segundo plano do processo."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BACKGROUND_WORKERS', 4),
+                    thread_name_prefix='store-bg',
+                )
+    return _executor
+
+
+def submit(fn, *args, **kwargs):
+    """Executa `fn` em segundo plano e retorna o Future.
+
+    As conexões de banco da thread são tratadas como ao fim de uma requisição,
+    respeitando CONN_MAX_AGE.
+    """
+    def run():
+        close_old_connections()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            logger.exception('Erro em tarefa de segundo plano %s', getattr(fn, '__name__', fn))
+            raise
+        finally:
+            close_old_connections()
+
+    return get_executor().submit(run)
@@ -0,0 +1,130 @@
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils.text import slugify
+
+from .catalog_cache import bump_catalog_version
+from .importer import batched
+from .search import build_search_document, index_softwares
+
+BATCH_SIZE = 500
+
+# Campos que não são copiados na duplicação (recebem valores novos)
+_NOT_COPIED = {
+    'id', 'name', 'slug', 'is_active', 'is_featured', 'download_count',
+    'created_at', 'updated_at', 'search_document'
+}
+
+
+def old_version_ids(names):
+    """IDs de todas as versões, exceto a mais recente, de cada nome em `names`.
+
+    Uma única consulta com ROW_NUMBER() particionado por nome.
+    """
+    from .models import Software
+    ranked = Software.objects.filter(name__in=names).annotate(
+        recency=Window(
+            RowNumber(),
+            partition_by=[F('name')],
+            order_by=[F('created_at').desc(), F('pk').desc()]
+        )
+    )
+    return list(ranked.filter(recency__gt=1).values_list('pk', flat=True))
+
+
+def cleanup_old_versions(names, progress=None):
+    """Exclui as versões antigas dos softwares `names`; retorna quantas foram excluídas.
+
+    A exclusão é feita em lotes de IDs; os arquivos ficam para o job
+    `remove_files` (ver store/file_cleanup.py). `progress(excluídos)` é
+    chamado após cada lote. Repetir a limpeza é inofensivo.
+    """
+    from .models import Software
+    deleted = 0
+    for ids in batched(old_version_ids(names), BATCH_SIZE):
+        _, per_model = Software.objects.filter(pk__in=ids).delete()
+        deleted += per_model.get(Software._meta.label, 0)
+        if progress is not None:
+            progress(deleted)
+    return deleted
+
+
+def _copy_name(name, number):
+    return f'{name} (Cópia)' if number == 1 else f'{name} (Cópia {number})'
+
+
+def _copy_names(originals):
+    """Nomes livres para as cópias: "X (Cópia)", "X (Cópia 2)"..."""
+    from .models import Software
+    numbers = {original.pk: 1 for original in originals}
+    names = {}
+    used_keys, used_slugs = set(), set()
+    pending = list(originals)
+    while pending:
+        candidates = {
+            original.pk: (_copy_name(original.name, numbers[original.pk]), original.version)
+            for original in pending
+        }
+        slugs = {pk: slugify(f'{name} {version}') for pk, (name, version) in candidates.items()}
+        taken_keys = set(
+            Software.objects.filter(name__in={name for name, _ in candidates.values()})
+            .values_list('name', 'version')
+        )
+        taken_slugs = set(Software.objects.filter(slug__in=slugs.values()).values_list('slug', flat=True))
+        retry = []
+        for original in pending:
+            key, slug = candidates[original.pk], slugs[original.pk]
+            if key in taken_keys or key in used_keys or slug in taken_slugs or slug in used_slugs:
+                numbers[original.pk] += 1
+                retry.append(original)
+            else:
+                names[original.pk] = (key[0], slug)
+                used_keys.add(key)
+                used_slugs.add(slug)
+        pending = retry
+    return names
+
+
+def duplicate_softwares(ids, done=0, checkpoint=None):
+    """Duplica os softwares `ids` (inativos) com bulk_create; retorna quantos foram criados.
+
+    As cópias apontam para os mesmos arquivos: o instalador ganha uma
+    referência por cópia e o ícone (e suas variantes) é compartilhado.
+
+    Os `done` primeiros IDs já foram duplicados por uma execução anterior e
+    são pulados. `checkpoint(duplicados, criados)` roda na mesma transação de
+    cada lote: um lote nunca é duplicado duas vezes.
+    """
+    from .models import Software, InstallerBlob
+    created = 0
+    for chunk in batched(ids[done:], BATCH_SIZE):
+        with transaction.atomic():
+            originals = list(Software.objects.filter(pk__in=chunk).order_by('pk'))
+            names = _copy_names(originals)
+            copies = []
+            for original in originals:
+                values = {
+                    field.attname: getattr(original, field.attname)
+                    for field in Software._meta.concrete_fields if field.attname not in _NOT_COPIED
+                }
+                name, slug = names[original.pk]
+                copy = Software(name=name, slug=slug, is_active=False, **values)
+                copy.search_document = build_search_document(copy)
+                copies.append(copy)
+            # bulk_create não dispara os sinais: referências e índice são mantidos aqui
+            copies = Software.objects.bulk_create(copies)
+            InstallerBlob.retain_many(copy.installer.name for copy in copies if copy.installer)
+            if all(copy.pk for copy in copies):
+                index_softwares((copy.pk, copy.name, copy.search_document) for copy in copies)
+            else:
+                # Bancos que não devolvem as chaves no INSERT em lote
+                index_softwares(
+                    Software.objects.filter(slug__in=[copy.slug for copy in copies])
+                    .values_list('pk', 'name', 'search_document')
+                )
+            transaction.on_commit(bump_catalog_version)
+            done += len(chunk)
+            created += len(copies)
+            if checkpoint is not None:
+                checkpoint(done, created)
+    return created
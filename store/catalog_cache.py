@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Versão do catálogo: incrementada a cada alteração em Software. Valores
+# derivados do catálogo são guardados sob chaves que incluem a versão, de
+# modo que uma alteração invalida tudo de uma vez, em todos os workers.
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def get_catalog_version():
+    """Retorna a versão atual do catálogo (inicializa se ausente)."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Usa o relógio para nunca repetir uma versão após expulsão do cache
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalida todos os valores derivados do catálogo."""
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        get_catalog_version()
+        return cache.incr(CATALOG_VERSION_KEY)
+
+
+def cached_catalog_value(name, compute, timeout=None):
+    """Retorna `compute()` em cache, associado à versão atual do catálogo."""
+    key = f'catalog:{name}:{get_catalog_version()}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout or getattr(settings, 'CATALOG_CACHE_TTL', 3600))
+    return value
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends cujo conteúdo não é visto pelos outros processos
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Backends compartilhados, mas em que cada leitura é uma consulta SQL
+DATABASE_CACHES = (
+    'django.core.cache.backends.db.DatabaseCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """As versões do catálogo e das tarefas só invalidam entre processos com um cache compartilhado."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            f'O cache padrão ({backend}) é local ao processo.',
+            hint=(
+                'Alterações feitas pelo worker, por comandos de importação ou por outro processo '
+                'do servidor não invalidam o catálogo nem acordam o long-poll dos agentes. Use '
+                'RedisCache (padrão) ou, sem Redis, django.core.cache.backends.db.DatabaseCache (CACHE_BACKEND).'
+            ),
+            id='store.W001',
+        )
+    ]
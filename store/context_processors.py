@@ -1,7 +1,9 @@
 from django.conf import settings
 from django.contrib import messages
 from django.db.models import Count
+from django.utils.functional import SimpleLazyObject
 from .models import Software
+from .catalog_cache import cached_catalog_value
 
 def categories(request):
     """Adiciona a lista de categorias ao contexto de todos os templates."""
@@ -9,26 +11,40 @@ def categories(request):
         'all_categories': dict(Software.CATEGORY_CHOICES),
     }
 
+def _active_software_count():
+    return Software.objects.filter(is_active=True).count()
+
+def _software_stats():
+    return {
+        'total_software': Software.objects.count(),
+        'active_software': Software.objects.filter(is_active=True).count(),
+        'software_by_category': list(Software.objects.values('category')
+                                                 .annotate(count=Count('id'))
+                                                 .order_by('-count')),
+    }
+
 def active_software_count(request):
-    """Adiciona a contagem de softwares ativos ao contexto."""
+    """Adiciona a contagem de softwares ativos ao contexto.
+
+    O valor só é calculado se o template o usar, e fica em cache até a
+    próxima alteração do catálogo.
+    """
     return {
-        'active_software_count': Software.objects.filter(is_active=True).count(),
+        'active_software_count': SimpleLazyObject(
+            lambda: cached_catalog_value('active_software_count', _active_software_count)
+        ),
     }
 
 def software_stats(request):
-    """Adiciona estatísticas de softwares ao contexto."""
+    """Adiciona estatísticas de softwares ao contexto (calculadas sob demanda)."""
     if not request.user.is_staff:
         return {}
-        
-    stats = {
-        'total_software': Software.objects.count(),
-        'active_software': Software.objects.filter(is_active=True).count(),
-        'software_by_category': Software.objects.values('category')
-                                            .annotate(count=Count('id'))
-                                            .order_by('-count'),
+
+    return {
+        'software_stats': SimpleLazyObject(
+            lambda: cached_catalog_value('software_stats', _software_stats)
+        ),
     }
-    
-    return {'software_stats': stats}
 
 def admin_extra_context(request):
     """Adiciona contexto extra para o painel administrativo."""
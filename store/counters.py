@@ -0,0 +1,134 @@
+import atexit
+import logging
+import signal
+import sys
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Value, When
+
+from . import background
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadCounter:
+    """Acumula incrementos de `Software.download_count` e os grava em lote.
+
+    Em vez de um UPDATE por download na mesma linha (que no SQLite serializa
+    todos os escritores), cada processo soma os incrementos em memória e os
+    grava periodicamente com um único UPDATE ... CASE. Incrementos de um lote
+    que falhou voltam para o buffer; o restante é gravado na saída do processo
+    (atexit e SIGTERM, ver `install_signal_handlers`).
+    """
+
+    def __init__(self, interval=None, threshold=None):
+        self.interval = interval if interval is not None else getattr(settings, 'DOWNLOAD_COUNTER_FLUSH_INTERVAL', 10)
+        self.threshold = threshold if threshold is not None else getattr(settings, 'DOWNLOAD_COUNTER_FLUSH_THRESHOLD', 100)
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    def increment(self, software_id, amount=1):
+        with self._lock:
+            self._pending[software_id] += amount
+            total = sum(self._pending.values())
+            if self._timer is None:
+                self._start_timer()
+        if total >= self.threshold:
+            background.submit(self.flush)
+
+    def pending(self, software_id=None):
+        with self._lock:
+            if software_id is None:
+                return sum(self._pending.values())
+            return self._pending.get(software_id, 0)
+
+    def _start_timer(self):
+        self._timer = threading.Timer(self.interval, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        background.submit(self.flush)
+
+    def flush(self):
+        """Grava os incrementos pendentes; retorna quantos foram gravados."""
+        from .models import Software
+
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, Counter()
+            if not batch:
+                return 0
+            increment = Case(
+                *[When(pk=pk, then=Value(amount)) for pk, amount in batch.items()],
+                default=Value(0),
+                output_field=IntegerField()
+            )
+            try:
+                Software.objects.filter(pk__in=list(batch)).update(download_count=F('download_count') + increment)
+            except Exception:
+                # Devolve ao buffer para a próxima tentativa
+                with self._lock:
+                    self._pending.update(batch)
+                    if self._timer is None:
+                        self._start_timer()
+                logger.exception('Falha ao gravar contadores de download; nova tentativa em %ss', self.interval)
+                return 0
+            return sum(batch.values())
+
+
+download_counter = DownloadCounter()
+
+
+def count_download(software_id):
+    """Conta um download de `software_id` (gravado em lote, salvo se desabilitado)."""
+    if getattr(settings, 'DOWNLOAD_COUNTER_BUFFERED', True):
+        download_counter.increment(software_id)
+    else:
+        from .models import Software
+        Software.objects.filter(pk=software_id).update(download_count=F('download_count') + 1)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        download_counter.flush()
+    except Exception:
+        logger.exception('Falha ao gravar contadores de download na saída do processo')
+
+
+def install_signal_handlers():
+    """Grava os incrementos pendentes também ao receber SIGTERM.
+
+    `docker stop` envia SIGTERM, que encerra o processo sem executar os
+    ganchos do atexit. Chamado só pelo processo web, ao carregar a aplicação
+    (software_store/wsgi.py e asgi.py): comandos como migrate e run_jobs e os
+    testes ficam com o próprio tratador. O tratador anterior (ex.: o
+    desligamento gracioso do worker do gunicorn) é chamado depois da gravação.
+    """
+    if not getattr(settings, 'DOWNLOAD_COUNTER_BUFFERED', True):
+        return
+    if threading.current_thread() is not threading.main_thread():
+        # signal.signal só funciona na thread principal (ex.: runserver com
+        # autoreload); os incrementos ainda são gravados pelo atexit
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def flush_and_exit(signum, frame):
+        # Em outra thread: o sinal pode chegar com a thread principal
+        # segurando o lock do contador
+        flusher = threading.Thread(target=_flush_on_exit, daemon=True)
+        flusher.start()
+        flusher.join(timeout=5)
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            sys.exit(128 + signum)
+
+    signal.signal(signal.SIGTERM, flush_and_exit)
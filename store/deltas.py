@@ -0,0 +1,153 @@
+import os
+import shutil
+import logging
+import tempfile
+import subprocess
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError
+
+from .storage import installer_storage, sha256_from_name
+
+logger = logging.getLogger(__name__)
+
+# zstd --long=31 usa uma janela de 2 GiB: instaladores maiores não geram delta
+DEFAULT_MAX_INPUT_SIZE = 2 ** 31
+
+# Extensão do patch por formato. Aplicação no agente:
+#   zstd:   zstd -d --long=31 --patch-from=<antigo> <patch> -o <novo>
+#   bsdiff: bsdiff4.file_patch(<antigo>, <novo>, <patch>)
+EXTENSIONS = {'zstd': 'zst', 'bsdiff': 'bsdiff'}
+
+
+def available_backends():
+    backends = []
+    if shutil.which('zstd'):
+        backends.append('zstd')
+    try:
+        import bsdiff4  # noqa: F401
+        backends.append('bsdiff')
+    except ImportError:
+        pass
+    return backends
+
+
+def get_backend():
+    """Formato configurado em INSTALLER_DELTA_BACKEND, ou o primeiro disponível."""
+    configured = getattr(settings, 'INSTALLER_DELTA_BACKEND', '')
+    backends = available_backends()
+    if configured:
+        return configured if configured in backends else None
+    return backends[0] if backends else None
+
+
+def make_delta(source_path, target_path, output_path, backend):
+    """Gera em `output_path` o patch de `source_path` para `target_path`."""
+    if backend == 'zstd':
+        subprocess.run(
+            ['zstd', '-q', '-f', '-19', '--long=31', f'--patch-from={source_path}',
+             target_path, '-o', output_path],
+            check=True, capture_output=True
+        )
+    elif backend == 'bsdiff':
+        import bsdiff4
+        bsdiff4.file_diff(source_path, target_path, output_path)
+    else:
+        raise ValueError(f'Formato de delta desconhecido: {backend}')
+    return os.path.getsize(output_path)
+
+
+def previous_installer(software):
+    """Instalador da versão anterior do mesmo software (por nome), se houver."""
+    from .models import Software
+    target = sha256_from_name(software.installer.name)
+    return (
+        Software.objects.filter(name=software.name, created_at__lte=software.created_at)
+        .exclude(pk=software.pk)
+        .exclude(installer_sha256='')
+        .exclude(installer_sha256=target)
+        .order_by('-created_at')
+        .values_list('installer', flat=True)
+        .first()
+    )
+
+
+def schedule_delta(software_id):
+    """Coloca a geração do delta na fila de jobs (comando run_jobs), se habilitada.
+
+    A compressão é longa e pesada: não roda no processo web, onde ocuparia
+    as threads de segundo plano (resolução de hostname no login etc.).
+    """
+    if getattr(settings, 'INSTALLER_DELTAS_ENABLED', False):
+        from .jobs import enqueue
+        enqueue('generate_delta', payload={'software_id': software_id})
+
+
+def generate_delta(software_id):
+    """Gera o delta da versão anterior para o instalador deste software.
+
+    O patch só é mantido se for menor que INSTALLER_DELTA_MAX_RATIO do
+    instalador completo; instaladores acima de INSTALLER_DELTA_MAX_INPUT_SIZE
+    são ignorados. Retorna o InstallerDelta ou None.
+    """
+    from .models import Software, InstallerDelta
+
+    software = Software.objects.filter(pk=software_id).first()
+    if software is None or not software.installer:
+        return None
+    target_sha256 = sha256_from_name(software.installer.name)
+    source_name = previous_installer(software)
+    if not target_sha256 or not source_name:
+        return None
+    source_sha256 = sha256_from_name(source_name)
+
+    existing = InstallerDelta.objects.filter(source_sha256=source_sha256, target_sha256=target_sha256).first()
+    if existing:
+        return existing
+
+    backend = get_backend()
+    if backend is None:
+        logger.warning('Nenhum formato de delta disponível (instale zstd ou bsdiff4).')
+        return None
+
+    target_size = installer_storage.size(software.installer.name)
+    max_size = getattr(settings, 'INSTALLER_DELTA_MAX_INPUT_SIZE', DEFAULT_MAX_INPUT_SIZE)
+    if max(target_size, installer_storage.size(source_name)) > max_size:
+        logger.info('Delta de %s não gerado: instalador acima de %d bytes', software, max_size)
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'patch')
+        size = make_delta(installer_storage.path(source_name), software.installer.path, output, backend)
+        max_ratio = getattr(settings, 'INSTALLER_DELTA_MAX_RATIO', 0.8)
+        if size >= target_size * max_ratio:
+            logger.info('Delta de %s descartado: %d de %d bytes', software, size, target_size)
+            return None
+
+        delta = InstallerDelta(
+            source_sha256=source_sha256, target_sha256=target_sha256,
+            backend=backend, size=size, target_size=target_size
+        )
+        with open(output, 'rb') as f:
+            filename = f'{source_sha256[:16]}-{target_sha256[:16]}.{EXTENSIONS[backend]}'
+            delta.patch.save(filename, File(f), save=False)
+        try:
+            delta.save()
+        except IntegrityError:
+            # Gerado em paralelo por outro processo
+            delta.patch.delete(save=False)
+            return InstallerDelta.objects.filter(source_sha256=source_sha256, target_sha256=target_sha256).first()
+    logger.info('Delta gerado para %s: %d de %d bytes', software, size, target_size)
+    return delta
+
+
+def deltas_by_target(sha256_list):
+    """Patches disponíveis agrupados pelo instalador de destino."""
+    from .models import InstallerDelta
+    result = {}
+    hashes = {sha256 for sha256 in sha256_list if sha256}
+    if not hashes or not getattr(settings, 'INSTALLER_DELTAS_ENABLED', False):
+        return result
+    for delta in InstallerDelta.objects.filter(target_sha256__in=hashes):
+        result.setdefault(delta.target_sha256, []).append(delta)
+    return result
@@ -0,0 +1,145 @@
+import os
+import mimetypes
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+from .storage import sha256_from_name
+
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """Interpreta um cabeçalho `Range` de intervalo único.
+
+    Retorna `(inicio, fim)` inclusivos, ou None quando o cabeçalho deve ser
+    ignorado (ausente, malformado ou com vários intervalos — nesses casos o
+    arquivo é entregue inteiro, como a RFC 9110 permite).
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    spec = header[len('bytes='):].strip()
+    if ',' in spec or '-' not in spec:
+        return None
+    first, last = (part.strip() for part in spec.split('-', 1))
+    try:
+        if not first:
+            # Sufixo: últimos N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _range_reader(fileobj, start, length):
+    try:
+        fileobj.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = fileobj.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        fileobj.close()
+
+
+def _validators(field):
+    stat = os.stat(field.path)
+    # Arquivos endereçados por conteúdo têm no próprio hash um ETag forte
+    sha256 = sha256_from_name(field.name)
+    etag = f'"{sha256}"' if sha256 else '"%x-%x"' % (int(stat.st_mtime), stat.st_size)
+    return stat.st_size, etag, stat.st_mtime
+
+
+def _if_range_matches(request, etag, mtime):
+    """Sem `If-Range`, ou se ele ainda corresponde ao arquivo, o Range vale."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def is_initial_request(request, size):
+    """Indica se a requisição inicia uma transferência (e não a retoma).
+
+    Retomadas (Range a partir de um byte > 0) não contam como novo download.
+    """
+    if request.method != 'GET':
+        return False
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    except RangeNotSatisfiable:
+        return False
+    return byte_range is None or byte_range[0] == 0
+
+
+def serve_file(request, field, filename=None):
+    """Entrega o arquivo de um FileField com suporte a Range.
+
+    Com SENDFILE_BACKEND configurado, apenas devolve o cabeçalho para o proxy
+    (X-Accel-Redirect ou X-Sendfile), que transmite o arquivo e trata os
+    intervalos sem ocupar o worker. Caso contrário, transmite em blocos.
+    """
+    filename = filename or os.path.basename(field.name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    disposition = content_disposition_header(True, filename)
+
+    backend = getattr(settings, 'SENDFILE_BACKEND', '')
+    if backend in ('nginx', 'apache'):
+        response = HttpResponse(content_type=content_type)
+        if backend == 'nginx':
+            prefix = getattr(settings, 'SENDFILE_URL_PREFIX', '/protected/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(field.name)
+        else:
+            response['X-Sendfile'] = field.path
+        response['Content-Disposition'] = disposition
+        return response
+
+    size, etag, mtime = _validators(field)
+    byte_range = None
+    if _if_range_matches(request, etag, mtime):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(field.path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _range_reader(open(field.path, 'rb'), start, length),
+            status=206, content_type=content_type
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Content-Disposition'] = disposition
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    return response
+
@@ -0,0 +1,99 @@
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# Mesmos campos aceitos pela importação (store/importer.py), mais os de leitura
+EXPORT_FIELDS = (
+    'name', 'slug', 'description', 'version', 'category',
+    'install_script', 'install_args', 'is_active', 'created_at', 'updated_at'
+)
+EXPORT_FORMATS = {
+    'json': ('application/json', 'json'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+}
+CHUNK_SIZE = 2000
+# Tamanho aproximado de cada pedaço enviado ao cliente
+BUFFER_SIZE = 64 * 1024
+
+
+class _Echo:
+    """Pseudo-arquivo para o csv.writer: devolve a linha em vez de gravá-la."""
+
+    def write(self, value):
+        return value
+
+
+def _rows(queryset, chunk_size):
+    # Ordem estável pela chave primária; sem cache de resultados no queryset
+    return queryset.order_by('pk').values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def _render(queryset, fmt, chunk_size):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    rows = _rows(queryset, chunk_size)
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for row in rows:
+            # Datas no mesmo formato ISO 8601 do JSON
+            yield writer.writerow([
+                encoder.default(row[field]) if hasattr(row[field], 'isoformat') else row[field]
+                for field in EXPORT_FIELDS
+            ])
+    elif fmt == 'ndjson':
+        for row in rows:
+            yield encoder.encode(row) + '\n'
+    else:
+        yield '['
+        separator = '\n'
+        for row in rows:
+            yield separator + encoder.encode(row)
+            separator = ',\n'
+        yield '\n]\n'
+
+
+def _buffered(pieces, size=BUFFER_SIZE):
+    """Agrupa os pedaços pequenos (uma linha por item) em blocos de ~`size` bytes."""
+    buffer, length = [], 0
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        buffer.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _gzipped(blocks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: formato gzip
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(queryset, fmt='json', compress=False, chunk_size=CHUNK_SIZE):
+    """Gera o catálogo exportado em blocos de bytes, com memória constante."""
+    blocks = _buffered(_render(queryset, fmt, chunk_size))
+    return _gzipped(blocks) if compress else blocks
+
+
+def streaming_export_response(queryset, fmt='json', compress=False, filename='software_export'):
+    """Resposta de download que transmite a exportação enquanto lê o banco."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'Formato de exportação desconhecido: {fmt}')
+    content_type, extension = EXPORT_FORMATS[fmt]
+    filename = f'{filename}.{extension}'
+    if compress:
+        content_type, filename = 'application/gzip', f'{filename}.gz'
+    else:
+        content_type = f'{content_type}; charset=utf-8'
+    response = StreamingHttpResponse(export_chunks(queryset, fmt, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
@@ -0,0 +1,71 @@
+import logging
+import threading
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class _RemovalBatch:
+    """Arquivos a remover de uma transação; enfileirados juntos após o commit."""
+
+    def __init__(self):
+        self.icons = []
+        self.installers = []
+
+    def __call__(self):
+        from .jobs import enqueue
+        if _local.__dict__.get('batch') is self:
+            del _local.batch
+        if self.icons or self.installers:
+            enqueue('remove_files', payload={'icons': self.icons, 'installers': self.installers})
+
+
+def schedule_file_removal(icons=(), installers=()):
+    """Agenda a remoção de arquivos para o job `remove_files`, após o commit.
+
+    Exclusões em lote (ex.: queryset.delete()) disparam um post_delete por
+    linha; todas as remoções da mesma transação viram um único job, em vez
+    de apagar arquivos dentro da requisição.
+    """
+    connection = transaction.get_connection()
+    batch = _local.__dict__.get('batch')
+    pending = [func for _, func, _ in getattr(connection, 'run_on_commit', ())]
+    if batch is None or not connection.in_atomic_block or not any(func is batch for func in pending):
+        # Nova transação (ou a anterior foi desfeita)
+        batch = _local.batch = _RemovalBatch()
+        batch.icons.extend(icons)
+        batch.installers.extend(installers)
+        transaction.on_commit(batch)
+        return
+    batch.icons.extend(icons)
+    batch.installers.extend(installers)
+
+
+def remove_files(icons=(), installers=(), released=0, checkpoint=None):
+    """Libera os instaladores e apaga os ícones que nenhum software usa mais.
+
+    Os `released` primeiros instaladores já foram liberados por uma execução
+    anterior e são pulados. `checkpoint(n)` roda na mesma transação de cada
+    liberação, para registrar o progresso: se o job for repetido, nenhuma
+    referência é liberada duas vezes. Se ele levantar exceção, a liberação é
+    desfeita.
+    """
+    from .models import Software, InstallerBlob
+
+    for index in range(released, len(installers)):
+        with transaction.atomic():
+            InstallerBlob.release(installers[index])
+            if checkpoint is not None:
+                checkpoint(index + 1)
+    # Cópias de um software compartilham o ícone; apagar de novo é inofensivo
+    icons = set(icons) - set(Software.objects.filter(icon__in=set(icons)).values_list('icon', flat=True))
+    for name in icons:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.warning('Não foi possível remover o ícone %s', name, exc_info=True)
+    return len(icons)
@@ -0,0 +1,513 @@
+import io
+import os
+import json
+import time
+import logging
+from itertools import count, islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.text import slugify
+
+from .catalog_cache import bump_catalog_version
+from .search import build_search_document, index_softwares
+
+logger = logging.getLogger(__name__)
+
+# Campos do catálogo aceitos nos itens importados (além de name e version)
+ITEM_FIELDS = ('description', 'category', 'is_active', 'install_script', 'install_args')
+DEFAULTS = {
+    'description': '',
+    'category': 'OTHER',
+    'is_active': True,
+    'install_script': '',
+    'install_args': None,
+}
+DEFAULT_VERSION = '1.0.0'
+DEFAULT_BATCH_SIZE = 500
+
+
+def iter_json_items(stream, chunk_size=64 * 1024):
+    """Itera os objetos de um JSON sem carregar o arquivo inteiro.
+
+    Aceita uma lista (`[{...}, {...}]`), um único objeto ou NDJSON (um
+    objeto por linha). `stream` é um arquivo de texto; só um trecho dele
+    fica em memória.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos = '', 0
+    started = in_array = False
+
+    def read_more():
+        nonlocal buffer, pos
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return False
+        buffer, pos = buffer[pos:] + chunk, 0
+        return True
+
+    while True:
+        while pos < len(buffer) and (buffer[pos].isspace() or (in_array and buffer[pos] == ',')):
+            pos += 1
+        if pos >= len(buffer):
+            if read_more():
+                continue
+            if in_array:
+                raise ValueError('JSON incompleto: lista não terminada')
+            return
+
+        if not started:
+            started = True
+            if buffer[pos] == '\ufeff':
+                pos += 1
+                continue
+            if buffer[pos] == '[':
+                in_array = True
+                pos += 1
+                continue
+        if in_array and buffer[pos] == ']':
+            return
+
+        try:
+            item, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Objeto cortado no fim do trecho lido: lê mais e tenta de novo
+            if read_more():
+                continue
+            raise
+        yield item
+
+
+class CountingReader(io.RawIOBase):
+    """Conta os bytes lidos de um arquivo binário, para estimar o progresso."""
+
+    def __init__(self, file):
+        self.file = file
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.file.read(len(buffer))
+        buffer[:len(data)] = data
+        self.bytes_read += len(data)
+        return len(data)
+
+
+def open_text_stream(file):
+    """Lê um arquivo binário (upload, FieldFile) como texto UTF-8.
+
+    Retorna o stream de texto e o contador de bytes lidos do arquivo.
+    """
+    reader = CountingReader(file)
+    return io.TextIOWrapper(io.BufferedReader(reader), encoding='utf-8-sig'), reader
+
+
+def free_slugs(wanted):
+    """Slugs livres para `wanted` ({chave: slug}), com "-2", "-3"... se já usados.
+
+    "Foo 1.0" e "foo 1.0" são softwares diferentes com o mesmo slug.
+    """
+    from .models import Software
+    numbers = {key: 1 for key in wanted}
+    slugs, used = {}, set()
+    pending = list(wanted)
+    while pending:
+        candidates = {
+            key: wanted[key] if numbers[key] == 1 else f'{wanted[key]}-{numbers[key]}'
+            for key in pending
+        }
+        taken = set(Software.objects.filter(slug__in=candidates.values()).values_list('slug', flat=True))
+        retry = []
+        for key in pending:
+            slug = candidates[key]
+            if slug in taken or slug in used:
+                numbers[key] += 1
+                retry.append(key)
+            else:
+                slugs[key] = slug
+                used.add(slug)
+        pending = retry
+    return slugs
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class BatchImporter:
+    """Grava itens do catálogo em lotes com um upsert por lote.
+
+    Cada lote é uma transação; se ele falhar, é regravado item a item e só
+    os itens com erro são reportados. Slugs já usados (ex.: "Foo 1.0" e
+    "foo 1.0") ganham um sufixo numérico. `bulk_create` não dispara
+    os sinais de `Software`; o índice de busca e a versão do catálogo são
+    atualizados aqui, uma vez por lote. Instaladores e ícones continuam
+    passando por `save()`, para manter as referências por conteúdo e as
+    variantes de imagem.
+    """
+
+    def __init__(self, update=False, base_dir=None, batch_size=DEFAULT_BATCH_SIZE, progress=None, attach_files=True):
+        self.update = update
+        self.base_dir = base_dir or os.getcwd()
+        # Sem `attach_files`, caminhos de instalador/ícone nos itens são ignorados
+        self.attach_files_enabled = attach_files
+        self.batch_size = batch_size
+        self.progress = progress
+        self.stats = {'created': 0, 'updated': 0, 'skipped': 0, 'invalid': 0, 'failed': 0, 'files': 0}
+        self.errors = []
+        self.processed = 0
+        self.started = None
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started if self.started else 0.0
+
+    @property
+    def rate(self):
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def run(self, items):
+        self.started = time.monotonic()
+        for batch in batched(items, self.batch_size):
+            first = self.processed + 1
+            self.processed += len(batch)
+            counted, reported = dict(self.stats), len(self.errors)
+            try:
+                file_jobs = self.import_batch(batch, first)
+            except Exception:
+                logger.exception('Falha ao importar os itens %s-%s; gravando um a um', first, self.processed)
+                self.stats, self.errors[reported:] = counted, []
+                file_jobs = self.import_one_by_one(batch, first)
+            if self.attach_files_enabled:
+                for software_id, item in file_jobs:
+                    self.attach_files(software_id, item)
+            if self.progress:
+                self.progress(self)
+        return self.stats
+
+    def import_one_by_one(self, batch, first):
+        """Regrava um lote desfeito item a item: só os itens com erro falham."""
+        file_jobs = []
+        for position, item in enumerate(batch, first):
+            counted, reported = dict(self.stats), len(self.errors)
+            try:
+                file_jobs += self.import_batch([item], position)
+            except Exception as e:
+                self.stats, self.errors[reported:] = counted, []
+                self.stats['failed'] += 1
+                self.errors.append(f'Item {position}: {e}')
+        return file_jobs
+
+    def clean(self, item, position):
+        if not isinstance(item, dict) or not str(item.get('name') or '').strip():
+            self.stats['invalid'] += 1
+            self.errors.append(f'Item {position}: "name" obrigatório')
+            return None
+        item = dict(item)
+        item['name'] = str(item['name']).strip()
+        item['version'] = str(item.get('version') or DEFAULT_VERSION).strip()
+        return item
+
+    def import_batch(self, batch, first, positions=None):
+        """Grava um lote; `positions` são as posições originais dos itens, se não forem seguidas."""
+        from .models import Software
+
+        items = {}
+        for position, item in zip(positions or count(first), batch):
+            item = self.clean(item, position)
+            if item:
+                # Repetições no mesmo lote: vale a última
+                items[(item['name'], item['version'])] = item
+        if not items:
+            return []
+
+        names = {name for name, _ in items}
+        with transaction.atomic():
+            existing = {
+                (row['name'], row['version']): row
+                for row in Software.objects.filter(name__in=names).values('id', 'name', 'version', 'slug', *ITEM_FIELDS)
+                if (row['name'], row['version']) in items
+            }
+            keys = [key for key in items if self.update or key not in existing]
+            slugs = free_slugs({
+                key: slugify(f'{key[0]} {key[1]}') for key in keys if key not in existing
+            })
+            objs = []
+            for key in keys:
+                item, current = items[key], existing.get(key)
+                # Campos ausentes no item mantêm o valor atual (ou o padrão)
+                values = {field: item.get(field, (current or DEFAULTS)[field]) for field in ITEM_FIELDS}
+                software = Software(name=key[0], version=key[1], **values)
+                software.slug = current['slug'] if current else slugs[key]
+                software.search_document = build_search_document(software)
+                objs.append(software)
+
+            if objs:
+                Software.objects.bulk_create(
+                    objs,
+                    update_conflicts=True,
+                    unique_fields=['name', 'version'],
+                    update_fields=[*ITEM_FIELDS, 'search_document', 'updated_at'],
+                )
+                rows = list(
+                    Software.objects.filter(name__in={obj.name for obj in objs})
+                    .values_list('id', 'name', 'version', 'search_document')
+                )
+                written = {(obj.name, obj.version) for obj in objs}
+                rows = [row for row in rows if (row[1], row[2]) in written]
+                index_softwares([(pk, name, document) for pk, name, _, document in rows])
+                transaction.on_commit(bump_catalog_version)
+                ids = {(name, version): pk for pk, name, version, _ in rows}
+            else:
+                ids = {}
+
+        self.stats['updated'] += sum(1 for key in ids if key in existing)
+        self.stats['created'] += sum(1 for key in ids if key not in existing)
+        self.stats['skipped'] += len(items) - len(ids)
+        return [
+            (ids[key], item) for key, item in items.items()
+            if key in ids and (item.get('installer') or item.get('icon'))
+        ]
+
+    def resolve(self, path):
+        return path if os.path.isabs(path) else os.path.join(self.base_dir, path)
+
+    def attach_files(self, software_id, item):
+        """Grava instalador e ícone do item com um único `save()`."""
+        from .models import Software
+
+        paths = {field: self.resolve(item[field]) for field in ('installer', 'icon') if item.get(field)}
+        for field, path in list(paths.items()):
+            if not os.path.isfile(path):
+                self.errors.append(f'{item["name"]} {item["version"]}: arquivo não encontrado: {path}')
+                del paths[field]
+        if not paths:
+            return
+        try:
+            software = Software.objects.get(pk=software_id)
+            for field, path in paths.items():
+                with open(path, 'rb') as f:
+                    getattr(software, field).save(os.path.basename(path), File(f), save=False)
+            software.save(update_fields=list(paths))
+            self.stats['files'] += len(paths)
+        except Exception as e:
+            self.errors.append(f'{item["name"]} {item["version"]}: erro ao gravar arquivos ({e})')
+            logger.exception('Falha ao gravar os arquivos de %s', software_id)
+
+
+def _file_signature(stat):
+    """Tamanho e data de um arquivo de origem, guardados em Software.import_sources.
+
+    A data é a maior entre mtime e ctime (em ns): um arquivo substituído por
+    outro que preserva o mtime antigo (cp -p, rsync -t) tem ctime novo.
+    """
+    return [stat.st_size, max(stat.st_mtime_ns, stat.st_ctime_ns)]
+
+
+class DirectoryImporter(BatchImporter):
+    """Importação de um diretório de instaladores com cópia em paralelo.
+
+    Leitura, hash, validação e cópia dos arquivos para o storage rodam em
+    `workers` threads; a gravação no banco continua na thread principal, um
+    lote por transação. Enquanto um lote é gravado, os arquivos do próximo já
+    estão sendo copiados.
+
+    Arquivos com o mesmo nome, tamanho e data da última importação
+    (Software.import_sources) não são relidos; com `verify`, são comparados
+    pelo SHA-256. Reexecuções copiam apenas o que mudou; edições feitas no
+    admin não escondem um arquivo substituído na origem.
+    """
+
+    def __init__(self, workers=4, verify=False, **kwargs):
+        super().__init__(**kwargs)
+        self.workers = max(workers, 1)
+        self.verify = verify
+        self.stats['unchanged'] = 0
+        # Arquivos copiados para lotes desfeitos, removidos ao final se ninguém os usar
+        self.discarded = []
+
+    def run(self, items):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.started = time.monotonic()
+        pending = None
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='import') as pool:
+            for batch in batched(items, self.batch_size):
+                first = self.processed + 1
+                self.processed += len(batch)
+                prepared = (first, self.submit_batch(pool, batch, first))
+                if pending:
+                    self.write_batch(*pending)
+                pending = prepared
+            if pending:
+                self.write_batch(*pending)
+        # Só depois de todos os lotes: um lote seguinte pode ter recebido o
+        # mesmo arquivo (mesmo conteúdo) enquanto este era desfeito
+        self.discard_files()
+        return self.stats
+
+    def discard_files(self):
+        """Remove os arquivos de lotes desfeitos que nenhum software referencia."""
+        from .models import Software, InstallerBlob
+        from .storage import installer_storage, sha256_from_name
+
+        for field, name in self.discarded:
+            try:
+                if field == 'installer':
+                    # Sem InstallerBlob o arquivo nunca foi referenciado
+                    if not InstallerBlob.objects.filter(sha256=sha256_from_name(name)).exists():
+                        installer_storage.delete(name)
+                elif not Software.objects.filter(icon=name).exists():
+                    default_storage.delete(name)
+            except OSError:
+                logger.warning('Não foi possível remover o arquivo %s', name, exc_info=True)
+        self.discarded = []
+
+    def submit_batch(self, pool, batch, first):
+        from .models import Software
+
+        items = [
+            (position, item) for position, item in
+            ((position, self.clean(item, position)) for position, item in enumerate(batch, first)) if item
+        ]
+        existing = {
+            (row['name'], row['version']): row
+            for row in Software.objects.filter(name__in={item['name'] for _, item in items}).values(
+                'name', 'version', 'installer', 'installer_sha256', 'icon', 'import_sources'
+            )
+        }
+        futures = []
+        for position, item in items:
+            current = existing.get((item['name'], item['version']))
+            if current and not self.update:
+                self.stats['skipped'] += 1
+                continue
+            futures.append((position, item, pool.submit(self.prepare_files, item, current)))
+        return futures
+
+    def prepare_files(self, item, current):
+        """Copia os arquivos do item para o storage (em uma thread do pool).
+
+        Retorna `{campo: nome no storage}` apenas dos arquivos que mudaram, a
+        quantidade de arquivos sem mudança e as assinaturas dos arquivos de
+        origem (para Software.import_sources).
+        """
+        installer = self.resolve(item.get('installer') or '')
+        if not item.get('installer') or not os.path.isfile(installer):
+            raise FileNotFoundError(f'Instalador não encontrado: {installer}')
+        files = {}
+        unchanged = 0
+        stored = current['import_sources'] if current else {}
+        sources = {'installer': _file_signature(os.stat(installer))}
+
+        # Outro nome de arquivo: mesmo tamanho e data não bastam, compara o hash
+        same_name = current and os.path.basename(current['installer'] or '') == os.path.basename(installer)
+        if same_name and not self.verify and stored.get('installer') == sources['installer']:
+            unchanged += 1
+        else:
+            files['installer'] = self.store_installer(installer, current)
+            if files['installer'] is None:
+                del files['installer']
+                unchanged += 1
+
+        if item.get('icon'):
+            icon = self.resolve(item['icon'])
+            if not os.path.isfile(icon):
+                self.errors.append(f'{item["name"]} {item["version"]}: ícone não encontrado: {icon}')
+            else:
+                sources['icon'] = _file_signature(os.stat(icon))
+                if current and current['icon'] and self.icon_unchanged(icon, current, stored.get('icon')):
+                    unchanged += 1
+                else:
+                    try:
+                        files['icon'] = self.store_icon(icon)
+                    except Exception as e:
+                        # Ícone inválido não impede a importação do instalador
+                        del sources['icon']
+                        self.errors.append(f'{item["name"]} {item["version"]}: ícone inválido: {icon} ({e})')
+        return files, unchanged, sources
+
+    def icon_unchanged(self, path, current, stored_signature):
+        from .storage import hash_file
+
+        if not default_storage.exists(current['icon']):
+            return False
+        stat = os.stat(path)
+        if not self.verify:
+            return stored_signature == _file_signature(stat)
+        if stat.st_size != default_storage.size(current['icon']):
+            return False
+        with open(path, 'rb') as source, default_storage.open(current['icon'], 'rb') as stored:
+            return hash_file(File(source)) == hash_file(stored)
+
+    def store_installer(self, path, current):
+        from .storage import hash_file, installer_storage
+
+        with open(path, 'rb') as f:
+            content = File(f)
+            sha256 = hash_file(content)
+            if current and sha256 == current['installer_sha256']:
+                return None
+            # Já calculado: o storage por conteúdo não relê o arquivo
+            content.sha256 = sha256
+            return installer_storage.save(os.path.basename(path), content)
+
+    def store_icon(self, path):
+        from PIL import Image
+        from .models import Software
+
+        with open(path, 'rb') as f:
+            Image.open(f).verify()
+            f.seek(0)
+            name = Software._meta.get_field('icon').generate_filename(None, os.path.basename(path))
+            return default_storage.save(name, File(f))
+
+    def write_batch(self, first, futures):
+        from .models import Software
+
+        positions, items, files, sources = [], [], {}, {}
+        for position, item, future in futures:
+            try:
+                item_files, unchanged, item_sources = future.result()
+            except Exception as e:
+                self.stats['invalid'] += 1
+                self.errors.append(f'Item {position}: {item["name"]} {item["version"]}: {e}')
+                continue
+            self.stats['unchanged'] += unchanged
+            positions.append(position)
+            items.append(item)
+            files[(item['name'], item['version'])] = item_files
+            sources[(item['name'], item['version'])] = item_sources
+
+        counted = {key: self.stats[key] for key in ('created', 'updated', 'skipped', 'files')}
+        try:
+            with transaction.atomic():
+                jobs = self.import_batch(items, first, positions) if items else []
+                softwares = Software.objects.in_bulk([pk for pk, _ in jobs])
+                for pk, item in jobs:
+                    key = (item['name'], item['version'])
+                    item_files, software = files[key], softwares[pk]
+                    if software.import_sources != sources[key]:
+                        software.import_sources = sources[key]
+                        if not item_files:
+                            Software.objects.filter(pk=pk).update(import_sources=software.import_sources)
+                    if not item_files:
+                        continue
+                    for field, name in item_files.items():
+                        setattr(software, field, name)
+                    # save() mantém as referências do instalador e as variantes do ícone
+                    software.save(update_fields=[*item_files, 'import_sources'])
+                    self.stats['files'] += len(item_files)
+        except Exception as e:
+            self.stats.update(counted)
+            self.stats['failed'] += len(items)
+            self.errors.append(f'Itens {", ".join(map(str, positions))}: lote desfeito ({e})')
+            self.discarded += [(field, name) for item_files in files.values() for field, name in item_files.items()]
+            logger.exception('Falha ao importar os itens a partir de %s', first)
+        if self.progress:
+            self.progress(self)
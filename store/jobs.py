@@ -0,0 +1,220 @@
+import logging
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Tipo do job -> função que o executa, registrada com @job_handler
+JOB_HANDLERS = {}
+
+
+class JobLost(Exception):
+    """O job foi devolvido para a fila e reivindicado por outro worker."""
+
+    def __init__(self, job):
+        super().__init__(f'O job {job.pk} foi reivindicado por outro worker')
+
+
+def job_handler(kind):
+    def register(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(kind, payload=None, input_file=None, user=None):
+    """Coloca um job na fila; `input_file` (upload ou File) é gravado no storage."""
+    from .models_job import BackgroundJob
+
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Tipo de job desconhecido: {kind}')
+    job = BackgroundJob(kind=kind, payload=payload or {}, created_by=user)
+    if input_file is not None:
+        job.input_file.save(input_file.name, input_file, save=False)
+    job.save()
+    return job
+
+
+def enqueue_periodic(schedule=None):
+    """Enfileira os jobs periódicos (settings.PERIODIC_JOBS) que estiverem devidos.
+
+    Chamada a cada volta do worker. Um tipo só ganha um job novo quando não há
+    outro na fila ou em execução e o último foi criado há mais que o intervalo;
+    a chave no cache impede que dois workers enfileirem o mesmo tipo juntos.
+    """
+    from .models_job import BackgroundJob
+
+    if schedule is None:
+        schedule = getattr(settings, 'PERIODIC_JOBS', {})
+    now = timezone.now()
+    created = []
+    for kind, interval in schedule.items():
+        if not interval:
+            continue
+        pending = BackgroundJob.objects.filter(kind=kind).filter(
+            Q(status__in=('queued', 'running')) | Q(created_at__gt=now - timedelta(seconds=interval))
+        )
+        if pending.exists() or not cache.add(f'periodic_job:{kind}', 1, timeout=interval):
+            continue
+        created.append(enqueue(kind))
+    return created
+
+
+def run_job(job):
+    """Executa um job já reivindicado e registra o resultado."""
+    handler = JOB_HANDLERS.get(job.kind)
+    if handler is None:
+        job.finish('failed', f'Tipo de job desconhecido: {job.kind}')
+        return
+    try:
+        message = handler(job) or ''
+    except JobLost:
+        # Outro worker está com o job (e com o arquivo de entrada)
+        logger.warning('Job %s (%s) reivindicado por outro worker; abandonando', job.pk, job.kind)
+        return
+    except Exception as e:
+        logger.exception('Falha no job %s (%s)', job.pk, job.kind)
+        job.finish('failed', str(e))
+    else:
+        job.finish('completed', message)
+    if job.input_file and getattr(settings, 'JOB_DELETE_INPUT', True):
+        job.input_file.delete(save=False)
+        type(job).objects.filter(pk=job.pk).update(input_file='')
+
+
+@job_handler('import_software')
+def import_software_job(job):
+    """Importa o JSON/NDJSON enviado pelo admin, em lotes, lendo-o aos poucos."""
+    from .importer import BatchImporter, iter_json_items, open_text_stream
+
+    size = job.input_file.size or 1
+    reported = 0
+
+    def progress(importer):
+        nonlocal reported
+        job.report(
+            processed=importer.processed,
+            progress=reader.bytes_read * 100 / size,
+            result=importer.stats,
+            errors=importer.errors[reported:]
+        )
+        reported = len(importer.errors)
+
+    payload = job.payload
+    # Caminhos de arquivos nos itens não são seguidos: o JSON veio de um upload
+    importer = BatchImporter(
+        update=payload.get('update', False),
+        batch_size=payload.get('batch_size') or getattr(settings, 'JOB_IMPORT_BATCH_SIZE', 500),
+        attach_files=False,
+        progress=progress
+    )
+    with job.input_file.open('rb') as f:
+        stream, reader = open_text_stream(f)
+        importer.run(iter_json_items(stream))
+    progress(importer)
+
+    stats = importer.stats
+    message = (
+        f'{importer.processed} item(ns): {stats["created"]} criado(s), {stats["updated"]} atualizado(s), '
+        f'{stats["skipped"]} ignorado(s), {stats["invalid"]} inválido(s), {stats["failed"]} com erro na gravação'
+    )
+    return message
+
+
+@job_handler('remove_files')
+def remove_files_job(job):
+    """Remove os arquivos de softwares excluídos (agendado por file_cleanup).
+
+    O progresso é gravado junto com cada liberação de instalador: um job
+    devolvido para a fila continua de onde parou.
+    """
+    from .file_cleanup import remove_files
+
+    def checkpoint(released):
+        if not job.report(processed=released, result={'released': released}):
+            raise JobLost(job)
+
+    installers = job.payload.get('installers', [])
+    removed_icons = remove_files(
+        job.payload.get('icons', []), installers,
+        released=job.result.get('released', 0), checkpoint=checkpoint
+    )
+    return f'{len(installers)} instalador(es) liberado(s), {removed_icons} ícone(s) removido(s)'
+
+
+@job_handler('cleanup_old_versions')
+def cleanup_old_versions_job(job):
+    """Ação "Limpar versões antigas" do admin para seleções grandes."""
+    from .bulk_ops import cleanup_old_versions
+
+    def progress(deleted):
+        if not job.report(processed=deleted, result={'deleted': deleted}):
+            raise JobLost(job)
+
+    deleted = cleanup_old_versions(job.payload['names'], progress=progress)
+    return f'{deleted} versão(ões) antiga(s) removida(s)'
+
+
+@job_handler('duplicate_software')
+def duplicate_software_job(job):
+    """Ação "Duplicar softwares" do admin para seleções grandes.
+
+    O progresso é gravado junto com cada lote: um job devolvido para a fila
+    continua de onde parou, sem duplicar as cópias já criadas.
+    """
+    from .bulk_ops import duplicate_softwares
+
+    ids = job.payload['ids']
+    done, created_before = job.result.get('done', 0), job.result.get('created', 0)
+
+    def checkpoint(done, created):
+        result = {'done': done, 'created': created_before + created}
+        if not job.report(processed=done, progress=done * 100 / len(ids), result=result):
+            raise JobLost(job)
+
+    created = duplicate_softwares(ids, done=done, checkpoint=checkpoint)
+    return f'{created_before + created} software(s) duplicado(s)'
+
+
+@job_handler('generate_delta')
+def generate_delta_job(job):
+    """Patch binário da versão anterior para o novo instalador (ver store/deltas.py)."""
+    from .deltas import generate_delta
+
+    delta = generate_delta(job.payload['software_id'])
+    if delta is None:
+        return 'Nenhum delta gerado'
+    return f'Delta {delta.backend}: {delta.size} de {delta.target_size} bytes'
+
+
+@job_handler('generate_renditions')
+def generate_renditions_job(job):
+    """Variantes redimensionadas de um ícone ou screenshot (ver store/renditions.py)."""
+    from .renditions import update_renditions
+
+    renditions = update_renditions(job.payload['model'], job.payload['pk'])
+    if renditions is None:
+        return 'Imagem removida ou substituída; nada gerado'
+    return f'{len(renditions)} variante(s) gerada(s)'
+
+
+@job_handler('sync_kace_machines')
+def sync_kace_machines_job(job):
+    """Sincronização incremental das máquinas do KACE (agendada em PERIODIC_JOBS)."""
+    output = StringIO()
+    call_command('sync_kace_machines', stdout=output)
+    return output.getvalue().strip()
+
+
+@job_handler('rollup_analytics')
+def rollup_analytics_job(job):
+    """Atualiza as agregações do painel (agendada em PERIODIC_JOBS)."""
+    output = StringIO()
+    call_command('rollup_analytics', stdout=output)
+    return output.getvalue().strip()
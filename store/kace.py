@@ -1,20 +1,89 @@
 import os
+import queue
+import logging
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import closing, contextmanager
 from typing import Optional
 
 import pymysql
-from dotenv import load_dotenv
+from django.conf import settings
+from django.core.cache import cache
+
+from . import background
+
+logger = logging.getLogger(__name__)
+
+HOSTNAME_CACHE_KEY = 'kace:hostname:{username}'
+# Valor gravado no cache quando o usuário não tem máquina (cache negativo)
+NOT_FOUND = ''
+
+
+def normalize_username(username: Optional[str]) -> str:
+    """Remove domínio (DOMINIO\\user ou user@dominio) e normaliza para minúsculas."""
+    if not username:
+        return ''
+    return username.split("\\")[-1].split("@")[0].strip().lower()
+
+
+class ConnectionPool:
+    """Pool simples (LIFO) de conexões reutilizáveis com o banco do KACE."""
+
+    def __init__(self, factory, max_size=4):
+        self.factory = factory
+        self._idle = queue.LifoQueue(maxsize=max_size)
+
+    def _checkout(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self.factory()
+        # Conexões ociosas podem ter sido encerradas pelo servidor
+        ping = getattr(conn, "ping", None)
+        if ping is not None:
+            try:
+                ping(reconnect=True)
+            except Exception:
+                self._discard(conn)
+                return self.factory()
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self):
+        conn = self._checkout()
+        try:
+            yield conn
+        except Exception:
+            self._discard(conn)
+            raise
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
 
 
 class KaceClient:
-    def __init__(self):
-        # Load .env once when the module/class is used (safe and idempotent)
-        load_dotenv()
+    def __init__(self, connection_factory=None, placeholder="%s", pool_size=None):
+        # O .env já é carregado pelo settings; aqui apenas lemos o ambiente
         self.host = os.getenv("KACE_DB_HOST")
         self.port = int(os.getenv("KACE_DB_PORT", "3306"))
         self.db = os.getenv("KACE_DB_NAME")
         self.user = os.getenv("KACE_DB_USER")
         self.password = os.getenv("KACE_DB_PASSWORD")
         self.ssl_ca = os.getenv("KACE_DB_SSL_CA")  # optional
+        # `connection_factory`/`placeholder` permitem usar outro banco DB-API
+        # (ex.: sqlite3 com placeholder "?") como substituto em testes.
+        self.placeholder = placeholder
+        self.pool = ConnectionPool(
+            connection_factory or self.get_connection,
+            pool_size or getattr(settings, "KACE_POOL_SIZE", 4),
+        )
 
     def get_connection(self):
         kwargs = {
@@ -34,38 +103,178 @@ class KaceClient:
             kwargs["ssl"] = {"ca": self.ssl_ca}
         return pymysql.connect(**kwargs)
 
-    def get_latest_hostname_for_user(self, username: str) -> Optional[str]:
+    def lookup_hostname(self, username: str) -> Optional[str]:
         """
         Returns the most recent MACHINE.NAME for the given username matched against MACHINE.USER_LOGGED
         using a LIKE pattern. The most recent is determined by LAST_INVENTORY DESC.
+        Raises on connection/query errors.
         """
-        if not username:
-            return None
-        # Normalize expected username (strip domain if given)
-        if "@" in username:
-            username = username.split("@")[0]
-
         sql = (
             "SELECT NAME AS HOSTNAME FROM MACHINE "
-            "WHERE USER_LOGGED LIKE %s "
+            f"WHERE USER_LOGGED LIKE {self.placeholder} "
             "ORDER BY LAST_INVENTORY DESC "
             "LIMIT 1"
         )
         like_param = f"%{username}%"
+        with self.pool.connection() as conn:
+            with closing(conn.cursor()) as cur:
+                cur.execute(sql, (like_param,))
+                row = cur.fetchone()
+        if not row:
+            return None
+        hostname = row["HOSTNAME"] if isinstance(row, dict) else row[0]
+        return hostname or None
+
+    def iter_machines(self, since=None, batch_size=1000):
+        """Itera (NAME, USER_LOGGED, LAST_INVENTORY) da tabela MACHINE.
+
+        Com `since`, traz apenas máquinas inventariadas a partir dessa data
+        (sincronização incremental).
+        """
+        sql = "SELECT NAME, USER_LOGGED, LAST_INVENTORY FROM MACHINE"
+        params = ()
+        if since is not None:
+            sql += f" WHERE LAST_INVENTORY >= {self.placeholder}"
+            params = (since,)
+        sql += " ORDER BY LAST_INVENTORY"
+        with self.pool.connection() as conn:
+            with closing(conn.cursor()) as cur:
+                cur.execute(sql, params)
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        if isinstance(row, dict):
+                            yield row["NAME"], row["USER_LOGGED"], row["LAST_INVENTORY"]
+                        else:
+                            yield tuple(row)
+
+    def get_latest_hostname_for_user(self, username: str) -> Optional[str]:
+        """Consulta o KACE diretamente (sem cache); retorna None em caso de erro."""
+        username = normalize_username(username)
+        if not username:
+            return None
         try:
-            with self.get_connection() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(sql, (like_param,))
-                    row = cur.fetchone()
-                    if row and row.get("HOSTNAME"):
-                        return row["HOSTNAME"]
+            return self.lookup_hostname(username)
         except Exception:
             # Intentionally swallow errors here; caller will handle fallback.
             return None
-        return None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> KaceClient:
+    """Retorna o cliente compartilhado do processo (criado sob demanda)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = KaceClient()
+    return _client
+
+
+def set_client(client: Optional[KaceClient]):
+    """Substitui o cliente compartilhado (ex.: por um banco local em testes)."""
+    global _client
+    with _client_lock:
+        _client = client
 
 
 def get_latest_hostname_for_user(username: str) -> Optional[str]:
-    """Functional wrapper for convenience."""
-    client = KaceClient()
-    return client.get_latest_hostname_for_user(username)
+    """Resolve o hostname do usuário usando o cache compartilhado.
+
+    Consulta primeiro a tabela local KaceMachine e só recorre ao LIKE no KACE
+    quando o usuário não está nela. Acertos ficam em cache por KACE_CACHE_TTL;
+    ausências e falhas do KACE por KACE_NEGATIVE_CACHE_TTL, para que uma
+    lentidão no KACE não se repita a cada página.
+    """
+    username = normalize_username(username)
+    if not username:
+        return None
+
+    key = HOSTNAME_CACHE_KEY.format(username=username)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached or None
+
+    # Tabela local sincronizada (sync_kace_machines): busca indexada por igualdade
+    from .models_kace import KaceMachine
+    hostname = (
+        KaceMachine.objects.filter(username=username)
+        .order_by('-last_inventory')
+        .values_list('name', flat=True)
+        .first()
+    )
+
+    # Fallback: LIKE direto no KACE (usuário ainda não sincronizado)
+    if not hostname:
+        try:
+            hostname = get_client().lookup_hostname(username)
+        except Exception:
+            logger.warning('Falha ao consultar o KACE para %s', username, exc_info=True)
+            hostname = None
+
+    if hostname:
+        cache.set(key, hostname, getattr(settings, 'KACE_CACHE_TTL', 900))
+    else:
+        cache.set(key, NOT_FOUND, getattr(settings, 'KACE_NEGATIVE_CACHE_TTL', 60))
+    return hostname
+
+
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def peek_hostname(username: str):
+    """Consulta apenas o cache, sem bloquear.
+
+    Retorna `(resolvido, hostname)`; `resolvido` é False enquanto a resolução
+    ainda não terminou.
+    """
+    username = normalize_username(username)
+    if not username:
+        return True, None
+    cached = cache.get(HOSTNAME_CACHE_KEY.format(username=username))
+    if cached is None:
+        return False, None
+    return True, cached or None
+
+
+def resolve_hostname_async(username: str):
+    """Dispara a resolução do hostname em segundo plano e retorna o Future.
+
+    Chamadas repetidas para o mesmo usuário reaproveitam a resolução em curso.
+    """
+    username = normalize_username(username)
+    if not username:
+        return None
+    with _pending_lock:
+        future = _pending.get(username)
+        if future is None or future.done():
+            future = background.submit(get_latest_hostname_for_user, username)
+            _pending[username] = future
+    future.add_done_callback(lambda f: _forget(username, f))
+    return future
+
+
+def _forget(username, future):
+    with _pending_lock:
+        if _pending.get(username) is future:
+            del _pending[username]
+
+
+def wait_for_hostname(username: str, timeout: float) -> Optional[str]:
+    """Retorna o hostname aguardando no máximo `timeout` segundos pela resolução."""
+    resolved, hostname = peek_hostname(username)
+    if resolved:
+        return hostname
+    future = resolve_hostname_async(username)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        return None
+    except Exception:
+        return None
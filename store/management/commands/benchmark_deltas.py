@@ -0,0 +1,76 @@
+import os
+import time
+import tempfile
+from django.core.management.base import BaseCommand, CommandError
+from ...deltas import available_backends, make_delta
+from ...models import Software
+from ...storage import installer_storage
+
+class Command(BaseCommand):
+    help = 'Mede a economia de bytes dos deltas entre pares de instaladores'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'pairs', nargs='*',
+            help='Pares "antigo:novo" de caminhos de instaladores'
+        )
+        parser.add_argument(
+            '--catalog', type=int, default=0,
+            help='Usa até N pares de versões consecutivas do catálogo (mesmo nome)'
+        )
+        parser.add_argument('--backend', choices=['zstd', 'bsdiff'], help='Mede apenas este formato')
+
+    def catalog_pairs(self, limit):
+        pairs = []
+        previous = {}
+        rows = (
+            Software.objects.exclude(installer_sha256='')
+            .order_by('name', 'created_at')
+            .values_list('name', 'installer', 'installer_sha256')
+        )
+        for name, installer, sha256 in rows:
+            source = previous.get(name)
+            if source and source[1] != sha256:
+                pairs.append((installer_storage.path(source[0]), installer_storage.path(installer)))
+                if len(pairs) >= limit:
+                    break
+            previous[name] = (installer, sha256)
+        return pairs
+
+    def handle(self, *args, **options):
+        pairs = []
+        for pair in options['pairs']:
+            if ':' not in pair:
+                raise CommandError(f'Par inválido (use antigo:novo): {pair}')
+            pairs.append(tuple(pair.split(':', 1)))
+        if options['catalog']:
+            pairs.extend(self.catalog_pairs(options['catalog']))
+        if not pairs:
+            raise CommandError('Informe pares antigo:novo ou --catalog N')
+
+        backends = [options['backend']] if options['backend'] else available_backends()
+        if not backends:
+            raise CommandError('Nenhum formato disponível (instale zstd ou bsdiff4)')
+
+        totals = {backend: [0, 0, 0.0] for backend in backends}
+        with tempfile.TemporaryDirectory() as tmp:
+            for source, target in pairs:
+                target_size = os.path.getsize(target)
+                for backend in backends:
+                    output = os.path.join(tmp, f'patch.{backend}')
+                    started = time.perf_counter()
+                    size = make_delta(source, target, output, backend)
+                    elapsed = time.perf_counter() - started
+                    totals[backend][0] += target_size
+                    totals[backend][1] += size
+                    totals[backend][2] += elapsed
+                    self.stdout.write(
+                        f'{os.path.basename(target)} [{backend}]: {size} de {target_size} bytes '
+                        f'({100 - size * 100 / max(target_size, 1):.1f}% economizado) em {elapsed:.2f} s'
+                    )
+
+        for backend, (full, patched, elapsed) in totals.items():
+            self.stdout.write(self.style.SUCCESS(
+                f'{backend}: {len(pairs)} par(es), {patched} de {full} bytes '
+                f'({100 - patched * 100 / max(full, 1):.1f}% economizado), {elapsed:.2f} s no total'
+            ))
@@ -0,0 +1,48 @@
+import random
+import string
+import time
+from django.core.management.base import BaseCommand
+from ...typeahead import PrefixIndex, current_version
+
+class Command(BaseCommand):
+    help = 'Mede a latência do autocompletar sobre um catálogo sintético'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=10000, help='Tamanho do catálogo sintético')
+        parser.add_argument('--queries', type=int, default=20000, help='Quantidade de buscas medidas')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(3000)]
+
+        entries = []
+        for i in range(options['entries']):
+            name = ' '.join(rng.choice(words).capitalize() for _ in range(rng.randint(1, 4)))
+            entries.append({'id': i, 'name': name, 'slug': f'{name.lower().replace(" ", "-")}-{i}', 'version': '1.0'})
+
+        started = time.perf_counter()
+        index = PrefixIndex(entries)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        # Cada busca inclui a checagem de versão do catálogo, como na view (uma
+        # leitura do cache por TYPEAHEAD_VERSION_CHECK_INTERVAL; as demais usam
+        # a versão já lida)
+        timings = []
+        for _ in range(options['queries']):
+            word = rng.choice(words)
+            prefix = word[:rng.randint(1, len(word))]
+            started = time.perf_counter()
+            current_version()
+            index.search(prefix, limit=10)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        def percentile(p):
+            return timings[min(int(len(timings) * p), len(timings) - 1)]
+
+        self.stdout.write(f'Catálogo: {len(index)} softwares; índice construído em {build_ms:.1f} ms')
+        self.stdout.write(
+            f'Buscas: {len(timings)} | p50 {percentile(0.50):.3f} ms | p95 {percentile(0.95):.3f} ms | '
+            f'p99 {percentile(0.99):.3f} ms | máx {timings[-1]:.3f} ms'
+        )
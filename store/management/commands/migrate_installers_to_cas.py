@@ -0,0 +1,35 @@
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from ...models import Software
+from ...storage import installer_storage, sha256_from_name
+
+
+class Command(BaseCommand):
+    help = 'Move instaladores antigos para o armazenamento endereçado por conteúdo (SHA-256)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Apenas lista os arquivos que seriam movidos')
+
+    def handle(self, *args, **options):
+        legacy = [
+            software for software in Software.objects.exclude(installer='').only('id', 'name', 'installer')
+            if not sha256_from_name(software.installer.name)
+        ]
+        moved = missing = 0
+        for software in legacy:
+            old_name = software.installer.name
+            if not installer_storage.exists(old_name):
+                self.stdout.write(self.style.WARNING(f'Arquivo não encontrado: {old_name}'))
+                missing += 1
+                continue
+            if options['dry_run']:
+                self.stdout.write(f'{software.name}: {old_name}')
+                continue
+            with installer_storage.open(old_name, 'rb') as f:
+                # O armazenamento reaproveita o arquivo se o conteúdo já existir;
+                # os sinais ajustam as referências e removem o arquivo antigo
+                software.installer.save(old_name.rsplit('/', 1)[-1], File(f), save=False)
+            software.save(update_fields=['installer'])
+            moved += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{moved} instalador(es) migrado(s), {missing} ausente(s)'))
@@ -0,0 +1,46 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from ...catalog_cache import bump_catalog_version
+from ...models import Software, SoftwareScreenshot
+from ...renditions import (
+    ICON_SIZES, SCREENSHOT_SIZES, RENDITIONS_DIR, generate_renditions, referenced_names
+)
+
+class Command(BaseCommand):
+    help = 'Gera as variantes redimensionadas de ícones e screenshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regera também as imagens que já têm variantes')
+        parser.add_argument('--prune', action='store_true', help='Remove variantes que não são mais referenciadas')
+
+    def handle(self, *args, **options):
+        generated = 0
+        icons = 0
+        targets = (
+            (Software.objects.exclude(icon='').exclude(icon__isnull=True), 'icon', 'icon_renditions', ICON_SIZES),
+            (SoftwareScreenshot.objects.all(), 'image', 'image_renditions', SCREENSHOT_SIZES),
+        )
+        for queryset, field, renditions_field, sizes in targets:
+            if not options['all']:
+                queryset = queryset.filter(**{renditions_field: {}})
+            for obj in queryset.only('pk', field).iterator():
+                renditions = generate_renditions(getattr(obj, field), sizes)
+                type(obj).objects.filter(pk=obj.pk).update(**{renditions_field: renditions})
+                generated += 1
+                icons += isinstance(obj, Software)
+        if icons:
+            # update() não dispara os sinais: a grade em cache ainda usa os ícones originais
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'{generated} imagem(ns) processada(s)'))
+
+        if options['prune']:
+            referenced = referenced_names()
+            removed = 0
+            buckets = default_storage.listdir(RENDITIONS_DIR)[0] if default_storage.exists(RENDITIONS_DIR) else []
+            for bucket in buckets:
+                for filename in default_storage.listdir(f'{RENDITIONS_DIR}/{bucket}')[1]:
+                    name = f'{RENDITIONS_DIR}/{bucket}/{filename}'
+                    if name not in referenced:
+                        default_storage.delete(name)
+                        removed += 1
+            self.stdout.write(self.style.SUCCESS(f'{removed} variante(s) sem referência removida(s)'))
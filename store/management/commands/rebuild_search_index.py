@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from ...search import ensure_search_index
+
+class Command(BaseCommand):
+    help = 'Recria o índice de busca de texto completo dos softwares'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Banco de dados a reindexar')
+
+    def handle(self, *args, **options):
+        ensure_search_index(options['database'], rebuild=True)
+        self.stdout.write(self.style.SUCCESS('Índice de busca recriado'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from ...models_task import InstallationTask
+
+class Command(BaseCommand):
+    help = 'Devolve para pendente as tarefas de instalação com lease expirado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hostname', type=str, help='Restringe a um hostname específico')
+
+    def handle(self, *args, **options):
+        released = InstallationTask.release_expired_leases(options.get('hostname'))
+        self.stdout.write(self.style.SUCCESS(f'{released} tarefa(s) devolvida(s) para pendente'))
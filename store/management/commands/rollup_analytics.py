@@ -0,0 +1,28 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from ... import analytics
+
+class Command(BaseCommand):
+    help = 'Atualiza as tabelas agregadas de downloads e instalações (por hora e por dia)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lag', type=int, default=int(analytics.DEFAULT_LAG.total_seconds()),
+            help='Ignora os últimos N segundos (entram na próxima execução)'
+        )
+        parser.add_argument(
+            '--window-days', type=int, default=analytics.DEFAULT_WINDOW.days,
+            help='Tamanho, em dias, de cada transação ao processar históricos longos'
+        )
+        parser.add_argument('--reset', action='store_true', help='Apaga as agregações e recalcula do zero')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            for name in ('downloads', 'tasks'):
+                analytics.reset(name)
+        processed = analytics.roll_up_all(
+            lag=timedelta(seconds=options['lag']),
+            window=timedelta(days=max(options['window_days'], 1))
+        )
+        for name, windows in processed.items():
+            self.stdout.write(self.style.SUCCESS(f'{name}: {windows} janela(s) processada(s)'))
@@ -0,0 +1,49 @@
+import signal
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from ...jobs import enqueue_periodic, run_job
+from ...models_job import BackgroundJob
+
+class Command(BaseCommand):
+    help = 'Executa os trabalhos em segundo plano da fila (importações, limpezas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Esvazia a fila e termina, em vez de aguardar novos jobs (não agenda os periódicos)')
+        parser.add_argument(
+            '--interval', type=float, default=getattr(settings, 'JOB_POLL_INTERVAL', 2),
+            help='Segundos entre consultas à fila quando ela está vazia'
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        # Termina o job em andamento antes de sair (docker stop envia SIGTERM)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        stale_timeout = getattr(settings, 'JOB_STALE_TIMEOUT', 300)
+        max_attempts = getattr(settings, 'JOB_MAX_ATTEMPTS', 3)
+
+        while not self.stopping:
+            close_old_connections()
+            requeued = BackgroundJob.requeue_stale(stale_timeout, max_attempts)
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'{requeued} job(s) sem sinal devolvido(s) para a fila'))
+            if not options['once']:
+                # Jobs agendados (settings.PERIODIC_JOBS)
+                for job in enqueue_periodic():
+                    self.stdout.write(f'Agendado {job}')
+            job = BackgroundJob.claim_next()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+            self.stdout.write(f'Executando {job}')
+            run_job(job)
+            job.refresh_from_db()
+            style = self.style.SUCCESS if job.status == 'completed' else self.style.ERROR
+            self.stdout.write(style(f'{job}: {job.message}'))
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,60 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from ...kace import get_client, normalize_username
+from ...models_kace import KaceMachine
+
+class Command(BaseCommand):
+    help = 'Sincroniza a tabela local de máquinas (usuário -> hostname) a partir do KACE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Ignora a última sincronização e traz todas as máquinas')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Quantidade de máquinas gravadas por lote')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        since = None
+        if not options['full']:
+            since = KaceMachine.objects.aggregate(last=Max('last_inventory'))['last']
+            if since is not None:
+                # O KACE grava LAST_INVENTORY sem fuso horário
+                since = timezone.make_naive(since)
+
+        started = time.monotonic()
+        total = 0
+        batch = []
+        try:
+            for name, user_logged, last_inventory in get_client().iter_machines(since, batch_size):
+                if not name:
+                    continue
+                if last_inventory is not None and timezone.is_naive(last_inventory):
+                    last_inventory = timezone.make_aware(last_inventory)
+                batch.append(KaceMachine(
+                    name=name,
+                    user_logged=user_logged or '',
+                    username=normalize_username(user_logged),
+                    last_inventory=last_inventory,
+                ))
+                if len(batch) >= batch_size:
+                    total += self.save_batch(batch)
+                    batch = []
+            if batch:
+                total += self.save_batch(batch)
+        except Exception as e:
+            raise CommandError(f'Erro ao sincronizar com o KACE: {str(e)}')
+
+        elapsed = time.monotonic() - started
+        origin = f'desde {since}' if since else 'completa'
+        self.stdout.write(self.style.SUCCESS(f'Sincronização {origin}: {total} máquina(s) em {elapsed:.1f}s'))
+
+    def save_batch(self, batch):
+        with transaction.atomic():
+            KaceMachine.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=['name'],
+                update_fields=['user_logged', 'username', 'last_inventory', 'synced_at'],
+            )
+        return len(batch)
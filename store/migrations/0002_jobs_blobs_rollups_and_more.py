@@ -0,0 +1,274 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:55
+
+import django.db.models.deletion
+import store.storage
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(db_index=True, max_length=50, verbose_name='Tipo')),
+                ('status', models.CharField(choices=[('queued', 'Na fila'), ('running', 'Em execução'), ('completed', 'Concluído'), ('failed', 'Falhou')], default='queued', max_length=20, verbose_name='Status')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Parâmetros')),
+                ('input_file', models.FileField(blank=True, max_length=255, upload_to='jobs/%Y/%m/%d/', verbose_name='Arquivo de entrada')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Processados')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Progresso (%)')),
+                ('result', models.JSONField(blank=True, default=dict, verbose_name='Resultado')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Erros')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='Total de erros')),
+                ('message', models.TextField(blank=True, verbose_name='Mensagem')),
+                ('worker', models.CharField(blank=True, editable=False, max_length=100, verbose_name='Worker')),
+                ('claim_token', models.CharField(blank=True, editable=False, max_length=32, verbose_name='Token de reivindicação')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Último sinal')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+            ],
+            options={
+                'verbose_name': 'Trabalho em segundo plano',
+                'verbose_name_plural': 'Trabalhos em segundo plano',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DownloadRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hora'), ('day', 'Dia')], max_length=4, verbose_name='Granularidade')),
+                ('bucket_start', models.DateTimeField(verbose_name='Início do período')),
+                ('downloads', models.PositiveIntegerField(default=0, verbose_name='Downloads')),
+            ],
+            options={
+                'verbose_name': 'Downloads por período',
+                'verbose_name_plural': 'Downloads por período',
+                'ordering': ['-bucket_start'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InstallationLogChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField(verbose_name='Sequência')),
+                ('content', models.TextField(blank=True, verbose_name='Conteúdo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Trecho de Log',
+                'verbose_name_plural': 'Trechos de Log',
+                'ordering': ['task', 'sequence'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InstallerBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('name', models.CharField(max_length=255, verbose_name='Arquivo')),
+                ('size', models.BigIntegerField(default=0, verbose_name='Tamanho (bytes)')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Referências')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Arquivo de instalador',
+                'verbose_name_plural': 'Arquivos de instaladores',
+            },
+        ),
+        migrations.CreateModel(
+            name='InstallerDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_sha256', models.CharField(max_length=64, verbose_name='SHA-256 de origem')),
+                ('target_sha256', models.CharField(db_index=True, max_length=64, verbose_name='SHA-256 de destino')),
+                ('backend', models.CharField(max_length=20, verbose_name='Formato')),
+                ('patch', models.FileField(upload_to='deltas/', verbose_name='Patch')),
+                ('size', models.BigIntegerField(default=0, verbose_name='Tamanho (bytes)')),
+                ('target_size', models.BigIntegerField(default=0, verbose_name='Tamanho do destino (bytes)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Delta de instalador',
+                'verbose_name_plural': 'Deltas de instaladores',
+            },
+        ),
+        migrations.CreateModel(
+            name='KaceMachine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Hostname')),
+                ('user_logged', models.CharField(blank=True, help_text='Valor original de MACHINE.USER_LOGGED', max_length=255, verbose_name='Usuário logado (KACE)')),
+                ('username', models.CharField(blank=True, help_text='Usuário normalizado (sem domínio, minúsculo)', max_length=150, verbose_name='Usuário')),
+                ('last_inventory', models.DateTimeField(blank=True, null=True, verbose_name='Último inventário')),
+                ('synced_at', models.DateTimeField(auto_now=True, verbose_name='Sincronizado em')),
+            ],
+            options={
+                'verbose_name': 'Máquina KACE',
+                'verbose_name_plural': 'Máquinas KACE',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Agregação')),
+                ('position', models.DateTimeField(verbose_name='Processado até')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': "Marca d'água de agregação",
+                'verbose_name_plural': "Marcas d'água de agregação",
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskOutcomeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hora'), ('day', 'Dia')], max_length=4, verbose_name='Granularidade')),
+                ('bucket_start', models.DateTimeField(verbose_name='Início do período')),
+                ('completed', models.PositiveIntegerField(default=0, verbose_name='Concluídas')),
+                ('error', models.PositiveIntegerField(default=0, verbose_name='Com erro')),
+            ],
+            options={
+                'verbose_name': 'Instalações por período',
+                'verbose_name_plural': 'Instalações por período',
+                'ordering': ['-bucket_start'],
+            },
+        ),
+        migrations.AddField(
+            model_name='installationtask',
+            name='claim_token',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32, verbose_name='Token de reivindicação'),
+        ),
+        migrations.AddField(
+            model_name='installationtask',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Finalizada em'),
+        ),
+        migrations.AddField(
+            model_name='installationtask',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Lease expira em'),
+        ),
+        migrations.AddField(
+            model_name='software',
+            name='icon_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantes do ícone'),
+        ),
+        migrations.AddField(
+            model_name='software',
+            name='installer_sha256',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, verbose_name='SHA-256 do instalador'),
+        ),
+        migrations.AddField(
+            model_name='software',
+            name='installer_size',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name='Tamanho do instalador'),
+        ),
+        migrations.AddField(
+            model_name='software',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False, verbose_name='Documento de busca'),
+        ),
+        migrations.AddField(
+            model_name='softwarescreenshot',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantes da imagem'),
+        ),
+        migrations.AlterField(
+            model_name='software',
+            name='installer',
+            field=models.FileField(help_text='Arquivo executável ou pacote de instalação', storage=store.storage.get_installer_storage, upload_to='software/installers/%Y/%m/%d/', verbose_name='Arquivo de Instalação'),
+        ),
+        migrations.AddIndex(
+            model_name='installationtask',
+            index=models.Index(fields=['status', 'lease_expires_at'], name='store_insta_status_c02113_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='installationtask',
+            index=models.Index(fields=['finished_at'], name='store_insta_finishe_fea8f9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='software',
+            index=models.Index(fields=['is_active', 'name', 'id'], name='store_softw_is_acti_e0418a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='softwaredownload',
+            index=models.Index(fields=['downloaded_at'], name='store_softw_downloa_6ff951_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='softwarescreenshot',
+            index=models.Index(fields=['software', 'order', 'created_at'], name='store_softw_softwar_3df46a_idx'),
+        ),
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Criado por'),
+        ),
+        migrations.AddField(
+            model_name='downloadrollup',
+            name='software',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='download_rollups', to='store.software', verbose_name='Software'),
+        ),
+        migrations.AddField(
+            model_name='installationlogchunk',
+            name='task',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_chunks', to='store.installationtask', verbose_name='Tarefa'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='installerdelta',
+            unique_together={('source_sha256', 'target_sha256')},
+        ),
+        migrations.AddIndex(
+            model_name='kacemachine',
+            index=models.Index(fields=['username', 'last_inventory'], name='store_kacem_usernam_f467bb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kacemachine',
+            index=models.Index(fields=['last_inventory'], name='store_kacem_last_in_c452af_idx'),
+        ),
+        migrations.AddField(
+            model_name='taskoutcomerollup',
+            name='software',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_rollups', to='store.software', verbose_name='Software'),
+        ),
+        migrations.AddIndex(
+            model_name='backgroundjob',
+            index=models.Index(fields=['status', 'created_at'], name='store_backg_status_938428_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='backgroundjob',
+            index=models.Index(fields=['status', 'heartbeat_at'], name='store_backg_status_faf2c6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='downloadrollup',
+            index=models.Index(fields=['granularity', 'bucket_start'], name='store_downl_granula_99d160_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='downloadrollup',
+            constraint=models.UniqueConstraint(fields=('software', 'granularity', 'bucket_start'), name='unique_download_rollup'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='installationlogchunk',
+            unique_together={('task', 'sequence')},
+        ),
+        migrations.AddIndex(
+            model_name='taskoutcomerollup',
+            index=models.Index(fields=['granularity', 'bucket_start'], name='store_tasko_granula_b09480_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskoutcomerollup',
+            constraint=models.UniqueConstraint(fields=('software', 'granularity', 'bucket_start'), name='unique_task_outcome_rollup'),
+        ),
+    ]
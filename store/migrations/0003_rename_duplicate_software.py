@@ -0,0 +1,60 @@
+from django.db import migrations, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+
+def _copy_name(name, number):
+    return f'{name} (Cópia)' if number == 1 else f'{name} (Cópia {number})'
+
+
+def rename_duplicates(apps, schema_editor):
+    """Renomeia nome/versão repetidos antes da restrição única (0004).
+
+    Cópias feitas pela antiga ação de duplicar repetiam nome e versão. A
+    linha mais antiga mantém o nome; as demais viram "X (Cópia)", "X (Cópia
+    2)"... O documento de busca e o índice FTS5 das linhas renomeadas são
+    atualizados aqui, e a versão do catálogo em cache é incrementada.
+    """
+    from store.catalog_cache import bump_catalog_version
+    from store.search import FTS_TABLE, build_search_document, index_softwares
+
+    using = schema_editor.connection.alias
+    Software = apps.get_model('store', 'Software')
+    softwares = Software.objects.using(using)
+    duplicates = softwares.annotate(
+        rank=Window(RowNumber(), partition_by=[F('name'), F('version')], order_by=[F('pk').asc()])
+    ).filter(rank__gt=1).values_list('pk', flat=True)
+
+    renamed = []
+    for software in softwares.filter(pk__in=list(duplicates)).order_by('pk'):
+        number = 1
+        while softwares.filter(name=_copy_name(software.name, number), version=software.version).exists():
+            number += 1
+        software.name = _copy_name(software.name, number)
+        software.search_document = build_search_document(software)
+        softwares.filter(pk=software.pk).update(name=software.name, search_document=software.search_document)
+        renamed.append((software.pk, software.name, software.search_document))
+    if not renamed:
+        return
+
+    # O índice FTS5 é criado no post_migrate; só existe em bancos já migrados
+    if FTS_TABLE in schema_editor.connection.introspection.table_names():
+        index_softwares(renamed, using=using)
+    try:
+        # Savepoint: no PostgreSQL, uma falha abortaria a transação da migração
+        with transaction.atomic(using=using):
+            bump_catalog_version()
+    except Exception:
+        # Cache ainda não criado (ex.: tabela do DatabaseCache): nada em cache
+        pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_jobs_blobs_rollups_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_rename_duplicate_software'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='software',
+            constraint=models.UniqueConstraint(fields=('name', 'version'), name='unique_software_name_version'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_software_unique_name_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='software',
+            name='import_sources',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Arquivos de origem'),
+        ),
+    ]
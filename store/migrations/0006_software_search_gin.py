@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:07
+
+import django.contrib.postgres.search
+import store.search
+from django.db import migrations
+
+
+def drop_legacy_index(apps, schema_editor):
+    # Criado antes pelo post_migrate (search.ensure_search_index), com o mesmo nome
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS store_software_search_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_software_import_sources'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_legacy_index, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='software',
+            index=store.search.SearchDocumentIndex(django.contrib.postgres.search.SearchVector('search_document', config='simple'), name='store_software_search_gin'),
+        ),
+    ]
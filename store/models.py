@@ -1,8 +1,11 @@
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 from django.urls import reverse
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
+from .search import PG_CONFIG, PG_INDEX, SEARCH_DOCUMENT_FIELDS, SearchDocumentIndex, build_search_document
+from .storage import get_installer_storage, sha256_from_name
 
 User = get_user_model()
 
@@ -47,11 +50,21 @@ class Software(models.Model):
         help_text=_('Ícone do software (formato PNG ou JPG)')
     )
     
+    # Variantes redimensionadas do ícone (ver store/renditions.py); mantidas pelos sinais
+    icon_renditions = models.JSONField(_('Variantes do ícone'), default=dict, blank=True, editable=False)
+    
+    # Armazenado por conteúdo (cas/ab/<sha256>/<nome>); upload_to só fornece o nome
     installer = models.FileField(
         _('Arquivo de Instalação'),
         upload_to='software/installers/%Y/%m/%d/',
+        storage=get_installer_storage,
         help_text=_('Arquivo executável ou pacote de instalação')
     )
+    installer_sha256 = models.CharField(_('SHA-256 do instalador'), max_length=64, blank=True, editable=False, db_index=True)
+    installer_size = models.BigIntegerField(_('Tamanho do instalador'), null=True, blank=True, editable=False)
+    # Tamanho e data dos arquivos de origem na última importação de diretório
+    # ({"installer": [bytes, ns], "icon": [...]}); ver importer.DirectoryImporter
+    import_sources = models.JSONField(_('Arquivos de origem'), default=dict, blank=True, editable=False)
     
     # Metadados
     is_active = models.BooleanField(_('Ativo'), default=True)
@@ -79,16 +92,27 @@ class Software(models.Model):
         help_text=_('Comandos para instalação (opcional)')
     )
 
+    # Texto normalizado (sem acentos) usado pela busca; mantido em save()
+    search_document = models.TextField(_('Documento de busca'), blank=True, editable=False)
+
     class Meta:
         verbose_name = _('Software')
         verbose_name_plural = _('Softwares')
         ordering = ['name']
         indexes = [
             models.Index(fields=['name']),
+            # Paginação por cursor da vitrine: WHERE is_active ORDER BY name, id
+            models.Index(fields=['is_active', 'name', 'id']),
             models.Index(fields=['category']),
             models.Index(fields=['is_active']),
             models.Index(fields=['is_featured']),
             models.Index(fields=['created_at']),
+            # Busca textual no PostgreSQL (mesma expressão de search.search_software)
+            SearchDocumentIndex(SearchVector('search_document', config=PG_CONFIG), name=PG_INDEX),
+        ]
+        constraints = [
+            # Chave usada pela importação em lote (bulk_create com update_conflicts)
+            models.UniqueConstraint(fields=['name', 'version'], name='unique_software_name_version'),
         ]
         permissions = [
             ('can_download_software', _('Pode baixar softwares')),
@@ -101,7 +125,28 @@ class Software(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(f"{self.name} {self.version}")
+        self.search_document = build_search_document(self)
+        # Gravação parcial que muda o texto indexado também grava o documento
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and SEARCH_DOCUMENT_FIELDS & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_document'}
+        # download_count só é alterado por UPDATE com F() (store/counters.py);
+        # salvar o objeto inteiro não pode sobrescrever incrementos concorrentes
+        if (self.pk is not None and not self._state.adding
+                and kwargs.get('update_fields') is None and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'download_count'
+            ]
         super().save(*args, **kwargs)
+        # O nome final do instalador (com o hash) só existe após o upload
+        sha256 = sha256_from_name(self.installer.name)
+        if sha256 != self.installer_sha256:
+            self.installer_sha256 = sha256
+            self.installer_size = self.installer.size if sha256 else None
+            type(self).objects.filter(pk=self.pk).update(
+                installer_sha256=self.installer_sha256, installer_size=self.installer_size
+            )
     
     def get_absolute_url(self):
         return reverse('store:software_detail', kwargs={'slug': self.slug})
@@ -165,3 +210,7 @@ class SoftwareRelationship(models.Model):
 from .models_screenshot import SoftwareScreenshot
 from .models_download import SoftwareDownload
 from .models_suggestion import SoftwareSuggestion
+from .models_kace import KaceMachine
+from .models_blob import InstallerBlob, InstallerDelta
+from .models_analytics import DownloadRollup, TaskOutcomeRollup, RollupWatermark
+from .models_job import BackgroundJob
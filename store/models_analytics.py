@@ -0,0 +1,83 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from .models import Software
+
+GRANULARITY_CHOICES = [
+    ('hour', _('Hora')),
+    ('day', _('Dia')),
+]
+
+
+class DownloadRollup(models.Model):
+    """Total de downloads de um software por hora ou por dia."""
+    software = models.ForeignKey(
+        Software,
+        on_delete=models.CASCADE,
+        related_name='download_rollups',
+        verbose_name=_('Software')
+    )
+    granularity = models.CharField(_('Granularidade'), max_length=4, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField(_('Início do período'))
+    downloads = models.PositiveIntegerField(_('Downloads'), default=0)
+
+    class Meta:
+        verbose_name = _('Downloads por período')
+        verbose_name_plural = _('Downloads por período')
+        ordering = ['-bucket_start']
+        constraints = [
+            models.UniqueConstraint(fields=['software', 'granularity', 'bucket_start'], name='unique_download_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.software.name} - {self.bucket_start:%Y-%m-%d %H:%M} ({self.granularity}): {self.downloads}"
+
+
+class TaskOutcomeRollup(models.Model):
+    """Tarefas de instalação concluídas e com erro de um software por período.
+
+    A tarefa conta no período em que chegou ao status atual (`finished_at`).
+    Uma tarefa com erro que volta para a fila ou passa a concluída sai do
+    período antigo: ele é agregado de novo (`analytics.invalidate`), de modo
+    que a tarefa nunca conta nos dois.
+    """
+    software = models.ForeignKey(
+        Software,
+        on_delete=models.CASCADE,
+        related_name='task_rollups',
+        verbose_name=_('Software')
+    )
+    granularity = models.CharField(_('Granularidade'), max_length=4, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField(_('Início do período'))
+    completed = models.PositiveIntegerField(_('Concluídas'), default=0)
+    error = models.PositiveIntegerField(_('Com erro'), default=0)
+
+    class Meta:
+        verbose_name = _('Instalações por período')
+        verbose_name_plural = _('Instalações por período')
+        ordering = ['-bucket_start']
+        constraints = [
+            models.UniqueConstraint(fields=['software', 'granularity', 'bucket_start'], name='unique_task_outcome_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.software.name} - {self.bucket_start:%Y-%m-%d %H:%M} ({self.granularity})"
+
+
+class RollupWatermark(models.Model):
+    """Até onde (exclusive) os dados brutos já foram agregados."""
+    name = models.CharField(_('Agregação'), max_length=50, unique=True)
+    position = models.DateTimeField(_('Processado até'))
+    updated_at = models.DateTimeField(_('Atualizado em'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Marca d\'água de agregação')
+        verbose_name_plural = _('Marcas d\'água de agregação')
+
+    def __str__(self):
+        return f"{self.name}: {self.position}"
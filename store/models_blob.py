@@ -0,0 +1,125 @@
+import logging
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+
+from .storage import installer_storage, sha256_from_name
+
+logger = logging.getLogger(__name__)
+
+
+class InstallerBlob(models.Model):
+    """Arquivo de instalador armazenado por conteúdo, com contagem de referências.
+
+    Vários softwares (cópias, versões que reutilizam o mesmo binário,
+    reimportações) apontam para o mesmo arquivo; ele só é removido do disco
+    quando a última referência é liberada.
+    """
+    sha256 = models.CharField(_('SHA-256'), max_length=64, unique=True)
+    name = models.CharField(_('Arquivo'), max_length=255)
+    size = models.BigIntegerField(_('Tamanho (bytes)'), default=0)
+    ref_count = models.PositiveIntegerField(_('Referências'), default=0)
+    created_at = models.DateTimeField(_('Criado em'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('Arquivo de instalador')
+        verbose_name_plural = _('Arquivos de instaladores')
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count})"
+
+    @classmethod
+    def retain(cls, name):
+        """Registra uma nova referência ao arquivo `name`."""
+        sha256 = sha256_from_name(name)
+        if not sha256:
+            return
+        with transaction.atomic():
+            blob, created = cls.objects.select_for_update().get_or_create(
+                sha256=sha256,
+                defaults={'name': name, 'size': installer_storage.size(name), 'ref_count': 1}
+            )
+            if not created:
+                cls.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+    @classmethod
+    def retain_many(cls, names):
+        """`retain` em lote (ex.: cópias criadas com bulk_create): um UPDATE por arquivo."""
+        counts = Counter()
+        first_name = {}
+        for name in names:
+            sha256 = sha256_from_name(name)
+            if sha256:
+                counts[sha256] += 1
+                first_name.setdefault(sha256, name)
+        if not counts:
+            return
+        with transaction.atomic():
+            existing = set(
+                cls.objects.select_for_update().filter(sha256__in=list(counts)).values_list('sha256', flat=True)
+            )
+            for sha256, amount in counts.items():
+                if sha256 in existing:
+                    cls.objects.filter(sha256=sha256).update(ref_count=F('ref_count') + amount)
+                else:
+                    name = first_name[sha256]
+                    cls.objects.create(sha256=sha256, name=name, size=installer_storage.size(name), ref_count=amount)
+
+    @classmethod
+    def release(cls, name):
+        """Libera uma referência; remove o arquivo quando não restar nenhuma."""
+        sha256 = sha256_from_name(name)
+        if not sha256:
+            # Arquivo anterior ao armazenamento por conteúdo: remove se ninguém mais o usa
+            from .models import Software
+            if name and not Software.objects.filter(installer=name).exists():
+                installer_storage.delete(name)
+            return
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(sha256=sha256).first()
+            if blob is None:
+                return
+            if blob.ref_count > 1:
+                cls.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return
+            blob.delete()
+            # Só apaga os arquivos depois que a remoção do registro for confirmada
+            transaction.on_commit(lambda: installer_storage.delete(blob.name))
+            transaction.on_commit(lambda: InstallerDelta.discard_for(sha256))
+        logger.info('Instalador sem referências removido: %s', blob.name)
+
+
+class InstallerDelta(models.Model):
+    """Patch binário que transforma um instalador (origem) em outro (destino).
+
+    Gerado quando uma nova versão de um software é enviada; agentes que ainda
+    têm o instalador de origem baixam apenas o patch.
+    """
+    source_sha256 = models.CharField(_('SHA-256 de origem'), max_length=64)
+    target_sha256 = models.CharField(_('SHA-256 de destino'), max_length=64, db_index=True)
+    backend = models.CharField(_('Formato'), max_length=20)
+    patch = models.FileField(_('Patch'), upload_to='deltas/')
+    size = models.BigIntegerField(_('Tamanho (bytes)'), default=0)
+    target_size = models.BigIntegerField(_('Tamanho do destino (bytes)'), default=0)
+    created_at = models.DateTimeField(_('Criado em'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('Delta de instalador')
+        verbose_name_plural = _('Deltas de instaladores')
+        unique_together = ('source_sha256', 'target_sha256')
+
+    def __str__(self):
+        return f"{self.source_sha256[:12]} -> {self.target_sha256[:12]} ({self.backend})"
+
+    def get_download_url(self):
+        from django.urls import reverse
+        return reverse('store:download_delta', kwargs={'pk': self.pk})
+
+    @classmethod
+    def discard_for(cls, sha256):
+        """Remove os patches que usam um instalador que deixou de existir."""
+        for delta in cls.objects.filter(models.Q(source_sha256=sha256) | models.Q(target_sha256=sha256)):
+            delta.patch.delete(save=False)
+            delta.delete()
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 from .models import Software
+from .counters import count_download
 
 User = get_user_model()
 
@@ -53,6 +54,7 @@ class SoftwareDownload(models.Model):
         indexes = [
             models.Index(fields=['software', 'downloaded_at']),
             models.Index(fields=['user', 'downloaded_at']),
+            models.Index(fields=['downloaded_at']),
         ]
     
     def __str__(self):
@@ -83,8 +85,7 @@ class SoftwareDownload(models.Model):
             version=software.version
         )
         
-        # Incrementa o contador de downloads do software
-        software.download_count = models.F('download_count') + 1
-        software.save(update_fields=['download_count'])
+        # Incrementa o contador de downloads do software (gravado em lote)
+        count_download(software.pk)
         
         return download
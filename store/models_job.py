@@ -0,0 +1,173 @@
+import os
+import socket
+import uuid
+from datetime import timedelta
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+# Erros por item guardados no job; os demais só entram na contagem
+MAX_JOB_ERRORS = 1000
+
+
+class BackgroundJob(models.Model):
+    """Trabalho longo (importações, limpezas) executado pelo comando `run_jobs`.
+
+    A fila é a própria tabela: o worker reivindica o job mais antigo, grava o
+    progresso enquanto trabalha e marca o resultado ao terminar.
+    """
+    STATUS_CHOICES = [
+        ('queued', _('Na fila')),
+        ('running', _('Em execução')),
+        ('completed', _('Concluído')),
+        ('failed', _('Falhou')),
+    ]
+
+    kind = models.CharField(_('Tipo'), max_length=50, db_index=True)
+
+    status = models.CharField(
+        _('Status'),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='queued'
+    )
+
+    payload = models.JSONField(_('Parâmetros'), default=dict, blank=True)
+
+    input_file = models.FileField(
+        _('Arquivo de entrada'),
+        upload_to='jobs/%Y/%m/%d/',
+        blank=True,
+        max_length=255
+    )
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_('Criado por')
+    )
+
+    # Progresso: itens processados e percentual estimado
+    processed = models.PositiveIntegerField(_('Processados'), default=0)
+    progress = models.PositiveSmallIntegerField(_('Progresso (%)'), default=0)
+    result = models.JSONField(_('Resultado'), default=dict, blank=True)
+    errors = models.JSONField(_('Erros'), default=list, blank=True)
+    error_count = models.PositiveIntegerField(_('Total de erros'), default=0)
+    message = models.TextField(_('Mensagem'), blank=True)
+
+    worker = models.CharField(_('Worker'), max_length=100, blank=True, editable=False)
+    claim_token = models.CharField(_('Token de reivindicação'), max_length=32, blank=True, editable=False)
+    attempts = models.PositiveSmallIntegerField(_('Tentativas'), default=0)
+
+    created_at = models.DateTimeField(_('Criado em'), auto_now_add=True)
+    started_at = models.DateTimeField(_('Iniciado em'), null=True, blank=True)
+    heartbeat_at = models.DateTimeField(_('Último sinal'), null=True, blank=True)
+    finished_at = models.DateTimeField(_('Concluído em'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Trabalho em segundo plano')
+        verbose_name_plural = _('Trabalhos em segundo plano')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', 'heartbeat_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} - {self.get_status_display()}"
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+    @classmethod
+    def claim_next(cls, worker=None):
+        """Reivindica o job mais antigo da fila (ou None).
+
+        Como em `InstallationTask.claim_for_host`, o UPDATE condicional com
+        token garante que um job vá para um único worker, mesmo no SQLite.
+        """
+        worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+        while True:
+            now = timezone.now()
+            token = uuid.uuid4().hex
+            with transaction.atomic():
+                job_id = (
+                    cls.objects.select_for_update(skip_locked=True)
+                    .filter(status='queued')
+                    .order_by('created_at')
+                    .values_list('id', flat=True)
+                    .first()
+                )
+                if job_id is None:
+                    return None
+                claimed = cls.objects.filter(pk=job_id, status='queued').update(
+                    status='running',
+                    worker=worker,
+                    claim_token=token,
+                    attempts=models.F('attempts') + 1,
+                    started_at=now,
+                    heartbeat_at=now
+                )
+            if claimed:
+                return cls.objects.get(pk=job_id)
+
+    @classmethod
+    def requeue_stale(cls, timeout, max_attempts=None):
+        """Devolve para a fila os jobs cujo worker parou de dar sinal.
+
+        Jobs que já foram tentados `max_attempts` vezes falham em vez de
+        voltar para a fila.
+        """
+        now = timezone.now()
+        stale = cls.objects.filter(status='running', heartbeat_at__lt=now - timedelta(seconds=timeout))
+        if max_attempts:
+            stale.filter(attempts__gte=max_attempts).update(
+                status='failed',
+                message=_('O worker parou de dar sinal em todas as tentativas.'),
+                finished_at=now,
+                claim_token=''
+            )
+        return stale.update(
+            status='queued',
+            worker='',
+            claim_token=''
+        )
+
+    def report(self, processed=None, progress=None, result=None, errors=()):
+        """Grava o progresso (e renova o sinal de vida) sem tocar nos outros campos.
+
+        Retorna False se o job não pertence mais a este worker (foi devolvido
+        para a fila e reivindicado por outro).
+        """
+        fields = {'heartbeat_at': timezone.now()}
+        if processed is not None:
+            self.processed = fields['processed'] = processed
+        if progress is not None:
+            self.progress = fields['progress'] = min(int(progress), 100)
+        if result is not None:
+            self.result = fields['result'] = result
+        errors = list(errors)
+        if errors:
+            self.errors = fields['errors'] = (self.errors + errors)[:MAX_JOB_ERRORS]
+            self.error_count = fields['error_count'] = self.error_count + len(errors)
+        return bool(type(self).objects.filter(pk=self.pk, claim_token=self.claim_token).update(**fields))
+
+    def finish(self, status, message=''):
+        self.status = status
+        self.message = message
+        self.finished_at = timezone.now()
+        if status == 'completed':
+            self.progress = 100
+        type(self).objects.filter(pk=self.pk, claim_token=self.claim_token).update(
+            status=self.status,
+            message=self.message,
+            progress=self.progress,
+            finished_at=self.finished_at,
+            heartbeat_at=self.finished_at
+        )
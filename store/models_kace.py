@@ -0,0 +1,36 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class KaceMachine(models.Model):
+    """Cópia local da tabela MACHINE do KACE, sincronizada em lote."""
+    name = models.CharField(_('Hostname'), max_length=255, unique=True)
+
+    user_logged = models.CharField(
+        _('Usuário logado (KACE)'),
+        max_length=255,
+        blank=True,
+        help_text=_('Valor original de MACHINE.USER_LOGGED')
+    )
+
+    username = models.CharField(
+        _('Usuário'),
+        max_length=150,
+        blank=True,
+        help_text=_('Usuário normalizado (sem domínio, minúsculo)')
+    )
+
+    last_inventory = models.DateTimeField(_('Último inventário'), null=True, blank=True)
+    synced_at = models.DateTimeField(_('Sincronizado em'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Máquina KACE')
+        verbose_name_plural = _('Máquinas KACE')
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['username', 'last_inventory']),
+            models.Index(fields=['last_inventory']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.username or '-'})"
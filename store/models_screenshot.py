@@ -1,6 +1,8 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from django.core.files.storage import default_storage
 from .models import Software
+from .renditions import pick_rendition
 
 class SoftwareScreenshot(models.Model):
     """Model para armazenar screenshots dos softwares."""
@@ -17,6 +19,9 @@ class SoftwareScreenshot(models.Model):
         help_text=_('Tamanho recomendado: 800x600 pixels')
     )
     
+    # Variantes redimensionadas da imagem (ver store/renditions.py); mantidas pelos sinais
+    image_renditions = models.JSONField(_('Variantes da imagem'), default=dict, blank=True, editable=False)
+    
     caption = models.CharField(
         _('Legenda'),
         max_length=200,
@@ -37,18 +42,30 @@ class SoftwareScreenshot(models.Model):
         verbose_name = _('Screenshot')
         verbose_name_plural = _('Screenshots')
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['software', 'order', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.software.name} - {self.caption or 'Sem legenda'}"
     
+    def get_rendition(self, size):
+        """Variante com lado >= `size` px: URLs (PNG e WebP), largura e altura."""
+        entry = pick_rendition(self.image_renditions, size)
+        if entry is None:
+            return None
+        return {
+            'url': default_storage.url(entry['png']),
+            'webp_url': default_storage.url(entry['webp']),
+            'width': entry['width'],
+            'height': entry['height'],
+        }
+    
     def image_preview(self):
         if self.image:
-            from django.utils.html import format_html
-            return format_html(
-                '<img src="{}" style="max-height: 100px; max-width: 150px;" />',
-                self.image.url
-            )
+            from .templatetags.store_media import picture
+            # Miniatura em vez do original: o inline do admin lista várias imagens
+            return picture(self.image, self.image_renditions, 150, style='max-height: 100px; max-width: 150px;')
         return ""
     
     image_preview.short_description = _('Prévia')
-    image_preview.allow_tags = True
@@ -1,10 +1,18 @@
-from django.db import models
+import uuid
+from datetime import timedelta
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 from .models import Software
+from .agent_sync import bump_host_version
 
 User = get_user_model()
 
+# Status em que a tarefa terminou (com sucesso ou não)
+FINAL_STATUSES = ('completed', 'error')
+
+
 class InstallationTask(models.Model):
     STATUS_CHOICES = [
         ('pending', _('Pendente')),
@@ -45,6 +53,21 @@ class InstallationTask(models.Model):
         help_text=_('Log da instalação')
     )
 
+    # Lease de execução: preenchido quando o agente reivindica a tarefa
+    lease_expires_at = models.DateTimeField(
+        _('Lease expira em'),
+        null=True,
+        blank=True
+    )
+
+    claim_token = models.CharField(
+        _('Token de reivindicação'),
+        max_length=32,
+        blank=True,
+        db_index=True,
+        editable=False
+    )
+
     created_at = models.DateTimeField(
         _('Criado em'),
         auto_now_add=True
@@ -55,15 +78,135 @@ class InstallationTask(models.Model):
         auto_now=True
     )
 
+    # Momento em que a tarefa chegou a um status final; ao contrário de
+    # updated_at, não muda com reenvios do status ou do log (agregações)
+    finished_at = models.DateTimeField(
+        _('Finalizada em'),
+        null=True,
+        blank=True,
+        editable=False
+    )
+
     class Meta:
         verbose_name = _('Tarefa de Instalação')
         verbose_name_plural = _('Tarefas de Instalação')
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['hostname', 'status']),
+            models.Index(fields=['status', 'lease_expires_at']),
             models.Index(fields=['created_at']),
             models.Index(fields=['updated_at']),
+            models.Index(fields=['finished_at']),
         ]
 
     def __str__(self):
         return f"{self.software.name} - {self.hostname} - {self.get_status_display()}"
+
+    def save(self, *args, **kwargs):
+        self.set_finished_at()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'finished_at'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Status a que finished_at se refere (ver set_finished_at)
+        instance._finished_status = instance.__dict__.get('status')
+        return instance
+
+    def set_finished_at(self, now=None):
+        """Marca a chegada a um status final; voltar para a fila limpa a marca.
+
+        Se a tarefa sai de um status final (erro -> fila, erro -> concluída),
+        o período de `finished_at` já agregado é refeito na próxima execução
+        do rollup_analytics e a tarefa passa a contar só no novo resultado.
+        """
+        previous = getattr(self, '_finished_status', None)
+        if previous in FINAL_STATUSES and self.status != previous and self.finished_at:
+            from .analytics import invalidate
+            invalidate('tasks', self.finished_at)
+            self.finished_at = None
+        if self.status in FINAL_STATUSES:
+            if self.finished_at is None:
+                self.finished_at = now or timezone.now()
+        else:
+            self.finished_at = None
+        self._finished_status = self.status
+
+    @classmethod
+    def claim_for_host(cls, hostname, limit, lease_seconds):
+        """Reivindica até `limit` tarefas pendentes do host em uma transação.
+
+        As tarefas passam para `in_progress` com um lease de `lease_seconds`.
+        O token garante que cada tarefa seja entregue a um único chamador,
+        mesmo em bancos sem SELECT ... FOR UPDATE (SQLite).
+        """
+        now = timezone.now()
+        token = uuid.uuid4().hex
+        with transaction.atomic():
+            ids = list(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(hostname=hostname, status='pending')
+                .order_by('created_at')
+                .values_list('id', flat=True)[:limit]
+            )
+            claimed = cls.objects.filter(id__in=ids, status='pending').update(
+                status='in_progress',
+                claim_token=token,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                updated_at=now
+            )
+        if not claimed:
+            return []
+        bump_host_version(hostname)
+        return list(
+            cls.objects.filter(claim_token=token).select_related('software').order_by('created_at')
+        )
+
+    @classmethod
+    def release_expired_leases(cls, hostname=None):
+        """Devolve para `pending` as tarefas cujo lease expirou."""
+        now = timezone.now()
+        expired = cls.objects.filter(status='in_progress', lease_expires_at__lt=now)
+        if hostname:
+            expired = expired.filter(hostname=hostname)
+        hostnames = set(expired.values_list('hostname', flat=True))
+        released = expired.update(
+            status='pending',
+            claim_token='',
+            lease_expires_at=None,
+            updated_at=now
+        )
+        for name in hostnames:
+            bump_host_version(name)
+        return released
+
+
+class InstallationLogChunk(models.Model):
+    """Trecho do log de instalação enviado incrementalmente pelo agente."""
+    task = models.ForeignKey(
+        InstallationTask,
+        on_delete=models.CASCADE,
+        related_name='log_chunks',
+        verbose_name=_('Tarefa')
+    )
+
+    sequence = models.PositiveIntegerField(_('Sequência'))
+
+    content = models.TextField(_('Conteúdo'), blank=True)
+
+    created_at = models.DateTimeField(
+        _('Criado em'),
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = _('Trecho de Log')
+        verbose_name_plural = _('Trechos de Log')
+        ordering = ['task', 'sequence']
+        unique_together = ('task', 'sequence')
+
+    def __str__(self):
+        return f"{self.task_id} #{self.sequence}"
@@ -0,0 +1,156 @@
+import json
+import base64
+import binascii
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, values):
+    raw = json.dumps([direction] + list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        direction, values = data[0], data[1:]
+    except (ValueError, TypeError, IndexError, binascii.Error, UnicodeEncodeError):
+        raise InvalidCursor(cursor)
+    if direction not in ('n', 'p'):
+        raise InvalidCursor(cursor)
+    return direction, values
+
+
+class KeysetPage:
+    """Página obtida por cursor; a consulta só é executada quando a página é lida."""
+
+    def __init__(self, paginator, direction=None, values=None):
+        self.paginator = paginator
+        self.direction = direction
+        self.values = values
+
+    @cached_property
+    def _rows(self):
+        paginator = self.paginator
+        name_field, id_field = paginator.ordering
+        queryset = paginator.queryset
+        backwards = self.direction == 'p'
+
+        if self.values is not None:
+            name, pk = self.values
+            if backwards:
+                keyset = Q(**{f'{name_field}__lt': name}) | Q(**{name_field: name, f'{id_field}__lt': pk})
+            else:
+                keyset = Q(**{f'{name_field}__gt': name}) | Q(**{name_field: name, f'{id_field}__gt': pk})
+            queryset = queryset.filter(keyset)
+
+        if backwards:
+            queryset = queryset.order_by(f'-{name_field}', f'-{id_field}')
+        else:
+            queryset = queryset.order_by(name_field, id_field)
+
+        # Uma linha extra indica se existe mais uma página nessa direção
+        rows = list(queryset[:paginator.per_page + 1])
+        more = len(rows) > paginator.per_page
+        rows = rows[:paginator.per_page]
+        if backwards:
+            rows.reverse()
+        return rows, more
+
+    @property
+    def object_list(self):
+        return self._rows[0]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._rows[1] if self.direction != 'p' else True
+
+    def has_previous(self):
+        if self.direction == 'p':
+            return self._rows[1]
+        return self.values is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def _key(self, obj):
+        name_field, id_field = self.paginator.ordering
+        return getattr(obj, name_field), getattr(obj, id_field)
+
+    @property
+    def next_cursor(self):
+        if not self.object_list or not self.has_next():
+            return ''
+        return encode_cursor('n', self._key(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if not self.object_list or not self.has_previous():
+            return ''
+        return encode_cursor('p', self._key(self.object_list[0]))
+
+
+class KeysetPaginator:
+    """Paginação por cursor ordenada por (nome, id), sem OFFSET nem COUNT(*).
+
+    O custo de qualquer página é o mesmo da primeira: uma consulta indexada
+    que lê `per_page + 1` linhas a partir do cursor.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('name', 'id')):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+
+    def page(self, cursor=None):
+        if not cursor:
+            return KeysetPage(self)
+        direction, values = decode_cursor(cursor)
+        if len(values) != 2:
+            raise InvalidCursor(cursor)
+        return KeysetPage(self, direction, values)
+
+
+def estimate_row_count(model, using):
+    """Estimativa barata do total de linhas de uma tabela."""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+        return None
+    # Tabelas só de inserção (downloads, tarefas): o maior id é uma boa estimativa
+    return model._default_manager.using(using).aggregate(total=Max('pk'))['total'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator do admin que dispensa o COUNT(*) exato em tabelas grandes.
+
+    Sem filtros aplicados, usa a estimativa do banco quando ela passa de
+    `threshold`; com filtros ou em tabelas pequenas, conta normalmente.
+    """
+    threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.threshold:
+                return estimate
+        return super().count
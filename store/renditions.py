@@ -0,0 +1,131 @@
+import io
+import hashlib
+import logging
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS_DIR = 'renditions'
+
+# Lado máximo (px) de cada variante. Imagens menores não são ampliadas.
+ICON_SIZES = (64, 150, 300)
+SCREENSHOT_SIZES = (320, 800)
+
+# Campo da imagem, campo das variantes e tamanhos, por modelo
+RENDITION_FIELDS = {
+    'store.software': ('icon', 'icon_renditions', ICON_SIZES),
+    'store.softwarescreenshot': ('image', 'image_renditions', SCREENSHOT_SIZES),
+}
+
+# WebP para navegadores que o suportam; PNG como alternativa
+FORMATS = (
+    ('webp', 'WEBP', {'quality': 85, 'method': 4}),
+    ('png', 'PNG', {'optimize': True}),
+)
+
+
+def _save_variant(data, extension):
+    # Nome derivado do conteúdo: o arquivo nunca muda, podendo ser cacheado para sempre
+    digest = hashlib.sha256(data).hexdigest()
+    name = f'{RENDITIONS_DIR}/{digest[:2]}/{digest[:32]}.{extension}'
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(data))
+    return name
+
+
+def generate_renditions(field, sizes):
+    """Gera as variantes redimensionadas de um ImageField.
+
+    Retorna `{"<lado>": {"width", "height", "webp", "png"}}` com os nomes dos
+    arquivos no storage, ou `{}` se a imagem não puder ser lida.
+    """
+    from PIL import Image, ImageOps
+
+    if not field:
+        return {}
+    try:
+        with field.open('rb') as f:
+            image = Image.open(f)
+            image.load()
+    except Exception:
+        logger.warning('Não foi possível ler a imagem %s', field.name, exc_info=True)
+        return {}
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+
+    renditions = {}
+    for size in sizes:
+        variant = image.copy()
+        variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+        entry = {'width': variant.width, 'height': variant.height}
+        for extension, pil_format, options in FORMATS:
+            buffer = io.BytesIO()
+            variant.save(buffer, pil_format, **options)
+            entry[extension] = _save_variant(buffer.getvalue(), extension)
+        renditions[str(size)] = entry
+    return renditions
+
+
+def schedule_renditions(model, pk):
+    """Coloca a geração das variantes na fila de jobs (comando run_jobs).
+
+    Decodificar e recodificar a imagem em vários tamanhos não roda na
+    requisição do upload; até o job terminar, as páginas usam o original.
+    """
+    from .jobs import enqueue
+    enqueue('generate_renditions', payload={'model': model._meta.label_lower, 'pk': pk})
+
+
+def update_renditions(label, pk):
+    """Gera e grava as variantes da imagem atual do objeto; retorna o mapa gravado.
+
+    Se a imagem mudou enquanto as variantes eram geradas, nada é gravado (o
+    job da imagem nova cuida dela) e o retorno é None.
+    """
+    from django.apps import apps
+    from .catalog_cache import bump_catalog_version
+
+    model = apps.get_model(label)
+    field, renditions_field, sizes = RENDITION_FIELDS[label]
+    obj = model.objects.filter(pk=pk).only('pk', field).first()
+    if obj is None or not getattr(obj, field):
+        return None
+    image = getattr(obj, field)
+    renditions = generate_renditions(image, sizes)
+    updated = model.objects.filter(pk=pk, **{field: image.name}).update(**{renditions_field: renditions})
+    if not updated:
+        return None
+    if label == 'store.software':
+        # update() não dispara os sinais: o catálogo em cache ainda usa o original
+        bump_catalog_version()
+    return renditions
+
+
+def pick_rendition(renditions, size):
+    """Menor variante com lado >= `size` (ou a maior disponível)."""
+    if not renditions:
+        return None
+    available = sorted(renditions.items(), key=lambda item: int(item[0]))
+    for key, entry in available:
+        if int(key) >= size:
+            return entry
+    return available[-1][1]
+
+
+def referenced_names():
+    """Nomes de todas as variantes referenciadas por ícones e screenshots."""
+    from .models import Software, SoftwareScreenshot
+    names = set()
+    sources = (
+        Software.objects.values_list('icon_renditions', flat=True),
+        SoftwareScreenshot.objects.values_list('image_renditions', flat=True),
+    )
+    for values in sources:
+        for renditions in values.iterator():
+            for entry in (renditions or {}).values():
+                names.update(entry[extension] for extension, _, _ in FORMATS if extension in entry)
+    return names
@@ -0,0 +1,209 @@
+import re
+import logging
+import unicodedata
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.backends.ddl_references import Statement
+from django.db.models import Case, When, IntegerField
+
+logger = logging.getLogger(__name__)
+
+# Índice FTS5 (SQLite): rowid = Software.id, colunas name e document
+FTS_TABLE = 'store_software_fts'
+# Índice GIN (PostgreSQL) sobre a mesma expressão gerada por SearchVector
+# (SearchDocumentIndex em Software.Meta.indexes)
+PG_INDEX = 'store_software_search_gin'
+PG_CONFIG = 'simple'
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+_fts5_available = {}
+
+
+class SearchDocumentIndex(GinIndex):
+    """GinIndex que só existe no PostgreSQL.
+
+    Nos outros bancos a busca usa FTS5 ou `contains`, e o SQL do GIN não é
+    válido: criar e remover o índice viram um comando sem efeito, inclusive
+    quando o SQLite recria a tabela numa migração.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return Statement('SELECT 1')
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+    def remove_sql(self, model, schema_editor, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return Statement('SELECT 1')
+        return super().remove_sql(model, schema_editor, **kwargs)
+
+
+def normalize_text(text):
+    """Remove acentos e normaliza para minúsculas ("Segurança" -> "seguranca")."""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def search_terms(query):
+    return _TERM_RE.findall(normalize_text(query))
+
+
+# Campos de Software que compõem o documento de busca
+SEARCH_DOCUMENT_FIELDS = {'name', 'version', 'description', 'category'}
+
+
+def build_search_document(software):
+    """Texto indexado de um software: nome, versão, descrição e categoria."""
+    parts = [
+        software.name,
+        software.version,
+        software.description,
+        str(software.get_category_display()),
+    ]
+    return normalize_text(' '.join(p for p in parts if p))
+
+
+def _vendor(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor
+
+
+def has_fts5(using=DEFAULT_DB_ALIAS):
+    """Indica se o SQLite em uso foi compilado com FTS5."""
+    if using not in _fts5_available:
+        try:
+            with connections[using].cursor() as cursor:
+                cursor.execute('CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_probe USING fts5(x)')
+                cursor.execute('DROP TABLE temp.fts5_probe')
+            _fts5_available[using] = True
+        except Exception:
+            _fts5_available[using] = False
+    return _fts5_available[using]
+
+
+def _use_fts5(using=DEFAULT_DB_ALIAS):
+    return _vendor(using) == 'sqlite' and has_fts5(using)
+
+
+def ensure_search_index(using=DEFAULT_DB_ALIAS, rebuild=False):
+    """Cria o índice de busca do banco atual, se necessário.
+
+    No SQLite cria a tabela virtual FTS5 (o índice GIN do PostgreSQL vem das
+    migrações). Com `rebuild`, (re)popula o índice a partir da tabela de
+    softwares.
+    """
+    from .models import Software
+
+    # Softwares gravados antes da coluna existir ficam com documento vazio
+    pending = list(Software.objects.using(using).filter(search_document=''))
+    for software in pending:
+        software.search_document = build_search_document(software)
+    if pending:
+        Software.objects.using(using).bulk_update(pending, ['search_document'], batch_size=500)
+
+    if not _use_fts5(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "name, document, tokenize='unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+        if rebuild or pending or not cursor.fetchone()[0]:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, document) '
+                f'SELECT id, name, search_document FROM {Software._meta.db_table}'
+            )
+
+
+def index_software(software, using=DEFAULT_DB_ALIAS):
+    """Atualiza incrementalmente o índice de um software (apenas FTS5)."""
+    if not _use_fts5(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [software.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, document) VALUES (%s, %s, %s)',
+            [software.pk, software.name, software.search_document]
+        )
+
+
+def index_softwares(rows, using=DEFAULT_DB_ALIAS):
+    """Versão em lote de `index_software` para linhas (id, name, search_document)."""
+    rows = list(rows)
+    if not rows or not _use_fts5(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, name, document) VALUES (%s, %s, %s)', rows)
+
+
+def unindex_software(pk, using=DEFAULT_DB_ALIAS):
+    if not _use_fts5(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+
+def _order_by_ids(queryset, ids):
+    ranking = Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+        output_field=IntegerField()
+    )
+    return queryset.filter(pk__in=ids).annotate(search_rank=ranking).order_by('search_rank', 'name')
+
+
+def search_software(queryset, query):
+    """Filtra e ordena `queryset` por relevância para a busca `query`.
+
+    Usa FTS5 no SQLite e tsvector/GIN no PostgreSQL, com prefixo (termos
+    parciais) e sem diferenciar acentos. Outros bancos caem em `contains`
+    sobre o documento normalizado.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+
+    using = queryset.db
+    limit = getattr(settings, 'SEARCH_MAX_RESULTS', 500)
+    vendor = _vendor(using)
+
+    if vendor == 'sqlite' and has_fts5(using):
+        # Cada termo entre aspas (sem sintaxe FTS do usuário) e com prefixo
+        match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        # Os filtros do queryset (ativo, categoria...) entram na mesma consulta,
+        # antes do LIMIT: termos populares não esgotam o limite com linhas que
+        # seriam descartadas depois
+        filtered_sql, filtered_params = queryset.order_by().values('pk').query.sql_with_params()
+        try:
+            with connections[using].cursor() as cursor:
+                # Peso maior para o nome do que para o restante do documento
+                cursor.execute(
+                    f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                    f'AND rowid IN ({filtered_sql}) '
+                    f'ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s',
+                    [match, *filtered_params, limit]
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+            return _order_by_ids(queryset, ids)
+        except Exception:
+            logger.warning('Busca FTS5 indisponível, usando busca simples.', exc_info=True)
+
+    elif vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+        vector = SearchVector('search_document', config=PG_CONFIG)
+        tsquery = SearchQuery(' & '.join(f'{term}:*' for term in terms), config=PG_CONFIG, search_type='raw')
+        return (
+            queryset.annotate(search_vector=vector)
+            .filter(search_vector=tsquery)
+            .annotate(search_rank=SearchRank(vector, tsquery))
+            .order_by('-search_rank', 'name')[:limit]
+        )
+
+    for term in terms:
+        queryset = queryset.filter(search_document__contains=term)
+    return queryset
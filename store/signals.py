@@ -1,12 +1,18 @@
-import os
 import logging
-from django.db.models.signals import pre_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.contrib.auth.signals import user_logged_in
-from django.contrib import messages
 from django.dispatch import receiver
-from django.conf import settings
-from .models import Software
-from .kace import get_latest_hostname_for_user
+from django.db import transaction
+from .models import Software, SoftwareScreenshot, InstallerBlob
+from .models_task import InstallationTask
+from .kace import resolve_hostname_async
+from .agent_sync import bump_host_version
+from .catalog_cache import bump_catalog_version
+from .deltas import schedule_delta
+from .file_cleanup import schedule_file_removal
+from .renditions import schedule_renditions
+from .search import ensure_search_index, index_software, unindex_software
+from .typeahead import patch_index
 
 logger = logging.getLogger(__name__)
 
@@ -21,49 +27,148 @@ def update_software_slug(sender, instance, **kwargs):
 
 @receiver(post_delete, sender=Software)
 def delete_software_files(sender, instance, **kwargs):
-    """Remove os arquivos associados a um software quando ele é excluído."""
+    """Agenda a remoção dos arquivos de um software excluído (job `remove_files`).
+
+    O instalador pode ser compartilhado: só sai do disco sem referências.
+    """
+    schedule_file_removal(
+        icons=[instance.icon.name] if instance.icon else [],
+        installers=[instance.installer.name] if instance.installer else []
+    )
+
+
+@receiver(pre_save, sender=Software)
+def remember_files(sender, instance, update_fields=None, **kwargs):
+    """Guarda o instalador e o ícone atuais para comparar após salvar."""
+    fields = [f for f in ('installer', 'icon') if not update_fields or f in update_fields]
+    previous = {field: '' for field in fields}
+    if fields and instance.pk:
+        row = sender.objects.filter(pk=instance.pk).values(*fields).first()
+        if row:
+            previous = {field: row[field] or '' for field in fields}
+    instance._previous_files = previous
+
+
+@receiver(post_save, sender=Software)
+def update_installer_references(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_files', {}).get('installer')
+    if previous is None:
+        return
+    current = instance.installer.name or ''
+    if current != previous:
+        if current:
+            InstallerBlob.retain(current)
+            # Nova versão: patch a partir do instalador anterior, após o commit
+            transaction.on_commit(lambda: schedule_delta(instance.pk))
+        if previous:
+            InstallerBlob.release(previous)
+
+
+@receiver(post_save, sender=Software)
+def update_icon_renditions(sender, instance, **kwargs):
+    """Agenda as variantes do ícone quando ele muda (job `generate_renditions`).
+
+    As variantes do ícone anterior são descartadas já (antes de invalidar o
+    catálogo): até o job terminar, as páginas usam o ícone original.
+    """
+    previous = getattr(instance, '_previous_files', {}).get('icon')
+    if previous is None:
+        return
+    current = instance.icon.name if instance.icon else ''
+    if current != previous and instance.icon_renditions:
+        instance.icon_renditions = {}
+        sender.objects.filter(pk=instance.pk).update(icon_renditions={})
+    if current and (current != previous or not instance.icon_renditions):
+        pk = instance.pk
+        transaction.on_commit(lambda: schedule_renditions(sender, pk))
+
+
+@receiver(pre_save, sender=SoftwareScreenshot)
+def remember_screenshot_image(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'image' not in update_fields:
+        instance._previous_image = None
+        return
+    previous = ''
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values_list('image', flat=True).first() or ''
+    instance._previous_image = previous
+
+
+@receiver(post_save, sender=SoftwareScreenshot)
+def update_screenshot_renditions(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_image', None)
+    if previous is None:
+        return
+    if instance.image.name != previous and instance.image_renditions:
+        instance.image_renditions = {}
+        sender.objects.filter(pk=instance.pk).update(image_renditions={})
+    if instance.image.name != previous or not instance.image_renditions:
+        pk = instance.pk
+        transaction.on_commit(lambda: schedule_renditions(sender, pk))
+
+
+@receiver(post_save, sender=Software)
+@receiver(post_delete, sender=Software)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    """Invalida os valores em cache derivados do catálogo."""
+    update_fields = kwargs.get('update_fields')
+    # O contador de downloads não altera nada exibido a partir do cache
+    if update_fields and set(update_fields) <= {'download_count'}:
+        return
+    version = bump_catalog_version()
+    # O índice de autocompletar deste processo é corrigido no lugar
+    patch_index(instance, version, deleted=kwargs['signal'] is post_delete)
+
+
+@receiver(post_save, sender=Software)
+def update_search_index(sender, instance, update_fields=None, using=None, **kwargs):
+    """Mantém o índice de busca atualizado a cada gravação do software."""
+    if update_fields and 'search_document' not in update_fields:
+        return
+    index_software(instance, using=using)
+
+
+@receiver(post_delete, sender=Software)
+def remove_from_search_index(sender, instance, using=None, **kwargs):
+    unindex_software(instance.pk, using=using)
+
+
+def create_cache_table(sender, using, **kwargs):
+    """Cria a tabela do cache no banco, se for o backend configurado (ligado em StoreConfig.ready)."""
+    from django.core.management import call_command
+    try:
+        call_command('createcachetable', database=using, verbosity=0)
+    except Exception:
+        logger.exception('Falha ao criar a tabela de cache.')
+
+
+def create_search_index(sender, using, **kwargs):
+    """Cria/popula o índice de busca após as migrações (ligado em StoreConfig.ready)."""
     try:
-        # Remove o ícone se existir
-        if instance.icon:
-            icon_path = os.path.join(settings.MEDIA_ROOT, str(instance.icon))
-            if os.path.isfile(icon_path):
-                os.remove(icon_path)
-                logger.info(f"Ícone removido: {icon_path}")
-        
-        # Remove o instalador se existir
-        if instance.installer:
-            installer_path = os.path.join(settings.MEDIA_ROOT, str(instance.installer))
-            if os.path.isfile(installer_path):
-                os.remove(installer_path)
-                logger.info(f"Arquivo instalador removido: {installer_path}")
-    
-    except Exception as e:
-        logger.error(f"Erro ao remover arquivos do software {instance.name}: {str(e)}", exc_info=True)
+        ensure_search_index(using)
+    except Exception:
+        logger.exception('Falha ao criar o índice de busca de softwares.')
+
+
+@receiver(post_save, sender=InstallationTask)
+@receiver(post_delete, sender=InstallationTask)
+def bump_task_version(sender, instance, **kwargs):
+    """Sinaliza aos agentes em long-poll que as tarefas do host mudaram."""
+    bump_host_version(instance.hostname)
 
 
 @receiver(user_logged_in)
 def resolve_hostname_on_login(sender, user, request, **kwargs):
-    """Ao efetuar login, resolve o hostname via KACE e guarda na sessão.
-    Se não encontrar ou ocorrer erro, informa o usuário e impede instalações.
+    """Ao efetuar login, dispara a resolução do hostname via KACE em segundo plano.
+    O login não espera o KACE: o resultado fica no cache e as páginas o leem
+    quando estiver pronto; só a instalação aguarda, por tempo limitado.
     """
+    request.session.pop('resolved_hostname', None)
     try:
         username = (getattr(user, 'email', '') or getattr(user, 'username', '')).split('@')[0]
-        hostname = get_latest_hostname_for_user(username)
-        request.session['resolved_hostname'] = hostname
-        if not hostname:
-            messages.error(
-                request,
-                'Não foi possivel encontrar sua maquina, por motivo de segurança, não é possivel executar nenhuma instalação.',
-                extra_tags='alert-danger'
-            )
+        resolve_hostname_async(username)
     except Exception:
-        logger.exception('Falha ao consultar KACE na autenticação do usuário.')
-        request.session['resolved_hostname'] = None
-        messages.error(
-            request,
-            'Não foi possivel encontrar sua maquina, por motivo de segurança, não é possivel executar nenhuma instalação.',
-            extra_tags='alert-danger'
-        )
+        logger.exception('Falha ao agendar consulta ao KACE na autenticação do usuário.')
 
 def ready():
     """Importa os sinais quando o aplicativo estiver pronto."""
@@ -0,0 +1,115 @@
+import os
+import re
+import uuid
+import hashlib
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.utils.deconstruct import deconstructible
+
+CAS_PREFIX = 'cas'
+_CAS_NAME_RE = re.compile(r'^%s/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})/[^/]+$' % CAS_PREFIX)
+
+
+def sha256_from_name(name):
+    """Extrai o SHA-256 de um nome gerado pelo armazenamento endereçado por conteúdo."""
+    match = _CAS_NAME_RE.match(name or '')
+    return match.group('sha256') if match else ''
+
+
+def hash_file(content):
+    """Calcula o SHA-256 de um arquivo lendo-o em blocos."""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Armazena cada arquivo sob o seu SHA-256: `cas/ab/<sha256>/<nome>`.
+
+    Um conteúdo já armazenado não é gravado de novo: o nome existente é
+    reaproveitado, independentemente do nome do arquivo enviado. O hash vem do
+    upload (calculado em fluxo pelos upload handlers abaixo) ou é calculado
+    aqui, em blocos.
+    """
+
+    def _save(self, name, content):
+        sha256 = getattr(content, 'sha256', None) or hash_file(content)
+        directory = f'{CAS_PREFIX}/{sha256[:2]}/{sha256}'
+        existing = self.existing_name(directory)
+        if existing:
+            return existing
+        target = f'{directory}/{os.path.basename(name)}'
+        # Grava num nome temporário e publica com link(), que falha se o destino
+        # já existe: o arquivo final só aparece completo e, se outro processo
+        # gravar o mesmo conteúdo ao mesmo tempo, o dele é reaproveitado (o
+        # conteúdo é idêntico por construção).
+        temp = super()._save(f'{directory}/.{uuid.uuid4().hex}.part', content)
+        try:
+            os.link(self.path(temp), self.path(target))
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(self.path(temp))
+        return self.existing_name(directory) or target
+
+    def existing_name(self, directory):
+        try:
+            _, files = self.listdir(directory)
+        except FileNotFoundError:
+            return None
+        # Arquivos ocultos são gravações em andamento
+        files = sorted(f for f in files if not f.startswith('.'))
+        return f'{directory}/{files[0]}' if files else None
+
+    def get_available_name(self, name, max_length=None):
+        # O destino final só é conhecido em _save, a partir do conteúdo
+        return name
+
+    def delete(self, name):
+        super().delete(name)
+        # Remove o diretório do hash, se ficou vazio
+        directory = os.path.dirname(self.path(name))
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+
+
+installer_storage = ContentAddressedStorage()
+
+
+def get_installer_storage():
+    return installer_storage
+
+
+class HashingUploadMixin:
+    """Calcula o SHA-256 do arquivo enquanto o upload é recebido."""
+
+    def new_file(self, *args, **kwargs):
+        self._sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self._sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None:
+            uploaded.sha256 = self._sha256.hexdigest()
+        return uploaded
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
@@ -0,0 +1,11 @@
+from django import template
+
+from ..analytics import dashboard_summary
+
+register = template.Library()
+
+
+@register.simple_tag
+def analytics_summary(days=14, hours=48, top=5):
+    """Resumo de downloads e instalações lido das tabelas agregadas."""
+    return dashboard_summary(days=days, hours=hours, top=top)
@@ -0,0 +1,41 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from ..renditions import pick_rendition
+
+register = template.Library()
+
+
+@register.simple_tag
+def picture(image, renditions, size, alt='', css_class='', style='', lazy=True):
+    """Renderiza uma imagem usando as variantes redimensionadas (WebP + PNG).
+
+    `size` é o lado, em px, com que a imagem é exibida; a variante de 2x é
+    oferecida para telas de alta densidade. Sem variantes, usa o original.
+    """
+    if not image:
+        return ''
+    loading = 'lazy' if lazy else 'eager'
+    base = pick_rendition(renditions, size)
+    if base is None:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" style="{}" loading="{}" decoding="async">',
+            image.url, alt, css_class, style, loading
+        )
+
+    double = pick_rendition(renditions, size * 2)
+
+    def srcset(extension):
+        urls = [f'{default_storage.url(base[extension])} 1x']
+        if double is not base:
+            urls.append(f'{default_storage.url(double[extension])} 2x')
+        return ', '.join(urls)
+
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}">'
+        '<img src="{}" srcset="{}" width="{}" height="{}" alt="{}" class="{}" style="{}" '
+        'loading="{}" decoding="async"></picture>',
+        srcset('webp'), default_storage.url(base['png']), srcset('png'),
+        base['width'], base['height'], alt, css_class, style, loading
+    )
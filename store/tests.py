@@ -1,3 +1,667 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import signal
+import sqlite3
+import tempfile
+import time
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from ldap3 import Connection, MOCK_SYNC
+from PIL import Image
+
+from . import analytics, auth_ldap_backend, counters, kace, typeahead
+from .admin_views import task_log_view
+from .auth_ldap_backend import LDAPBackend
+from .catalog_cache import bump_catalog_version, get_catalog_version
+from .importer import BatchImporter, DirectoryImporter
+from .jobs import enqueue, enqueue_periodic, run_job
+from .kace import KaceClient
+from .models import InstallerBlob, Software, TaskOutcomeRollup
+from .models_job import BackgroundJob
+from .models_kace import KaceMachine
+from .models_task import InstallationLogChunk, InstallationTask
+from .storage import installer_storage
+from .views import SoftwareListView
+
+User = get_user_model()
+
+
+class KaceClientTests(TestCase):
+    """Cliente do KACE sobre um banco sqlite3 local (connection_factory/placeholder)."""
+
+    def setUp(self):
+        cache.clear()
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'kace.sqlite3')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('CREATE TABLE MACHINE (NAME TEXT, USER_LOGGED TEXT, LAST_INVENTORY TEXT)')
+            conn.executemany('INSERT INTO MACHINE VALUES (?, ?, ?)', [
+                ('PC-ANTIGO', 'CORP\\maria', '2024-01-01 08:00:00'),
+                ('PC-NOVO', 'CORP\\maria', '2024-06-01 08:00:00'),
+                ('PC-JOAO', 'CORP\\joao', '2024-03-01 08:00:00'),
+            ])
+        self.connections = 0
+        self.client = KaceClient(connection_factory=self.connect, placeholder='?', pool_size=2)
+        kace.set_client(self.client)
+
+    def tearDown(self):
+        kace.set_client(None)
+        cache.clear()
+        shutil.rmtree(self.tmpdir)
+
+    def connect(self):
+        self.connections += 1
+        return sqlite3.connect(self.db_path)
+
+    def broken(self):
+        raise sqlite3.OperationalError('KACE indisponível')
+
+    def test_lookup_returns_most_recent_machine(self):
+        self.assertEqual(self.client.lookup_hostname('maria'), 'PC-NOVO')
+        self.assertIsNone(self.client.lookup_hostname('ninguem'))
+
+    def test_pool_reuses_connection(self):
+        self.client.lookup_hostname('maria')
+        self.client.lookup_hostname('joao')
+        self.assertEqual(self.connections, 1)
+
+    def test_iter_machines_since(self):
+        machines = list(self.client.iter_machines(since='2024-02-01 00:00:00'))
+        self.assertEqual([name for name, _, _ in machines], ['PC-JOAO', 'PC-NOVO'])
+
+    def test_hostname_cached_after_first_lookup(self):
+        self.assertEqual(kace.get_latest_hostname_for_user('CORP\\Maria'), 'PC-NOVO')
+        kace.set_client(KaceClient(connection_factory=self.broken, placeholder='?'))
+        self.assertEqual(kace.get_latest_hostname_for_user('maria@corp.local'), 'PC-NOVO')
+        self.assertEqual(kace.peek_hostname('maria'), (True, 'PC-NOVO'))
+
+    def test_unknown_user_cached_as_not_found(self):
+        self.assertIsNone(kace.get_latest_hostname_for_user('ninguem'))
+        self.assertEqual(cache.get(kace.HOSTNAME_CACHE_KEY.format(username='ninguem')), kace.NOT_FOUND)
+        self.assertEqual(kace.peek_hostname('ninguem'), (True, None))
+
+    def test_kace_failure_does_not_raise(self):
+        kace.set_client(KaceClient(connection_factory=self.broken, placeholder='?'))
+        with self.assertLogs('store.kace', 'WARNING'):
+            self.assertIsNone(kace.get_latest_hostname_for_user('maria'))
+
+    def test_local_table_preferred_over_kace(self):
+        KaceMachine.objects.create(name='PC-LOCAL', username='maria', last_inventory=timezone.now())
+        self.assertEqual(kace.get_latest_hostname_for_user('maria'), 'PC-LOCAL')
+        self.assertEqual(self.connections, 0)
+
+
+class MockLDAPBackend(LDAPBackend):
+    client_strategy = MOCK_SYNC
+
+
+@override_settings(
+    LDAP_SERVER_URI='ldap://ldap.teste',
+    LDAP_DOMAIN='corp.local',
+    LDAP_SEARCH_BASE='dc=corp,dc=local'
+)
+class LDAPBackendTests(TestCase):
+    """Autenticação contra um diretório em memória (ldap3 MOCK_SYNC)."""
+
+    def setUp(self):
+        cache.clear()
+        self.backend = MockLDAPBackend()
+        self.server = self.backend.get_server('ldap://ldap.teste')
+        self.add_user('maria', 'senha', groups=['CN=Softplan Users,OU=Grupos,DC=corp,DC=local'])
+        self.add_user('joao', 'senha', groups=['CN=Outros,OU=Grupos,DC=corp,DC=local'])
+
+    def tearDown(self):
+        self.backend.discard_connection()
+        auth_ldap_backend._servers.clear()
+        cache.clear()
+
+    def add_user(self, username, password, groups):
+        dn = f'cn={username},ou=usuarios,dc=corp,dc=local'
+        Connection(self.server, client_strategy=MOCK_SYNC).strategy.add_entry(dn, {
+            'objectClass': 'person',
+            'sAMAccountName': username,
+            'userPassword': password,
+            'givenName': username.title(),
+            'sn': 'Silva',
+            'mail': f'{username}@corp.local',
+            'memberOf': groups,
+        })
+        # O backend autentica pelo UPN, que o mock só aceita como DN
+        self.server.dit[f'{username}@corp.local'] = self.server.dit[dn]
+
+    def test_authenticate_creates_user_without_password(self):
+        user = self.backend.authenticate(None, username='maria', password='senha')
+        self.assertEqual(user.username, 'maria')
+        self.assertEqual((user.first_name, user.last_name, user.email), ('Maria', 'Silva', 'maria@corp.local'))
+        self.assertFalse(user.has_usable_password())
+
+    def test_wrong_password(self):
+        self.assertIsNone(self.backend.authenticate(None, username='maria', password='errada'))
+        self.assertFalse(User.objects.filter(username='maria').exists())
+
+    def test_user_outside_allowed_group(self):
+        self.assertIsNone(self.backend.authenticate(None, username='joao', password='senha'))
+
+    def test_connection_reused_between_logins(self):
+        self.backend.authenticate(None, username='maria', password='senha')
+        conn = auth_ldap_backend._local.connection
+        self.backend.authenticate(None, username='maria@corp.local', password='senha')
+        self.assertIs(auth_ldap_backend._local.connection, conn)
+
+    def test_rejected_bind_discards_connection(self):
+        self.backend.authenticate(None, username='maria', password='senha')
+        self.backend.authenticate(None, username='maria', password='errada')
+        self.assertIsNone(auth_ldap_backend._local.connection)
+
+    def test_sync_user_updates_changed_fields(self):
+        User.objects.create_user('maria', email='antigo@corp.local', password='local')
+        user = self.backend.authenticate(None, username='maria', password='senha')
+        self.assertEqual(user.email, 'maria@corp.local')
+        self.assertFalse(user.has_usable_password())
+
+
+class InstallationTaskLeaseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.software = Software.objects.create(name='Editor', version='1.0')
+        self.tasks = [
+            InstallationTask.objects.create(software=self.software, hostname='PC-01')
+            for _ in range(3)
+        ]
+
+    def claim(self, hostname='PC-01', limit=10):
+        return self.client.post(
+            reverse('store:agent_task_claim'),
+            json.dumps({'hostname': hostname, 'limit': limit}),
+            content_type='application/json'
+        )
+
+    def update(self, task, **data):
+        return self.client.patch(
+            reverse('store:agent_task_status', args=[task.pk]),
+            json.dumps(data),
+            content_type='application/json'
+        )
+
+    def test_claim_for_host_delivers_each_task_once(self):
+        first = InstallationTask.claim_for_host('PC-01', limit=2, lease_seconds=60)
+        second = InstallationTask.claim_for_host('PC-01', limit=2, lease_seconds=60)
+        self.assertEqual([task.pk for task in first], [task.pk for task in self.tasks[:2]])
+        self.assertEqual([task.pk for task in second], [self.tasks[2].pk])
+        self.assertNotEqual(first[0].claim_token, second[0].claim_token)
+        self.assertEqual(InstallationTask.claim_for_host('PC-01', limit=2, lease_seconds=60), [])
+        self.assertEqual(InstallationTask.claim_for_host('PC-02', limit=2, lease_seconds=60), [])
+
+    def test_expired_lease_returns_to_queue(self):
+        claimed = InstallationTask.claim_for_host('PC-01', limit=1, lease_seconds=60)
+        InstallationTask.objects.filter(pk=claimed[0].pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(InstallationTask.release_expired_leases(), 1)
+        task = InstallationTask.objects.get(pk=claimed[0].pk)
+        self.assertEqual((task.status, task.claim_token, task.lease_expires_at), ('pending', '', None))
+
+    def test_update_requires_current_claim_token(self):
+        response = self.claim(limit=1)
+        token = response.json()['tasks'][0]['claim_token']
+        task = self.tasks[0]
+        self.assertEqual(self.update(task, status='in_progress').status_code, 409)
+        self.assertEqual(self.update(task, status='in_progress', claim_token='outro').status_code, 409)
+        self.assertEqual(self.update(task, status='in_progress', claim_token=token).status_code, 200)
+
+        # Lease expirado e tarefa reivindicada de novo: o token antigo não vale mais
+        InstallationTask.objects.filter(pk=task.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        InstallationTask.release_expired_leases()
+        self.claim(limit=1)
+        self.assertEqual(self.update(task, status='completed', claim_token=token).status_code, 409)
+
+    def test_unclaimed_task_accepts_update_without_token(self):
+        self.assertEqual(self.update(self.tasks[0], status='completed').status_code, 200)
+        self.assertIsNotNone(InstallationTask.objects.get(pk=self.tasks[0].pk).finished_at)
+
+    @override_settings(TASK_LEASE_MAX_SECONDS=600)
+    def test_lease_seconds_validated_and_capped(self):
+        url = reverse('store:agent_task_claim')
+        for lease in (0, -30):
+            response = self.client.post(
+                url, json.dumps({'hostname': 'PC-01', 'lease_seconds': lease}), content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400)
+        before = timezone.now()
+        response = self.client.post(
+            url, json.dumps({'hostname': 'PC-01', 'lease_seconds': 10 ** 9}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        task = InstallationTask.objects.get(status='in_progress')
+        self.assertLessEqual(task.lease_expires_at, before + timedelta(seconds=601))
+
+    def test_non_object_body_is_bad_request(self):
+        response = self.client.patch(
+            reverse('store:agent_task_status', args=[self.tasks[0].pk]), '[]', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskLogViewTests(TestCase):
+    def setUp(self):
+        software = Software.objects.create(name='Editor', version='1.0')
+        self.task = InstallationTask.objects.create(software=software, hostname='PC-01')
+        InstallationLogChunk.objects.bulk_create(
+            InstallationLogChunk(task=self.task, sequence=n, content=f'linha {n}') for n in range(1, 4)
+        )
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'senha')
+
+    def get(self, **params):
+        # Sem login: o sinal de login dispararia a consulta ao KACE em outra thread
+        request = RequestFactory().get('/', params)
+        request.user = self.admin
+        return task_log_view(request, self.task.pk)
+
+    def test_negative_tail_and_limit_clamped(self):
+        response = self.get(tail=-5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['sequence'] for c in json.loads(response.content)['chunks']], [3])
+        response = self.get(limit=-1)
+        self.assertEqual([c['sequence'] for c in json.loads(response.content)['chunks']], [1])
+
+
+class AgentTaskPollingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.software = Software.objects.create(name='Editor', version='1.0')
+
+    def poll(self, hostname, **headers):
+        return self.client.get(reverse('store:agent_tasks'), {'hostname': hostname, 'wait': 5}, **headers)
+
+    def test_database_cache_answers_without_waiting(self):
+        first = self.poll('PC-01')
+        started = time.monotonic()
+        response = self.poll('PC-01', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_version_follows_task_hostname_exactly(self):
+        etag = self.poll('PC-01')['ETag']
+        other_case = self.poll('pc-01')['ETag']
+        InstallationTask.objects.create(software=self.software, hostname='PC-01')
+        response = self.poll('PC-01', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(response.json()['tasks']), 1)
+        # "pc-01" não tem tarefas: a versão dele não muda
+        self.assertEqual(self.poll('pc-01', HTTP_IF_NONE_MATCH=other_case).status_code, 304)
+
+
+class TaskOutcomeRollupTests(TestCase):
+    def test_retried_task_counted_only_in_new_outcome(self):
+        software = Software.objects.create(name='Editor', version='1.0')
+        task = InstallationTask.objects.create(software=software, hostname='PC-01', status='error')
+        earlier = timezone.now() - timedelta(hours=3)
+        InstallationTask.objects.filter(pk=task.pk).update(finished_at=earlier)
+        analytics.roll_up('tasks', lag=timedelta(0))
+
+        task = InstallationTask.objects.get(pk=task.pk)
+        task.status = 'completed'
+        task.save()
+        analytics.roll_up('tasks', lag=timedelta(0))
+
+        totals = TaskOutcomeRollup.objects.filter(granularity='hour').aggregate(
+            completed=Sum('completed'), error=Sum('error')
+        )
+        self.assertEqual(totals, {'completed': 1, 'error': 0})
+
+
+class TypeaheadVersionCheckTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        typeahead._checked_at = typeahead._checked_version = None
+
+    @override_settings(TYPEAHEAD_VERSION_CHECK_INTERVAL=60)
+    def test_version_read_at_most_once_per_interval(self):
+        first = typeahead.current_version()
+        bump_catalog_version()
+        self.assertEqual(typeahead.current_version(), first)
+        typeahead._checked_at -= 60
+        self.assertEqual(typeahead.current_version(), first + 1)
+
+
+class CatalogGridCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Software.objects.create(name='Editor', version='1.0', description='Editor de texto')
+        self.user = User.objects.create_user('usuario', 'usuario@example.com', 'senha')
+
+    def get(self, **params):
+        request = RequestFactory().get('/', params)
+        request.user = self.user
+        # Hostname já resolvido: a página não consulta o KACE
+        request.session = {'resolved_hostname': 'PC-01'}
+        return SoftwareListView.as_view()(request).render()
+
+    def test_cached_grid_skips_search_and_pagination(self):
+        self.assertContains(self.get(search='editor'), 'Editor de texto')
+        # Fora do alcance dos sinais: a versão do catálogo não muda
+        Software.objects.update(is_active=False)
+        # Só as leituras do DatabaseCache: versão do catálogo e fragmento
+        with self.assertNumQueries(2):
+            response = self.get(search='editor')
+        self.assertContains(response, 'Editor de texto')
+        self.assertNotContains(self.get(search='outro'), 'Editor de texto')
+
+
+class DownloadCounterSignalTests(TransactionTestCase):
+    def setUp(self):
+        self.original = signal.getsignal(signal.SIGTERM)
+        self.addCleanup(signal.signal, signal.SIGTERM, self.original)
+
+    def test_sigterm_flushes_then_calls_previous_handler(self):
+        software = Software.objects.create(name='Editor', version='1.0')
+        received = []
+        signal.signal(signal.SIGTERM, lambda signum, frame: received.append(signum))
+        counters.install_signal_handlers()
+
+        counters.download_counter.increment(software.pk)
+        os.kill(os.getpid(), signal.SIGTERM)
+        self.assertEqual(received, [signal.SIGTERM])
+        software.refresh_from_db()
+        self.assertEqual(software.download_count, 1)
+
+
+class BackgroundJobQueueTests(TestCase):
+    def make_stale(self, job):
+        BackgroundJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=10))
+
+    def test_claim_next_takes_oldest_once(self):
+        first = enqueue('remove_files')
+        second = enqueue('remove_files')
+        claimed = BackgroundJob.claim_next(worker='a')
+        self.assertEqual((claimed.pk, claimed.status, claimed.attempts), (first.pk, 'running', 1))
+        self.assertEqual(BackgroundJob.claim_next(worker='b').pk, second.pk)
+        self.assertIsNone(BackgroundJob.claim_next(worker='c'))
+
+    def test_stale_job_requeued_and_old_worker_loses_it(self):
+        enqueue('remove_files')
+        old = BackgroundJob.claim_next(worker='a')
+        self.assertEqual(BackgroundJob.requeue_stale(timeout=60), 0)
+        self.make_stale(old)
+        self.assertEqual(BackgroundJob.requeue_stale(timeout=60), 1)
+
+        new = BackgroundJob.claim_next(worker='b')
+        self.assertEqual((new.pk, new.attempts), (old.pk, 2))
+        self.assertFalse(old.report(processed=1))
+        self.assertTrue(new.report(processed=1))
+
+    def test_job_failed_after_max_attempts(self):
+        job = enqueue('remove_files')
+        BackgroundJob.claim_next()
+        BackgroundJob.objects.filter(pk=job.pk).update(attempts=3)
+        self.make_stale(job)
+        BackgroundJob.requeue_stale(timeout=60, max_attempts=3)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNone(BackgroundJob.claim_next())
+
+    def test_periodic_job_enqueued_once_per_interval(self):
+        cache.clear()
+        schedule = {'sync_kace_machines': 600, 'remove_files': 0}
+        [job] = enqueue_periodic(schedule)
+        self.assertEqual(job.kind, 'sync_kace_machines')
+        self.assertEqual(enqueue_periodic(schedule), [])
+
+        # Terminado, só volta à fila depois do intervalo
+        BackgroundJob.objects.filter(pk=job.pk).update(status='completed')
+        cache.clear()
+        self.assertEqual(enqueue_periodic(schedule), [])
+        BackgroundJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - timedelta(minutes=11))
+        self.assertEqual(len(enqueue_periodic(schedule)), 1)
+
+
+class InstallerBlobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        cache.clear()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def create(self, name, filename, content=b'instalador'):
+        return Software.objects.create(name=name, version='1.0', installer=ContentFile(content, name=filename))
+
+    def delete_and_run_jobs(self, software):
+        with self.captureOnCommitCallbacks(execute=True):
+            software.delete()
+        while job := BackgroundJob.claim_next():
+            with self.captureOnCommitCallbacks(execute=True):
+                run_job(job)
+
+    def test_same_content_stored_once(self):
+        first = self.create('Editor', 'editor.exe')
+        copy = self.create('Editor (Cópia)', 'copia.exe')
+        self.assertEqual(first.installer.name, copy.installer.name)
+        self.assertEqual(InstallerBlob.objects.get().ref_count, 2)
+        self.assertEqual(first.installer_sha256, InstallerBlob.objects.get().sha256)
+
+    def test_file_removed_with_last_reference(self):
+        first = self.create('Editor', 'editor.exe')
+        copy = self.create('Editor (Cópia)', 'copia.exe')
+        name = first.installer.name
+
+        self.delete_and_run_jobs(first)
+        self.assertEqual(InstallerBlob.objects.get().ref_count, 1)
+        self.assertTrue(installer_storage.exists(name))
+
+        self.delete_and_run_jobs(copy)
+        self.assertFalse(InstallerBlob.objects.exists())
+        self.assertFalse(installer_storage.exists(name))
+
+    def test_replacing_installer_releases_previous(self):
+        software = self.create('Editor', 'editor.exe')
+        previous = software.installer.name
+        software.installer = ContentFile(b'nova versao', name='editor.exe')
+        with self.captureOnCommitCallbacks(execute=True):
+            software.save()
+        self.assertEqual(list(InstallerBlob.objects.values_list('sha256', flat=True)), [software.installer_sha256])
+        self.assertFalse(installer_storage.exists(previous))
+
+    def test_lost_remove_files_job_releases_nothing(self):
+        first = self.create('Editor', 'editor.exe')
+        self.create('Editor (Cópia)', 'copia.exe')
+        enqueue('remove_files', payload={'installers': [first.installer.name]})
+        old = BackgroundJob.claim_next(worker='a')
+        BackgroundJob.objects.filter(pk=old.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=10))
+        BackgroundJob.requeue_stale(timeout=60)
+        new = BackgroundJob.claim_next(worker='b')
+
+        with self.assertLogs('store.jobs', 'WARNING'):
+            run_job(old)
+        self.assertEqual(InstallerBlob.objects.get().ref_count, 2)
+        run_job(new)
+        self.assertEqual(InstallerBlob.objects.get().ref_count, 1)
+        # Repetir o job concluído não libera a referência de novo
+        run_job(BackgroundJob.objects.get(pk=new.pk))
+        self.assertEqual(InstallerBlob.objects.get().ref_count, 1)
+
+
+class BatchImporterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def run_import(self, items, **kwargs):
+        importer = BatchImporter(attach_files=False, **kwargs)
+        return importer, importer.run(items)
+
+    def test_creates_and_skips_existing(self):
+        items = [{'name': 'Editor', 'version': '1.0'}, {'name': 'Navegador', 'version': '2.0', 'category': 'BROWSER'}]
+        _, stats = self.run_import(items)
+        self.assertEqual((stats['created'], stats['skipped']), (2, 0))
+        _, stats = self.run_import(items)
+        self.assertEqual((stats['created'], stats['updated'], stats['skipped']), (0, 0, 2))
+        self.assertEqual(Software.objects.get(name='Navegador').category, 'BROWSER')
+
+    def test_update_keeps_missing_fields(self):
+        Software.objects.create(name='Editor', version='1.0', description='Antiga', category='OFFICE', install_args='/S')
+        _, stats = self.run_import([{'name': 'Editor', 'version': '1.0', 'description': 'Nova'}], update=True)
+        self.assertEqual(stats['updated'], 1)
+        software = Software.objects.get(name='Editor')
+        self.assertEqual((software.description, software.category, software.install_args), ('Nova', 'OFFICE', '/S'))
+
+    def test_colliding_slugs_get_suffix(self):
+        Software.objects.create(name='Foo', version='1.0')
+        _, stats = self.run_import([{'name': 'foo', 'version': '1.0'}, {'name': 'FOO', 'version': '1.0'}])
+        self.assertEqual(stats['created'], 2)
+        self.assertEqual(
+            sorted(Software.objects.values_list('slug', flat=True)),
+            ['foo-10', 'foo-10-2', 'foo-10-3']
+        )
+
+    def test_repeated_item_in_batch_last_wins(self):
+        _, stats = self.run_import([
+            {'name': 'Editor', 'version': '1.0', 'description': 'primeira'},
+            {'name': 'Editor', 'version': '1.0', 'description': 'segunda'},
+        ])
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(Software.objects.get().description, 'segunda')
+
+    def test_invalid_items_reported(self):
+        importer, stats = self.run_import([{'version': '1.0'}, 'texto', {'name': 'Editor'}], batch_size=2)
+        self.assertEqual((stats['invalid'], stats['created']), (2, 1))
+        self.assertEqual(len(importer.errors), 2)
+        self.assertEqual(Software.objects.get().version, '1.0.0')
+
+
+class DirectoryImporterTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.source = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        cache.clear()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+        shutil.rmtree(self.source)
+
+    def write(self, filename, content):
+        with open(os.path.join(self.source, filename), 'wb') as f:
+            f.write(content)
+
+    def run_import(self, items):
+        importer = DirectoryImporter(workers=2, update=True, base_dir=self.source)
+        with self.captureOnCommitCallbacks(execute=True):
+            return importer, importer.run(items)
+
+    def test_rerun_skips_unchanged_files(self):
+        self.write('editor.exe', b'versao 1')
+        items = [{'name': 'Editor', 'version': '1.0', 'installer': 'editor.exe'}]
+        _, stats = self.run_import(items)
+        self.assertEqual(stats['files'], 1)
+        _, stats = self.run_import(items)
+        self.assertEqual((stats['files'], stats['unchanged']), (0, 1))
+
+    def test_replaced_file_imported_after_admin_edit(self):
+        self.write('editor.exe', b'versao 1')
+        items = [{'name': 'Editor', 'version': '1.0', 'installer': 'editor.exe'}]
+        self.run_import(items)
+        # Mesmo nome e tamanho, data antiga (cp -p) e uma edição posterior no admin
+        path = os.path.join(self.source, 'editor.exe')
+        stat = os.stat(path)
+        self.write('editor.exe', b'versao 2')
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        software = Software.objects.get()
+        software.description = 'Editada no admin'
+        software.save()
+
+        _, stats = self.run_import(items)
+        self.assertEqual(stats['files'], 1)
+        with Software.objects.get().installer.open('rb') as f:
+            self.assertEqual(f.read(), b'versao 2')
+
+    def test_errors_report_original_positions(self):
+        self.write('editor.exe', b'editor')
+        importer, stats = self.run_import([
+            {'version': '1.0'},
+            {'name': 'Editor', 'version': '1.0', 'installer': 'editor.exe'},
+            {'name': 'Faltando', 'version': '1.0', 'installer': 'faltando.exe'},
+        ])
+        self.assertEqual((stats['invalid'], stats['created']), (2, 1))
+        self.assertTrue(importer.errors[0].startswith('Item 1:'))
+        self.assertTrue(importer.errors[1].startswith('Item 3:'))
+
+
+class IconRenditionTests(TestCase):
+    """Variantes do ícone geradas pelo job `generate_renditions`, fora da requisição."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        cache.clear()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def icon(self, color):
+        buffer = io.BytesIO()
+        Image.new('RGB', (400, 200), color).save(buffer, 'PNG')
+        return ContentFile(buffer.getvalue(), name='icone.png')
+
+    def run_jobs(self):
+        while job := BackgroundJob.claim_next():
+            run_job(job)
+
+    def test_rebuild_command_bumps_catalog_version(self):
+        Software.objects.create(name='Editor', version='1.0', icon=self.icon('red'))
+        version = get_catalog_version()
+        call_command('rebuild_renditions', stdout=io.StringIO())
+        self.assertNotEqual(Software.objects.get().icon_renditions, {})
+        self.assertGreater(get_catalog_version(), version)
+
+    def test_renditions_generated_by_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            software = Software.objects.create(name='Editor', version='1.0', icon=self.icon('red'))
+        software.refresh_from_db()
+        self.assertEqual(software.icon_renditions, {})
+
+        self.run_jobs()
+        software.refresh_from_db()
+        self.assertEqual(sorted(software.icon_renditions, key=int), ['64', '150', '300'])
+        self.assertEqual(
+            (software.icon_renditions['300']['width'], software.icon_renditions['300']['height']),
+            (300, 150)
+        )
+
+    def test_new_icon_discards_old_renditions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            software = Software.objects.create(name='Editor', version='1.0', icon=self.icon('red'))
+        self.run_jobs()
+
+        software.refresh_from_db()
+        old = software.icon_renditions
+        software.icon = self.icon('blue')
+        with self.captureOnCommitCallbacks(execute=True):
+            software.save()
+        software.refresh_from_db()
+        self.assertEqual(software.icon_renditions, {})
+
+        self.run_jobs()
+        software.refresh_from_db()
+        self.assertNotEqual(software.icon_renditions['64']['png'], old['64']['png'])
+
+    def test_job_for_removed_icon_writes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            software = Software.objects.create(name='Editor', version='1.0', icon=self.icon('red'))
+        Software.objects.filter(pk=software.pk).update(icon='')
+        self.run_jobs()
+        self.assertEqual(BackgroundJob.objects.get().message, 'Imagem removida ou substituída; nada gerado')
+        self.assertEqual(Software.objects.get(pk=software.pk).icon_renditions, {})
@@ -0,0 +1,143 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from .catalog_cache import get_catalog_version
+from .search import normalize_text
+
+
+class PrefixIndex:
+    """Índice de prefixos em memória sobre nomes e slugs de softwares.
+
+    Mantém uma lista ordenada de chaves normalizadas (nome completo, slug e
+    cada palavra do nome) e responde buscas por prefixo com `bisect`.
+    """
+
+    def __init__(self, entries=()):
+        self._keys = []
+        self._entries = {}
+        for entry in entries:
+            self._entries[entry['id']] = entry
+            self._keys.extend(self._keys_for(entry))
+        self._keys.sort()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _keys_for(entry):
+        name = normalize_text(entry['name'])
+        keys = {name, entry['slug']}
+        keys.update(name.split())
+        return [(key, entry['id']) for key in keys if key]
+
+    def add(self, entry):
+        self.remove(entry['id'])
+        self._entries[entry['id']] = entry
+        for key in self._keys_for(entry):
+            insort(self._keys, key)
+
+    def remove(self, entry_id):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for key in self._keys_for(entry):
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+
+    def search(self, prefix, limit=10):
+        prefix = normalize_text(prefix).strip()
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        position = bisect_left(self._keys, (prefix,))
+        while position < len(self._keys) and len(results) < limit:
+            key, entry_id = self._keys[position]
+            if not key.startswith(prefix):
+                break
+            if entry_id not in seen:
+                seen.add(entry_id)
+                results.append(self._entries[entry_id])
+            position += 1
+        return results
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+# Última versão do catálogo lida do cache e quando (time.monotonic)
+_checked_version = None
+_checked_at = None
+
+
+def _entry(software):
+    return {
+        'id': software['id'] if isinstance(software, dict) else software.pk,
+        'name': software['name'] if isinstance(software, dict) else software.name,
+        'slug': software['slug'] if isinstance(software, dict) else software.slug,
+        'version': software['version'] if isinstance(software, dict) else software.version,
+    }
+
+
+def current_version():
+    """Versão do catálogo, lida do cache no máximo uma vez por intervalo.
+
+    Cada leitura é uma ida ao cache compartilhado (uma consulta SQL com o
+    DatabaseCache); entre leituras vale a última versão vista, então uma
+    alteração feita em outro worker aparece em até
+    TYPEAHEAD_VERSION_CHECK_INTERVAL segundos.
+    """
+    global _checked_version, _checked_at
+    now = time.monotonic()
+    if _checked_at is None or now - _checked_at >= getattr(settings, 'TYPEAHEAD_VERSION_CHECK_INTERVAL', 1):
+        _checked_version = get_catalog_version()
+        _checked_at = now
+    return _checked_version
+
+
+def get_index():
+    """Retorna o índice do processo, reconstruindo-o se o catálogo mudou.
+
+    A versão do catálogo fica no cache compartilhado, então uma alteração feita
+    em qualquer worker invalida o índice de todos (ver `current_version`).
+    """
+    global _index, _index_version
+    version = current_version()
+    if _index is None or _index_version != version:
+        with _index_lock:
+            if _index is None or _index_version != version:
+                from .models import Software
+                rows = Software.objects.filter(is_active=True).values('id', 'name', 'slug', 'version')
+                _index = PrefixIndex(_entry(row) for row in rows)
+                _index_version = version
+    return _index
+
+
+def patch_index(software, version, deleted=False):
+    """Aplica uma alteração ao índice local sem reconstruí-lo.
+
+    `version` é a versão do catálogo gerada por esta alteração; se o índice
+    não estava na versão imediatamente anterior, outra alteração ocorreu em
+    outro worker e o índice será reconstruído no próximo acesso.
+    """
+    global _index_version, _checked_version
+    with _index_lock:
+        if version is not None and (_checked_version is None or version > _checked_version):
+            # A alteração deste processo vale já, sem esperar a próxima leitura
+            _checked_version = version
+        if _index is None or version is None or _index_version != version - 1:
+            return
+        if deleted or not software.is_active:
+            _index.remove(software.pk)
+        else:
+            _index.add(_entry(software))
+        _index_version = version
+
+
+def suggest(prefix, limit=10):
+    return get_index().search(prefix, limit)
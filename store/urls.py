@@ -3,9 +3,12 @@ from django.contrib import admin
 from django.contrib.admin.views.decorators import staff_member_required
 from django.views.generic import RedirectView
 from . import views
-from .admin_views import import_software_view, export_software_view
+from .admin_views import import_software_view, import_job_view, export_software_view
 from django.contrib.auth import views as auth_views
-from .views_api import get_tasks_for_host, update_task_status, create_task
+from .views_api import (
+    get_tasks_for_host, update_task_status, create_task, claim_tasks,
+    update_tasks_batch, append_task_log
+)
 
 app_name = 'store'
 
@@ -20,9 +23,20 @@ urlpatterns = [
     # Detalhes do software
     path('software/<slug:slug>/', views.SoftwareDetailView.as_view(), name='software_detail'),
     
+    # Download do instalador (com suporte a Range)
+    path('software/<int:pk>/download/', views.download_software, name='download_software'),
+
+    path('software/delta/<int:pk>/', views.download_delta, name='download_delta'),
+
+    # Screenshots paginadas (carregadas sob demanda na página de detalhes)
+    path('software/<slug:slug>/screenshots/', views.software_screenshots, name='software_screenshots'),
+
     # Instalação de software
     path('software/<slug:slug>/install/', views.install_software, name='install_software'),
     
+    # Autocompletar da busca
+    path('busca/sugestoes/', views.typeahead, name='typeahead'),
+
     # Sugestão de software
     path('sugerir/', views.suggest_software, name='suggest_software'),
     
@@ -30,6 +44,10 @@ urlpatterns = [
     path('admin/import-software/', 
          staff_member_required(import_software_view), 
          name='import_software'),
+
+    path('admin/import-software/jobs/<int:job_id>/',
+         staff_member_required(import_job_view),
+         name='import_job'),
          
     path('admin/export-software/', 
          staff_member_required(export_software_view), 
@@ -38,5 +56,8 @@ urlpatterns = [
     # APIs do Agente
     path('api/tasks/', get_tasks_for_host, name='agent_tasks'),
     path('api/tasks/<int:task_id>/', update_task_status, name='agent_task_status'),
+    path('api/tasks/<int:task_id>/log/', append_task_log, name='agent_task_log'),
     path('api/tasks/create/', create_task, name='agent_task_create'),
+    path('api/tasks/claim/', claim_tasks, name='agent_task_claim'),
+    path('api/tasks/batch/', update_tasks_batch, name='agent_task_batch'),
 ]
@@ -1,17 +1,58 @@
+import os
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.views.generic import ListView, DetailView
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
-from django.db import models
-from .models import Software
+from django.http import JsonResponse, Http404
+from django.views.static import serve
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.paginator import Paginator
+from django.utils.safestring import mark_safe
+from .models import Software, InstallerDelta
 from .models_suggestion import SoftwareSuggestion
 from .forms import SoftwareSuggestionForm
 from .models_task import InstallationTask
-from .kace import get_latest_hostname_for_user
+from .search import search_software
+from .pagination import KeysetPaginator, InvalidCursor
+from .catalog_cache import get_catalog_version
+from .typeahead import suggest
+from .downloads import serve_file, is_initial_request
+from .renditions import RENDITIONS_DIR, SCREENSHOT_SIZES
+from .kace import peek_hostname, resolve_hostname_async, wait_for_hostname
+from django.conf import settings
 
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_http_methods
+
+def _request_username(request):
+    return (getattr(request.user, 'email', '') or request.user.username or '').split('@')[0]
+
+def resolve_request_hostname(request, wait=None):
+    """Retorna `(hostname, pendente)` para o usuário da requisição.
+
+    Usa o hostname da sessão; se ausente, consulta o resultado da resolução em
+    segundo plano sem bloquear. Com `wait`, aguarda no máximo esse tempo.
+    """
+    hostname = request.session.get('resolved_hostname')
+    if hostname:
+        return hostname, False
+
+    username = _request_username(request)
+    if wait:
+        hostname, pending = wait_for_hostname(username, wait), False
+    else:
+        resolved, hostname = peek_hostname(username)
+        pending = not resolved
+        if pending:
+            resolve_hostname_async(username)
+
+    if hostname:
+        request.session['resolved_hostname'] = hostname
+    return hostname, pending
 
 @method_decorator(login_required, name='dispatch')
 class SoftwareListView(ListView):
@@ -20,6 +61,26 @@ class SoftwareListView(ListView):
     context_object_name = 'softwares'
     paginate_by = 12
 
+    def get(self, request, *args, **kwargs):
+        self.catalog_version = get_catalog_version()
+        grid = cache.get(self.grid_cache_key())
+        if grid is None:
+            return super().get(request, *args, **kwargs)
+        # Grade em cache: sem busca, paginação nem contagem no banco
+        self.object_list = Software.objects.none()
+        return self.render_to_response({**self.page_context(), 'cached_grid': mark_safe(grid)})
+
+    def grid_cache_key(self):
+        """Chave do fragmento `catalog_grid` de software_list.html (mesmos valores)."""
+        params = self.request.GET
+        return make_template_fragment_key('catalog_grid', [
+            self.catalog_version,
+            params.get('category', ''),
+            params.get('search', ''),
+            params.get('cursor', ''),
+            params.get('page', ''),
+        ])
+
     def get_queryset(self):
         queryset = Software.objects.filter(is_active=True)
         
@@ -28,25 +89,47 @@ class SoftwareListView(ListView):
         if category:
             queryset = queryset.filter(category=category)
             
-        # Filtro por busca
+        # Filtro por busca (texto completo, ordenado por relevância)
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(name__icontains=search)
+            queryset = search_software(queryset, search)
             
         return queryset
-    
+
+    def paginate_queryset(self, queryset, page_size):
+        # Resultados de busca são limitados (SEARCH_MAX_RESULTS) e ordenados por
+        # relevância: paginação comum, com OFFSET sobre no máximo esse número de linhas
+        if self.request.GET.get('search'):
+            return super().paginate_queryset(queryset, page_size)
+
+        # Navegação no catálogo: cursor sobre (nome, id), sem OFFSET nem COUNT(*)
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404('Cursor de paginação inválido.')
+        return paginator, page, page, True
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = dict(Software.CATEGORY_CHOICES)
-        context['current_category'] = self.request.GET.get('category', '')
-        context['search_query'] = self.request.GET.get('search', '')
-        # Usa hostname resolvido em sessão; se ausente, busca no KACE e armazena
-        resolved_hostname = self.request.session.get('resolved_hostname')
-        if resolved_hostname is None:
-            username = (self.request.user.email or self.request.user.username or '').split('@')[0]
-            resolved_hostname = get_latest_hostname_for_user(username)
-            self.request.session['resolved_hostname'] = resolved_hostname
-        context['resolved_hostname'] = resolved_hostname
+        context['keyset_pagination'] = isinstance(context.get('paginator'), KeysetPaginator)
+        context.update(self.page_context())
+        return context
+
+    def page_context(self):
+        """Contexto da página fora da grade (também quando ela vem do cache)."""
+        context = {
+            'view': self,
+            # Chave dos fragmentos em cache da grade; a página só consulta o
+            # banco quando o fragmento não está em cache (ver `get`)
+            'catalog_version': self.catalog_version,
+            'catalog_cache_ttl': getattr(settings, 'CATALOG_CACHE_TTL', 3600),
+            'categories': dict(Software.CATEGORY_CHOICES),
+            'current_category': self.request.GET.get('category', ''),
+            'search_query': self.request.GET.get('search', ''),
+        }
+        # Usa hostname resolvido em sessão; se ausente, não bloqueia a página
+        context['resolved_hostname'], context['hostname_pending'] = resolve_request_hostname(self.request)
         return context
 
 class SoftwareDetailView(DetailView):
@@ -58,24 +141,17 @@ class SoftwareDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        resolved_hostname = self.request.session.get('resolved_hostname')
-        if resolved_hostname is None:
-            username = (self.request.user.email or self.request.user.username or '').split('@')[0]
-            resolved_hostname = get_latest_hostname_for_user(username)
-            self.request.session['resolved_hostname'] = resolved_hostname
-        context['resolved_hostname'] = resolved_hostname
+        context['resolved_hostname'], context['hostname_pending'] = resolve_request_hostname(self.request)
+        # As imagens em si são carregadas sob demanda pela API de screenshots
+        context['screenshot_count'] = self.object.screenshots.count()
         return context
 
 @login_required
 def install_software(request, slug):
     software = get_object_or_404(Software, slug=slug, is_active=True)
     
-    # Segurança: hostname só é válido se vier do KACE; usa cache da sessão quando disponível
-    hostname = request.session.get('resolved_hostname')
-    if hostname is None:
-        username = (request.user.email or request.user.username or '').split('@')[0]
-        hostname = get_latest_hostname_for_user(username)
-        request.session['resolved_hostname'] = hostname
+    # Segurança: hostname só é válido se vier do KACE; aguarda a resolução por tempo limitado
+    hostname, _ = resolve_request_hostname(request, wait=settings.KACE_RESOLVE_WAIT)
 
     if not hostname:
         messages.error(
@@ -90,8 +166,8 @@ def install_software(request, slug):
 
     # Cria a tarefa de instalação
     try:
-        # Gera a URL do instalador
-        installer_url = request.build_absolute_uri(software.installer.url)
+        # URL de download rastreada (com suporte a Range para retomada pelo agente)
+        installer_url = request.build_absolute_uri(software.get_download_url())
         
         # Cria a tarefa
         task = InstallationTask.objects.create(
@@ -107,10 +183,7 @@ def install_software(request, slug):
             'A instalação começará em instantes, por favor aguarde.',
             extra_tags='alert-success'
         )
-        
-        # Atualiza o contador de downloads
-        software.download_count = models.F('download_count') + 1
-        software.save(update_fields=['download_count'])
+        # O contador de downloads é atualizado quando o agente baixa o instalador
         
     except Exception as e:
         messages.error(
@@ -124,6 +197,96 @@ def install_software(request, slug):
     
     return redirect('store:software_list')
 
+@require_http_methods(["GET", "HEAD"])
+def download_software(request, pk):
+    """Entrega o instalador com suporte a Range e registra o download.
+
+    Só a requisição que inicia a transferência é registrada; retomadas
+    (Range a partir de um byte > 0) não contam novamente.
+    """
+    software = get_object_or_404(Software, pk=pk, is_active=True)
+    if not software.installer:
+        raise Http404('Software sem instalador.')
+    try:
+        size = software.installer.size
+    except FileNotFoundError:
+        raise Http404('Instalador não encontrado.')
+
+    if is_initial_request(request, size):
+        software.record_download(request)
+    return serve_file(request, software.installer)
+
+@require_http_methods(["GET", "HEAD"])
+def download_delta(request, pk):
+    """Entrega um patch entre instaladores (usado pelos agentes)."""
+    delta = get_object_or_404(InstallerDelta, pk=pk)
+    return serve_file(request, delta.patch)
+
+@login_required
+def software_screenshots(request, slug):
+    """Screenshots paginadas de um software, com a variante do tamanho pedido.
+
+    `?size=` é o lado (px) exibido; largura e altura vêm na resposta para que
+    a página reserve o espaço antes de a imagem carregar.
+    """
+    software = get_object_or_404(Software, slug=slug, is_active=True)
+    try:
+        size = min(max(int(request.GET.get('size', 320)), 1), 2000)
+        per_page = min(max(int(request.GET.get('per_page', 6)), 1), 24)
+    except ValueError:
+        return JsonResponse({'error': 'size and per_page must be integers'}, status=400)
+
+    paginator = Paginator(software.screenshots.order_by('order', 'created_at', 'id'), per_page)
+    page = paginator.get_page(request.GET.get('page'))
+    results = []
+    for screenshot in page:
+        item = {
+            'id': screenshot.id,
+            'caption': screenshot.caption,
+            'original_url': screenshot.image.url,
+        }
+        rendition = screenshot.get_rendition(size)
+        if rendition:
+            item.update(rendition)
+            # Maior variante, para ampliar ao clicar
+            item['full_url'] = screenshot.get_rendition(max(SCREENSHOT_SIZES))['url']
+        else:
+            item.update({'url': screenshot.image.url, 'webp_url': None, 'width': None, 'height': None})
+            item['full_url'] = screenshot.image.url
+        results.append(item)
+
+    return JsonResponse({
+        'results': results,
+        'page': page.number,
+        'next_page': page.next_page_number() if page.has_next() else None,
+        'count': paginator.count,
+    })
+
+def serve_rendition(request, path):
+    """Variantes de imagens: nomes derivados do conteúdo, cacheáveis para sempre."""
+    response = serve(request, path, document_root=os.path.join(settings.MEDIA_ROOT, RENDITIONS_DIR))
+    if response.status_code == 200:
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@login_required
+def typeahead(request):
+    """Sugestões para a caixa de busca, servidas do índice em memória.
+
+    O catálogo não é consultado; a versão dele é lida do cache no máximo uma
+    vez por segundo (typeahead.current_version).
+    """
+    prefix = request.GET.get('q', '')[:100]
+    results = [
+        {
+            'name': entry['name'],
+            'version': entry['version'],
+            'url': reverse('store:software_detail', kwargs={'slug': entry['slug']}),
+        }
+        for entry in suggest(prefix, limit=10)
+    ]
+    return JsonResponse({'results': results})
+
 @login_required
 def suggest_software(request):
     if request.method == 'POST':
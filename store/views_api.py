@@ -1,46 +1,129 @@
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from datetime import timedelta
 from .models import Software
-from .models_task import InstallationTask
+from .models_task import InstallationTask, InstallationLogChunk
+from .deltas import deltas_by_target
+from .agent_sync import (
+    get_host_version, bump_host_version, host_etag, long_poll_available, versions_are_shared,
+    wait_for_host_change
+)
 import json
 from django.http import HttpResponseBadRequest
 from django.core.exceptions import ObjectDoesNotExist
 
+def _serialize_task(task, deltas=None, request=None):
+    """Converte uma tarefa para o formato JSON entregue ao agente.
+
+    `deltas` são os patches disponíveis para o instalador da tarefa: o agente
+    que já tem o instalador de origem pode baixar só o patch.
+    """
+    data = {
+        'id': task.id,
+        'software': {
+            'name': task.software.name,
+            'version': task.software.version
+        },
+        'installer_url': task.installer_url,
+        # Permite ao agente reutilizar um instalador já presente no cache local
+        'installer_sha256': task.software.installer_sha256,
+        'installer_size': task.software.installer_size,
+        'status': task.status,
+        'created_at': task.created_at.isoformat(),
+        'install_args': task.software.install_args or ''
+    }
+    if task.lease_expires_at:
+        data['lease_expires_at'] = task.lease_expires_at.isoformat()
+    if task.claim_token:
+        # Exigido nas atualizações de status enquanto o lease for deste agente
+        data['claim_token'] = task.claim_token
+    if deltas:
+        data['deltas'] = [
+            {
+                'source_sha256': delta.source_sha256,
+                'format': delta.backend,
+                'size': delta.size,
+                'url': request.build_absolute_uri(delta.get_download_url()) if request else delta.get_download_url(),
+            }
+            for delta in deltas
+        ]
+    return data
+
+def _serialize_tasks(tasks, request=None):
+    tasks = list(tasks)
+    deltas = deltas_by_target(task.software.installer_sha256 for task in tasks)
+    return [_serialize_task(task, deltas.get(task.software.installer_sha256), request) for task in tasks]
+
+def _pending_tasks(hostname, request=None):
+    """Serializa as tarefas pendentes de um hostname."""
+    # Usa o índice (hostname, status) de InstallationTask
+    tasks = InstallationTask.objects.filter(
+        hostname=hostname,
+        status='pending'
+    ).select_related('software')
+    return _serialize_tasks(tasks, request)
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_tasks_for_host(request):
-    """Retorna tarefas pendentes para um hostname específico"""
+    """Retorna tarefas pendentes para um hostname específico.
+
+    A resposta traz um ETag derivado da versão das tarefas do host. Se o agente
+    enviar `If-None-Match` com esse ETag e nada tiver mudado, recebe 304 sem
+    consultar as tarefas (e sem nenhuma consulta ao banco com o Redis; com o
+    DatabaseCache, a versão é lida da tabela do cache). Com
+    `?wait=<segundos>` a requisição aguarda (long-poll) até surgir uma
+    mudança para o host ou o tempo se esgotar; com o DatabaseCache, responde
+    na hora.
+    """
     hostname = request.GET.get('hostname')
     if not hostname:
         return HttpResponseBadRequest('Hostname is required')
 
     try:
-        # Busca tarefas pendentes para este hostname
-        tasks = InstallationTask.objects.filter(
-            hostname=hostname,
-            status='pending'
-        ).select_related('software')
-
-        # Converte para formato JSON
-        task_list = []
-        for task in tasks:
-            task_list.append({
-                'id': task.id,
-                'software': {
-                    'name': task.software.name,
-                    'version': task.software.version
-                },
-                'installer_url': task.installer_url,
-                'status': task.status,
-                'created_at': task.created_at.isoformat(),
-                'install_args': task.software.install_args or ''
-            })
-
-        return JsonResponse({'tasks': task_list})
+        wait = int(request.GET.get('wait', 0))
+    except ValueError:
+        return HttpResponseBadRequest('wait must be an integer')
+    wait = min(max(wait, 0), settings.AGENT_LONG_POLL_MAX_WAIT)
+    shared = versions_are_shared()
+    if not long_poll_available():
+        # Cache local ao processo: mudanças feitas por outro processo não
+        # aparecem na versão. Cache no banco: aguardar seria consultar o banco
+        # a cada intervalo. Nos dois casos responde na hora, sem aguardar.
+        wait = 0
+
+    try:
+        # A versão é lida antes da consulta: se uma tarefa for criada no meio,
+        # o agente recebe um ETag antigo e simplesmente busca de novo.
+        version = get_host_version(hostname)
+        if_none_match = request.headers.get('If-None-Match') if shared else None
+
+        if if_none_match == host_etag(hostname, version):
+            if wait:
+                version = wait_for_host_change(hostname, version, wait)
+            if if_none_match == host_etag(hostname, version):
+                response = HttpResponse(status=304)
+                response['ETag'] = host_etag(hostname, version)
+                return response
+
+        task_list = _pending_tasks(hostname, request)
+
+        # Sem tarefas: mantém a conexão até haver mudança para este host
+        if not task_list and wait:
+            changed = wait_for_host_change(hostname, version, wait)
+            if changed != version:
+                version = changed
+                task_list = _pending_tasks(hostname, request)
+
+        response = JsonResponse({'tasks': task_list})
+        response['ETag'] = host_etag(hostname, version)
+        response['Cache-Control'] = 'no-cache'
+        return response
 
     except Exception as e:
         return JsonResponse(
@@ -48,27 +131,58 @@ def get_tasks_for_host(request):
             status=500
         )
 
+def _claim_lost(task, claim_token):
+    """Se quem atualiza não tem o lease atual da tarefa.
+
+    Tarefas nunca reivindicadas (sem token) aceitam atualizações sem token;
+    um token que não é o atual (lease expirado, tarefa reivindicada por outro
+    agente) é recusado.
+    """
+    return bool(task.claim_token or claim_token) and claim_token != task.claim_token
+
+def _apply_status(task, status, now):
+    """Aplica um novo status à tarefa, ajustando o lease."""
+    task.status = status
+    task.updated_at = now
+    # Reportar `in_progress` renova o lease; status final o encerra
+    if status == 'in_progress' and task.lease_expires_at:
+        task.lease_expires_at = now + timedelta(seconds=settings.AGENT_TASK_LEASE_SECONDS)
+    elif status != 'in_progress':
+        task.lease_expires_at = None
+    task.set_finished_at(now)
+
 @csrf_exempt
 @require_http_methods(["PATCH"])
 def update_task_status(request, task_id):
-    """Atualiza o status de uma tarefa"""
+    """Atualiza o status de uma tarefa.
+
+    Tarefas reivindicadas exigem o `claim_token` recebido em /claim/.
+    """
     if not request.body:
         return HttpResponseBadRequest('Request body is required')
 
     try:
         data = json.loads(request.body)
+        if not isinstance(data, dict):
+            return HttpResponseBadRequest('JSON body must be an object')
         status = data.get('status')
         log = data.get('log', '')
 
         if not status:
             return HttpResponseBadRequest('Status is required')
+        if status not in dict(InstallationTask.STATUS_CHOICES):
+            return HttpResponseBadRequest('Invalid status')
 
         # Atualiza a tarefa
         with transaction.atomic():
             task = InstallationTask.objects.select_for_update().get(id=task_id)
-            task.status = status
+            if _claim_lost(task, data.get('claim_token') or ''):
+                return JsonResponse(
+                    {'error': 'Task lease expired or claimed by another agent'},
+                    status=409
+                )
+            _apply_status(task, status, timezone.now())
             task.log = log
-            task.updated_at = timezone.now()
             task.save()
 
         return JsonResponse({'status': 'success'})
@@ -86,6 +200,184 @@ def update_task_status(request, task_id):
             status=500
         )
 
+@csrf_exempt
+@require_http_methods(["POST"])
+def append_task_log(request, task_id):
+    """Acrescenta trechos ao log de uma tarefa sem reenviar o log inteiro.
+
+    Aceita `{"sequence": n, "content": "..."}` ou `{"chunks": [...]}`. Trechos
+    com sequência já recebida são ignorados, então reenvios são seguros.
+    """
+    if not request.body:
+        return HttpResponseBadRequest('Request body is required')
+
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            return HttpResponseBadRequest('JSON body must be an object')
+        chunks = data.get('chunks', [data])
+        if not isinstance(chunks, list) or not chunks:
+            return HttpResponseBadRequest('chunks must be a non-empty list')
+
+        objs = []
+        for chunk in chunks:
+            sequence = chunk.get('sequence') if isinstance(chunk, dict) else None
+            if not isinstance(sequence, int) or sequence < 0:
+                return HttpResponseBadRequest('sequence must be a non-negative integer')
+            objs.append(InstallationLogChunk(
+                task_id=task_id,
+                sequence=sequence,
+                content=chunk.get('content', '')
+            ))
+
+        if not InstallationTask.objects.filter(id=task_id).exists():
+            return JsonResponse(
+                {'error': 'Task not found'},
+                status=404
+            )
+        InstallationLogChunk.objects.bulk_create(objs, ignore_conflicts=True)
+
+        last = InstallationLogChunk.objects.filter(task_id=task_id).order_by('-sequence').values_list('sequence', flat=True).first()
+        return JsonResponse({'status': 'success', 'next_sequence': last + 1})
+
+    except json.JSONDecodeError:
+        return HttpResponseBadRequest('Invalid JSON')
+    except Exception as e:
+        return JsonResponse(
+            {'error': str(e)},
+            status=500
+        )
+
+@csrf_exempt
+@require_http_methods(["PATCH"])
+def update_tasks_batch(request):
+    """Atualiza o status de várias tarefas de um hostname em uma requisição.
+
+    Espera `{"hostname": ..., "tasks": [{"id", "status", "log", "claim_token"}, ...]}`
+    e retorna um resultado por item; um item inválido não impede os demais.
+    """
+    if not request.body:
+        return HttpResponseBadRequest('Request body is required')
+
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            return HttpResponseBadRequest('JSON body must be an object')
+        hostname = data.get('hostname')
+        items = data.get('tasks')
+        if not hostname:
+            return HttpResponseBadRequest('hostname is required')
+        if not isinstance(items, list) or not items:
+            return HttpResponseBadRequest('tasks must be a non-empty list')
+        if len(items) > settings.AGENT_BATCH_MAX_ITEMS:
+            return HttpResponseBadRequest(f'At most {settings.AGENT_BATCH_MAX_ITEMS} tasks per request')
+
+        valid_statuses = dict(InstallationTask.STATUS_CHOICES)
+        results = [None] * len(items)
+        requested = {}
+        for index, item in enumerate(items):
+            task_id = item.get('id') if isinstance(item, dict) else None
+            if not isinstance(task_id, int):
+                results[index] = {'id': task_id, 'error': 'id must be an integer'}
+            elif item.get('status') not in valid_statuses:
+                results[index] = {'id': task_id, 'error': 'Invalid status'}
+            elif task_id in requested:
+                results[index] = {'id': task_id, 'error': 'Duplicate id in batch'}
+            else:
+                requested[task_id] = index
+
+        now = timezone.now()
+        with_log, without_log = [], []
+        with transaction.atomic():
+            tasks = InstallationTask.objects.select_for_update().filter(
+                id__in=requested
+            ).defer('log')
+            tasks = {task.id: task for task in tasks}
+
+            for task_id, index in requested.items():
+                item = items[index]
+                task = tasks.get(task_id)
+                if task is None:
+                    results[index] = {'id': task_id, 'error': 'Task not found'}
+                    continue
+                if task.hostname != hostname:
+                    results[index] = {'id': task_id, 'error': 'Task belongs to another hostname'}
+                    continue
+                if _claim_lost(task, item.get('claim_token') or ''):
+                    results[index] = {'id': task_id, 'error': 'Task lease expired or claimed by another agent'}
+                    continue
+                _apply_status(task, item['status'], now)
+                if 'log' in item:
+                    task.log = item['log'] or ''
+                    with_log.append(task)
+                else:
+                    without_log.append(task)
+                results[index] = {'id': task_id, 'status': 'success'}
+
+            fields = ['status', 'updated_at', 'lease_expires_at', 'finished_at']
+            if with_log:
+                InstallationTask.objects.bulk_update(with_log, fields + ['log'])
+            if without_log:
+                InstallationTask.objects.bulk_update(without_log, fields)
+
+        # bulk_update não dispara post_save
+        if with_log or without_log:
+            bump_host_version(hostname)
+
+        return JsonResponse({'results': results})
+
+    except json.JSONDecodeError:
+        return HttpResponseBadRequest('Invalid JSON')
+    except Exception as e:
+        return JsonResponse(
+            {'error': str(e)},
+            status=500
+        )
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def claim_tasks(request):
+    """Reivindica tarefas pendentes de um hostname, com lease.
+
+    As tarefas retornadas já estão em `in_progress`; se o agente não reportar
+    até o lease expirar, elas voltam para `pending`. `lease_seconds` é
+    limitado a TASK_LEASE_MAX_SECONDS.
+    """
+    if not request.body:
+        return HttpResponseBadRequest('Request body is required')
+
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            return HttpResponseBadRequest('JSON body must be an object')
+        hostname = data.get('hostname')
+        if not hostname:
+            return HttpResponseBadRequest('hostname is required')
+
+        try:
+            limit = int(data.get('limit', 1))
+            lease_seconds = int(data.get('lease_seconds', settings.AGENT_TASK_LEASE_SECONDS))
+        except (TypeError, ValueError):
+            return HttpResponseBadRequest('limit and lease_seconds must be integers')
+        if lease_seconds <= 0:
+            return HttpResponseBadRequest('lease_seconds must be positive')
+        limit = min(max(limit, 1), settings.AGENT_CLAIM_MAX_TASKS)
+        lease_seconds = min(lease_seconds, settings.TASK_LEASE_MAX_SECONDS)
+
+        # Recupera tarefas abandonadas deste host antes de reivindicar
+        InstallationTask.release_expired_leases(hostname)
+        tasks = InstallationTask.claim_for_host(hostname, limit, lease_seconds)
+
+        return JsonResponse({'tasks': _serialize_tasks(tasks, request)})
+
+    except json.JSONDecodeError:
+        return HttpResponseBadRequest('Invalid JSON')
+    except Exception as e:
+        return JsonResponse(
+            {'error': str(e)},
+            status=500
+        )
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def create_task(request):
@@ -95,6 +387,8 @@ def create_task(request):
 
     try:
         data = json.loads(request.body)
+        if not isinstance(data, dict):
+            return HttpResponseBadRequest('JSON body must be an object')
         
         # Valida os dados
         required_fields = ['software_id', 'hostname', 'installer_url']